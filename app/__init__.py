@@ -10,10 +10,11 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 session_ext = Session()
 supabase: Client | None = None
 db = None
+engine = None
 
 
 def create_app():
-    global supabase, db
+    global supabase, db, engine
 
     load_dotenv()
     app = Flask(__name__)  # por defecto usa app/templates y app/static
@@ -21,20 +22,70 @@ def create_app():
     # Config básica
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
     app.config["SESSION_PERMANENT"] = False
-    app.config["SESSION_TYPE"] = "filesystem"
-    session_ext.init_app(app)
+    # filesystem (por defecto) / redis / ... → backends propios de Flask-Session
+    # sql → tabla de sesiones con expiración y barrido periódico (opcional)
+    app.config["SESSION_TYPE"] = os.getenv("SESSION_TYPE", "filesystem")
+    if app.config["SESSION_TYPE"] == "sql":
+        from .services.session_store import SqlSessionInterface
+
+        os.makedirs(app.instance_path, exist_ok=True)
+        session_db_url = os.getenv(
+            "SESSION_DATABASE_URL",
+            "sqlite:///" + os.path.join(app.instance_path, "sessions.db"),
+        )
+        app.session_interface = SqlSessionInterface(
+            app,
+            session_db_url,
+            sweep_interval=int(os.getenv("SESSION_SWEEP_INTERVAL", "300")),
+            permanent=app.config["SESSION_PERMANENT"],
+        )
+    else:
+        session_ext.init_app(app)
 
     # Supabase
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-    # DB (si la usas)
+    # DB directa (pool de SQLAlchemy) para las lecturas calientes;
+    # ver app/repositories (DATA_BACKEND=sql)
     db_url = os.getenv("DATABASE_URL")
     if db_url:
-        engine = create_engine(db_url)
+        engine = create_engine(
+            db_url,
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            pool_pre_ping=True,
+        )
         db = scoped_session(sessionmaker(bind=engine))
         app.extensions["sqlalchemy_db"] = db
+        app.extensions["sqlalchemy_engine"] = engine
+
+    # Latencias por endpoint (/metrics) y header Server-Timing
+    from .services import metrics
+    metrics.init_app(app, supabase_client=supabase, engine=engine)
+
+    # Eventos de tickets en vivo (SSE)
+    from .services import live_events
+    live_events.init_app(app, SUPABASE_URL, SUPABASE_KEY)
+
+    # Vencimientos de SLA (marca sla_breached en segundo plano)
+    from .services import sla
+    sla.init_app(app)
+
+    # Asignación de tickets nuevos al técnico con menos carga
+    from .services import assignment
+    assignment.init_app(app)
+
+    # Clasificador local de respaldo (entrena en segundo plano)
+    from .services import fallback_classifier
+    fallback_classifier.init_app(app)
+
+    # Clasificación IA en segundo plano (AI_CLASSIFICATION_MODE=async)
+    from .services import classification_queue
+    classification_queue.init_app(app)
 
     # Blueprints
     from .main.routes import main_bp
@@ -1,6 +1,21 @@
 # app/admin/routes.py
 from flask import Blueprint, render_template, session, redirect, url_for, request
+from flask import Response, stream_with_context
 from app import supabase
+from app.repositories import companies as company_repo
+from app.repositories import tickets as ticket_repo
+from app.repositories import users as user_repo
+from app.repositories.base import sql_enabled
+from app.services.companies import COMPANY_LIST_COLUMNS, company_ticket_counts
+from app.services.counters import PlatformCounters, get_platform_counters
+from app.services.fanout import FanOut
+from app.services.live_events import ADMIN_CHANNEL, broker
+from app.services.pagination import Page, count_mode, offset_paginate, paginate
+from app.services.reference_cache import reference_cache
+from app.services.ticket_search import search_tickets
+from app.services.tickets_common import FINAL_STATUSES
+from app.services.users import USER_ROLES, apply_sort, users_csv, users_query
+from datetime import datetime, timedelta, timezone
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -49,63 +64,37 @@ def home_admin():
     #         print("Error obteniendo usuario:", e)
 
     # ─────────────────────────────────────
-    # MÉTRICAS PRINCIPALES
+    # MÉTRICAS PRINCIPALES + TICKETS RECIENTES (en paralelo)
     # ─────────────────────────────────────
-
-    resp_tickets = supabase.table("ticket").select("*", count="exact").execute()
-    total_tickets = resp_tickets.count or 0
-
-    resp_users = supabase.table("users").select("username_id", count="exact").execute()
-    total_users = resp_users.count or 0
-
-    resp_collab = (
-        supabase.table("users")
-        .select("username_id", count="exact")
-        .eq("role", "admin_tech")
-        .execute()
-    )
-    total_collaborators = resp_collab.count or 0
-
-    resp_companies = (
-        supabase.table("company")
-        .select("company_id", count="exact")
-        .execute()
-    )
-    total_companies = resp_companies.count or 0
-
-    # ─────────────────────────────────────
-    # TICKETS RECIENTES
-    # ─────────────────────────────────────
-    resp_recent = (
-        supabase
-        .table("ticket")
-        .select("ticket_id, title, status, priority_id, category_id, created_at")
-        .order("created_at", desc=True)
-        .limit(5)
-        .execute()
-    )
-
-    raw_tickets = resp_recent.data or []
+    def load_recent_tickets():
+        if sql_enabled():
+            return ticket_repo.recent_tickets(limit=5)
+        resp_recent = (
+            supabase
+            .table("ticket")
+            .select("ticket_id, title, status, priority_id, category_id, created_at")
+            .order("created_at", desc=True)
+            .limit(5)
+            .execute()
+        )
+        return resp_recent.data or []
+
+    fan = FanOut()
+    # Contadores globales (tabla platform_counters, mantenida por triggers)
+    fan.submit("counters", get_platform_counters, default=PlatformCounters())
+    fan.submit("recent", load_recent_tickets, default=[])
+    # Calentar la caché de category/priority mientras tanto
+    fan.submit("reference", reference_cache.categories, default=[])
+    results = fan.gather()
+
+    counters = results["counters"]
+    raw_tickets = results["recent"]
     recent_tickets = []
 
     for row in raw_tickets:
-        category_id = row.get("category_id")
-        category_name = "Sin categoría"
-
-        if category_id:
-            try:
-                resp_cat = (
-                    supabase
-                    .table("category")
-                    .select("name")
-                    .eq("category_id", category_id)
-                    .single()
-                    .execute()
-                )
-                if resp_cat.data:
-                    category_name = resp_cat.data["name"]
-            except:
-                pass
+        category_name = reference_cache.category_name(
+            row.get("category_id"), "Sin categoría"
+        )
 
         status = row.get("status") or "open"
         status_color = {
@@ -120,6 +109,7 @@ def home_admin():
             2: ("Media", "warning"),
             3: ("Alta", "danger"),
         }.get(priority_id, ("N/D", "secondary"))
+        priority = reference_cache.priority_name(priority_id, priority)
 
         recent_tickets.append({
             "id": row["ticket_id"],
@@ -134,16 +124,26 @@ def home_admin():
 
     return render_template(
         "admin/homeAdmin.html",
-        total_tickets=total_tickets,
-        total_users=total_users,
-        total_collaborators=total_collaborators,
-        total_companies=total_companies,
+        **counters.as_dict(),
         recent_tickets=recent_tickets,
         # admin_name=admin_name, 
         active_page="admin_home",
     )
 
 
+@admin_bp.route("/admin/events")
+def admin_events():
+    # SSE: tickets nuevos / cambios de toda la plataforma
+    if session.get("role") != "sysAdmin":
+        return Response(status=403)
+
+    return Response(
+        stream_with_context(broker.stream(ADMIN_CHANNEL)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @admin_bp.route("/admin/tickets")
 def admin_tickets():
     guard = require_sysadmin()
@@ -154,61 +154,59 @@ def admin_tickets():
     # Parámetros de paginación y búsqueda
     # ─────────────────────────────────────
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor") or None
     q = request.args.get("q", "", type=str).strip()
     per_page = 10
 
-    start = (page - 1) * per_page
-    end = start + per_page - 1
-
     # ─────────────────────────────────────
-    # Query base con joins lógicos
+    # Columnas con joins lógicos
     # ─────────────────────────────────────
-    query = (
-        supabase
-        .table("ticket")
-        .select("""
-            ticket_id,
-            title,
-            description,
-            status,
-            created_at,
-            created_by_company_user_id,
-            priority:priority_id (
-                priority_id,
-                code
-            ),
-            category:category_id (
-                category_id,
-                name
-            ),
-            company:id_company (
-                company_id,
-                commercialName,
-                name
-            )
-        """, count="exact")
-        .order("created_at", desc=True)
-    )
+    columns = """
+        ticket_id,
+        title,
+        description,
+        status,
+        created_at,
+        created_by_company_user_id,
+        priority:priority_id (
+            priority_id,
+            code
+        ),
+        category:category_id (
+            category_id,
+            name
+        ),
+        company:id_company (
+            company_id,
+            commercialName,
+            name
+        )
+    """
 
-    # Filtro de búsqueda (título o descripción)
     if q:
-        pattern = f"%{q}%"
-        query = query.or_(
-            f"title.ilike.{pattern},description.ilike.{pattern}"
+        # Búsqueda de texto completo (título o descripción), por relevancia
+        try:
+            result = search_tickets(q, columns, page=page, per_page=per_page)
+        except Exception as e:
+            print("Error buscando tickets:", e)
+            result = Page(page=page, per_page=per_page, total=0)
+    elif sql_enabled():
+        result = ticket_repo.ticket_page(
+            page=page, cursor=cursor, per_page=per_page, count=count_mode()
         )
-
-    resp = query.range(start, end).execute()
-
-    tickets = resp.data or []
-    total_tickets = resp.count or 0
-    total_pages = (total_tickets + per_page - 1) // per_page  # ceil entero
+    else:
+        query = supabase.table("ticket").select(columns, count=count_mode())
+        # keyset por (created_at, ticket_id); page solo se usa para saltos directos
+        result = paginate(query, page=page, cursor=cursor, per_page=per_page)
 
     return render_template(
         "admin/ticketsList.html",
-        tickets=tickets,
-        total_tickets=total_tickets,
-        page=page,
-        total_pages=total_pages,
+        tickets=result.rows,
+        total_tickets=result.total,
+        page=result.page,
+        total_pages=result.total_pages,
+        next_cursor=result.next_cursor,
+        prev_cursor=result.prev_cursor,
         q=q,
         active_page="admin_tickets",
     )
@@ -220,52 +218,211 @@ def admin_users():
     if guard:
         return guard
 
+    # ─────────────────────────────────────
+    # Filtros, orden y paginación (en la base, no en memoria)
+    # ─────────────────────────────────────
+    page = request.args.get("page", 1, type=int)
+    role = request.args.get("role", "", type=str).strip()
+    email = request.args.get("email", "", type=str).strip()
+    sort = request.args.get("sort", "created_at", type=str)
+    direction = request.args.get("dir", "desc", type=str)
+    per_page = 25
+
+    result = Page(page=page, per_page=per_page, total=0)
     try:
-        resp = (
-            supabase
-            .table("users")
-            .select("username_id, username, email, role, created_at")
-            .order("created_at", desc=True)
-            .execute()
-        )
-        users = resp.data or []
+        if sql_enabled():
+            result = user_repo.user_page(
+                role=role, email=email, sort=sort, direction=direction,
+                page=page, per_page=per_page, count=count_mode(),
+            )
+        else:
+            query = users_query(role=role, email=email, count=count_mode())
+            query = apply_sort(query, sort, direction)
+            result = offset_paginate(query, page=page, per_page=per_page)
     except Exception as e:
         print("Error obteniendo usuarios:", e)
-        users = []
-
-    total_users = len(users)
 
     return render_template(
         "admin/usersList.html",
-        users=users,
-        total_users=total_users,
+        users=result.rows,
+        total_users=result.total,
+        page=result.page,
+        total_pages=result.total_pages,
+        roles=USER_ROLES,
+        role=role,
+        email=email,
+        sort=sort,
+        dir=direction,
         active_page="admin_users",
     )
 
 
+@admin_bp.route("/admin/users/export.csv")
+def admin_users_export():
+    guard = require_sysadmin()
+    if guard:
+        return guard
+
+    role = request.args.get("role", "", type=str).strip()
+    email = request.args.get("email", "", type=str).strip()
+
+    # Se envía por bloques: nunca se carga la tabla completa en el worker
+    return Response(
+        stream_with_context(users_csv(role=role, email=email)),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=usuarios.csv"},
+    )
+
+
 @admin_bp.route("/admin/companies")
 def admin_companies():
     guard = require_sysadmin()
     if guard:
         return guard
 
-    resp = (
-        supabase
-        .table("company")
-        .select("*")
-        .execute()
-    )
-    companies = resp.data or []
+    page = request.args.get("page", 1, type=int)
+    per_page = 20
+
+    result = Page(page=page, per_page=per_page, total=0)
+    try:
+        if sql_enabled():
+            result = company_repo.company_page(page=page, per_page=per_page, count=count_mode())
+        else:
+            query = (
+                supabase
+                .table("company")
+                .select(COMPANY_LIST_COLUMNS, count=count_mode())
+                .order("created_at", desc=True)
+                .order("company_id", desc=True)
+            )
+            result = offset_paginate(query, page=page, per_page=per_page)
+    except Exception as e:
+        print("Error obteniendo compañías:", e)
+
+    # Tickets abiertos / totales de las compañías de esta página (una consulta)
+    counts = {}
+    try:
+        counts = company_ticket_counts([c["company_id"] for c in result.rows])
+    except Exception as e:
+        print("Error obteniendo tickets por compañía:", e)
+
+    for company in result.rows:
+        company.update(
+            counts.get(company["company_id"], {"total_tickets": 0, "open_tickets": 0})
+        )
 
     return render_template(
         "admin/companiesList.html",
-        companies=companies,
+        companies=result.rows,
+        total_companies=result.total,
+        page=result.page,
+        total_pages=result.total_pages,
         active_page="admin_companies",
     )
 
+# Tickets que se muestran en el dashboard técnico
+TECH_TICKET_LIMIT = 100
+# Tickets que vencen dentro de estas horas aparecen en "Alertas de SLA"
+TECH_SLA_WARNING_HOURS = 2
+
+
+def _load_tech_tickets(tech_id):
+    if sql_enabled():
+        rows = ticket_repo.technician_tickets(tech_id, limit=TECH_TICKET_LIMIT)
+    else:
+        rows = (
+            supabase
+            .table("ticket")
+            .select(
+                "ticket_id, title, status, priority_id, category_id, created_at, "
+                "response_due_at, sla_breached, company:id_company(name, commercialName)"
+            )
+            .eq("assigned_to_staff_user_id", tech_id)
+            .not_.in_("status", FINAL_STATUSES)
+            .order("response_due_at")  # asc: los que no tienen vencimiento quedan al final
+            .order("ticket_id")
+            .limit(TECH_TICKET_LIMIT)
+            .execute()
+            .data or []
+        )
+        for row in rows:
+            company = row.pop("company", None) or {}
+            row["company_commercial_name"] = company.get("commercialName")
+            row["company_name"] = company.get("name")
+    return rows
+
+
+TECH_EMPTY_COUNTS = {"open_count": 0, "urgent_count": 0, "on_hold_count": 0}
+
+
+def _load_tech_counts(tech_id, urgent_priority_ids):
+    """
+    Conteos del técnico en la base (no sobre la lista limitada a
+    TECH_TICKET_LIMIT). Urgentes: prioridad "alta" o superior.
+    """
+    if sql_enabled():
+        row = ticket_repo.technician_ticket_counts(tech_id, urgent_priority_ids) or {}
+        return {key: row.get(key) or 0 for key in TECH_EMPTY_COUNTS}
+
+    def count(**filters):
+        # head=True: PostgREST solo devuelve el total, sin filas
+        query = (
+            supabase
+            .table("ticket")
+            .select("ticket_id", count="exact", head=True)
+            .eq("assigned_to_staff_user_id", tech_id)
+            .not_.in_("status", FINAL_STATUSES)
+        )
+        if "status" in filters:
+            query = query.eq("status", filters["status"])
+        if "priority_ids" in filters:
+            if not filters["priority_ids"]:
+                return 0
+            query = query.in_("priority_id", filters["priority_ids"])
+        return query.execute().count or 0
+
+    return {
+        "open_count": count(),
+        "urgent_count": count(priority_ids=urgent_priority_ids),
+        "on_hold_count": count(status="on_hold"),
+    }
+
+
 @admin_bp.route("/admin/tech-dashboard")
 def tech_dashboard():
     if session.get("role") != "admin_tech":
         return redirect(url_for("main.index"))
 
-    return render_template("admin/techDashboard.html", active_page="tech_dashboard")
+    tech_id = session.get("user_id")
+    urgent_priority_ids = reference_cache.priority_ids_at_least("alta") or [3]
+
+    fan = FanOut()
+    fan.submit("tickets", _load_tech_tickets, tech_id, default=[])
+    fan.submit("counts", _load_tech_counts, tech_id, urgent_priority_ids, default=TECH_EMPTY_COUNTS)
+    results = fan.gather()
+    tickets = results["tickets"]
+
+    now = datetime.now(timezone.utc)
+    warning_until = now + timedelta(hours=TECH_SLA_WARNING_HOURS)
+    sla_alerts = []
+
+    for ticket in tickets:
+        ticket["priority_name"] = reference_cache.priority_name(ticket.get("priority_id"), "N/D")
+        ticket["company_label"] = (
+            ticket.get("company_commercial_name") or ticket.get("company_name") or "—"
+        )
+        due = ticket.get("response_due_at")
+        if isinstance(due, str):
+            due = datetime.fromisoformat(due.replace("Z", "+00:00"))
+        if due is not None and due.tzinfo is None:
+            due = due.replace(tzinfo=timezone.utc)
+        if ticket.get("sla_breached") or (due is not None and due <= warning_until):
+            sla_alerts.append({**ticket, "due": due, "breached": bool(ticket.get("sla_breached"))})
+
+    return render_template(
+        "admin/techDashboard.html",
+        active_page="tech_dashboard",
+        tickets=tickets,
+        **results["counts"],
+        sla_alerts=sla_alerts,
+    )
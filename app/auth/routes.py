@@ -7,6 +7,8 @@ from werkzeug.security import (
     generate_password_hash, check_password_hash
 )
 from app import supabase
+from app.services.identity_cache import remember_username, remember_company
+from app.services.users import get_login_user
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -103,14 +105,8 @@ def login():
             }
             return render_template("notification.html", data=data)
 
-        # Fetch user
-        user_response = (
-            supabase.table("users")
-            .select("*")
-            .eq("email", email)
-            .execute()
-        )
-        user = user_response.data[0] if user_response.data else None
+        # Usuario + compañía en un solo round trip
+        user = get_login_user(email)
 
         # Validar credenciales
         if user and check_password_hash(user["password"], password):
@@ -121,6 +117,7 @@ def login():
             session["role"] = user["role"]
              # ⭐ NUEVO: guardar el nombre de usuario para la navbar
             session["username"] = user.get("username") or user["email"]
+            remember_username(session["user_id"], user.get("username"))
 
             print(f"User role: {session['role']}")
 
@@ -144,18 +141,13 @@ def login():
             # ROL: admin_cliente  
             # ─────────────────────────────────────────────
             elif user["role"] == "admin_cliente":
-                user_id = session["user_id"]
-
-                company_resp = (
-                    supabase.table("company")
-                    .select("company_id")
-                    .eq("id_username", user_id)
-                    .execute()
-                )
-
-                if company_resp.data:
-                    company_id = company_resp.data[0]["company_id"]
-                    session["company_id"] = company_id
+                companies = user.get("company") or []
+                if isinstance(companies, dict):
+                    companies = [companies]
+
+                if companies:
+                    session["company_id"] = companies[0]["company_id"]
+                    remember_company(companies[0])
 
                     success_data['redirect'] = url_for("client_admin.home_client_admin")
                     return render_template("notification.html", data=success_data)
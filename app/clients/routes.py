@@ -1,38 +1,34 @@
 # app/admin/routes.py
 from flask import Blueprint, app, render_template, session, redirect, url_for,request, flash
+from flask import Response, stream_with_context
 from app import supabase
+from app.repositories import tickets as ticket_repo
+from app.repositories.base import sql_enabled
+from app.services.assignment import assign_ticket, release_ticket
+from app.services.classification_queue import async_classification_enabled, enqueue_classification
+from app.services.collaborator_import import COLLABORATOR_IMPORT_MAX_ROWS, import_collaborators
+from app.services.duplicates import find_duplicates, index_for_duplicates
+from app.services.fanout import FanOut
+from app.services.identity_cache import (
+    get_username, get_company_name, remember_company
+)
+from app.services.live_events import broker, company_channel, ticket_written
+from app.services.pagination import Page, count_mode, paginate
+from app.services.reference_cache import reference_cache
+from app.services.sla import apply_sla, track_ticket
+from app.services.ticket_classifier import classify_ticket, prediction_ids
+from app.services.ticket_metrics import TicketMetrics, get_company_ticket_metrics
+from app.services.ticket_import import TICKET_IMPORT_CHUNK_SIZE, import_tickets
+from app.services.ticket_search import index_ticket
 from datetime import datetime
 from werkzeug.security import (generate_password_hash, check_password_hash)
 from math import ceil
+import json
 import os
-import requests
 
 #blueprint para los clientes administradores
 client_admin_bp = Blueprint("client_admin", __name__)
 
-TICKETS_IA_API_URL = os.getenv("TICKETS_IA_API_URL", "http://localhost:8000")
-
-# Mapeo nombre categoría (modelo) -> ID en tu tabla category
-CATEGORY_NAME_TO_ID = {
-    "Red y Conectividad": 1,
-    "Software y Aplicaciones": 2,
-    "Hardware": 3,
-    "Impresoras y Escáneres": 4,
-    "Accesos y Contraseñas": 5,
-    "Archivos y Almacenamiento": 6,
-    "CCTV y Seguridad": 7,
-    "Telefonía": 8,
-    "Soporte General": 9,
-}
-
-# Mapeo nombre prioridad (modelo) -> ID en tabla priority
-PRIORITY_NAME_TO_ID = {
-    "Baja": 1,
-    "Media": 2,
-    "Alta": 3,
-    "Urgente": 4,
-}
-
 # Endpoint para crear una nueva compañía
 @client_admin_bp.route("/company/create", methods=["GET", "POST"])
 def create_company():
@@ -124,6 +120,8 @@ def create_company():
     if resp.data:
         company = resp.data[0]
         session["company_id"] = company.get("company_id")
+        # refrescar el nombre en caché con la fila recién escrita
+        remember_company(company)
 
         data = {
             "icon": "success",
@@ -175,129 +173,27 @@ def home_client_admin():
     user_id = session.get("user_id")
     company_id = session.get("company_id")
 
-    # --- Nombre del admin (tabla users) ---
-    if user_id:
-        try:
-            resp_user = (
-                supabase
-                .table("users")
-                .select("username")
-                .eq("username_id", user_id)
-                .single()
-                .execute()
-            )
-            if resp_user.data:
-                admin_name = resp_user.data.get("username", admin_name)
-        except Exception as e:
-            print("Error obteniendo usuario:", e)
-
-    # --- Nombre de la compañía ---
-    if company_id:
-        try:
-            resp_company = (
-                supabase
-                .table("company")
-                .select("company_id, name, commercialName")
-                .eq("company_id", company_id)
-                .single()
-                .execute()
-            )
-            company = resp_company.data
-            if company:
-                company_name = (
-                    company.get("commercialName")
-                    or company.get("name")
-                    or company_name
-                )
-        except Exception as e:
-            print("Error obteniendo compañía:", e)
-
     # ─────────────────────────────────────────────
-    # Métricas de tickets
+    # Nombres (caché de identidad) y métricas de tickets
+    # (una sola consulta agrupada), en paralelo
     # ─────────────────────────────────────────────
-    open_tickets = 0
-    resolved_tickets = 0
-    overdue_tickets = 0
-    month_tickets = 0
-    total_tickets = 0
-
+    fan = FanOut()
+    fan.submit("admin_name", get_username, user_id, admin_name, default=admin_name)
+    fan.submit("company_name", get_company_name, company_id, company_name, default=company_name)
     if company_id:
-        try:
-            # Total de tickets de la empresa
-            resp_total = (
-                supabase
-                .table("ticket")
-                .select("ticket_id", count="exact")
-                .eq("id_company", company_id)
-                .execute()
-            )
-            total_tickets = resp_total.count or 0
-
-            # Tickets abiertos (solo status = 'open'; ajusta si quieres incluir in_progress/on_hold)
-            resp_open = (
-                supabase
-                .table("ticket")
-                .select("ticket_id", count="exact")
-                .eq("id_company", company_id)
-                .eq("status", "open")
-                .execute()
-            )
-            open_tickets = resp_open.count or 0
-
-            # Tickets resueltos (resolved + closed)
-            resp_resolved = (
-                supabase
-                .table("ticket")
-                .select("ticket_id", count="exact")
-                .eq("id_company", company_id)
-                .in_("status", ["resolved", "closed"])
-                .execute()
-            )
-            resolved_tickets = resp_resolved.count or 0
-
-            # Tickets fuera de SLA:
-            # ejemplo: response_due_at vencida y ticket no cerrado/cancelado
-            now_iso = datetime.utcnow().isoformat()
-
-            resp_overdue = (
-                supabase
-                .table("ticket")
-                .select("ticket_id", count="exact")
-                .eq("id_company", company_id)
-                .not_.in_("status", ["resolved", "closed", "cancelled"])
-                .lt("response_due_at", now_iso)
-                .execute()
-            )
-            overdue_tickets = resp_overdue.count or 0
-
-            # Tickets creados este mes
-            now = datetime.utcnow()
-            start_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            start_month_iso = start_month.isoformat()
+        fan.submit("metrics", get_company_ticket_metrics, company_id, default=TicketMetrics())
+    results = fan.gather()
 
-            resp_month = (
-                supabase
-                .table("ticket")
-                .select("ticket_id", count="exact")
-                .eq("id_company", company_id)
-                .gte("created_at", start_month_iso)
-                .execute()
-            )
-            month_tickets = resp_month.count or 0
-
-        except Exception as e:
-            print("Error obteniendo métricas de tickets:", e)
+    admin_name = results["admin_name"]
+    company_name = results["company_name"]
+    metrics = results.get("metrics") or TicketMetrics()
 
     return render_template(
         "clients/homeClients.html",
         company_name=company_name,
         admin_name=admin_name,
         active_page="client_dashboard",
-        open_tickets=open_tickets,
-        resolved_tickets=resolved_tickets,
-        overdue_tickets=overdue_tickets,
-        month_tickets=month_tickets,
-        total_tickets=total_tickets,
+        **metrics.as_dict(),
     )
 
 #endpont para ver los tickets de la compañia
@@ -330,86 +226,68 @@ def company_tickets():
     user_id = session.get("user_id")
     company_id = session.get("company_id")
 
-    # --- Nombre del admin (tabla users) ---
-    if user_id:
-        try:
-            resp_user = (
-                supabase
-                .table("users")
-                .select("username")
-                .eq("username_id", user_id)
-                .single()
-                .execute()
-            )
-            if resp_user.data:
-                admin_name = resp_user.data.get("username", admin_name)
-        except Exception as e:
-            print("Error obteniendo usuario:", e)
-
-    # --- Nombre de la compañía ---
-    if company_id:
-        try:
-            resp_company = (
-                supabase
-                .table("company")
-                .select("company_id, name, commercialName")
-                .eq("company_id", company_id)
-                .single()
-                .execute()
-            )
-            company = resp_company.data
-            if company:
-                company_name = (
-                    company.get("commercialName")
-                    or company.get("name")
-                    or company_name
-                )
-        except Exception as e:
-            print("Error obteniendo compañía:", e)
-
-      # ─────────────────────────────────────────────
-    # Obtener tickets de la compañía
+    # ─────────────────────────────────────────────
+    # Nombres (caché de identidad) y tickets de la compañía, en paralelo
     # ─────────────────────────────────────────────
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor") or None
     per_page = 10  # tickets por página
 
-    tickets = []
-    total_tickets = 0
-    total_pages = 1
-
-    if company_id:
-        try:
-            # calcular rango para Supabase (inclusive)
-            start = (page - 1) * per_page
-            end = start + per_page - 1
-
-            resp_tickets = (
-                supabase
-                .table("ticket")
-                .select("ticket_id, title, status, created_at", count="exact")
-                .eq("id_company", company_id)
-                .order("created_at", desc=True)
-                .range(start, end)
-                .execute()
+    def load_tickets():
+        if sql_enabled():
+            return ticket_repo.company_ticket_page(
+                company_id, page=page, cursor=cursor, per_page=per_page, count=count_mode()
             )
+        query = (
+            supabase
+            .table("ticket")
+            .select("ticket_id, title, status, created_at", count=count_mode())
+            .eq("id_company", company_id)
+        )
+        # keyset por (created_at, ticket_id); page solo se usa para saltos directos
+        return paginate(query, page=page, cursor=cursor, per_page=per_page)
 
-            tickets = resp_tickets.data or []
-            total_tickets = resp_tickets.count or 0
-            total_pages = max(ceil(total_tickets / per_page), 1)
+    empty = Page(page=page, per_page=per_page, total=0)
 
-        except Exception as e:
-            print("Error obteniendo tickets de la compañía:", e)
+    fan = FanOut()
+    fan.submit("admin_name", get_username, user_id, admin_name, default=admin_name)
+    fan.submit("company_name", get_company_name, company_id, company_name, default=company_name)
+    if company_id:
+        fan.submit("tickets", load_tickets, default=empty)
+    results = fan.gather()
+
+    admin_name = results["admin_name"]
+    company_name = results["company_name"]
+    result = results.get("tickets") or empty
 
     return render_template(
         "clients/tickets-company.html",
         active_page="company_tickets",
         company_name=company_name,
         admin_name=admin_name,
-        tickets=tickets,
-        page=page,
-        total_pages=total_pages,
-        total_tickets=total_tickets,
+        tickets=result.rows,
+        page=result.page,
+        total_pages=result.total_pages,
+        total_tickets=result.total,
         per_page=per_page,
+        next_cursor=result.next_cursor,
+        prev_cursor=result.prev_cursor,
+    )
+
+# endpoint SSE: cambios de tickets de la compañía en vivo
+@client_admin_bp.route("/client_admin/events")
+def company_events():
+    if session.get("role") not in ["admin_cliente", "admin_op"]:
+        return Response(status=403)
+
+    company_id = session.get("company_id")
+    if not company_id:
+        return Response(status=404)
+
+    return Response(
+        stream_with_context(broker.stream(company_channel(company_id))),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 # endpoint ver tickets por id
@@ -424,16 +302,19 @@ def view_ticket(ticket_id):
     company_id = session.get("company_id")
 
     try:
-        resp = (
-            supabase
-            .table("ticket")
-            .select("*")
-            .eq("ticket_id", ticket_id)
-            .eq("id_company", company_id)  # seguridad: que sea de su empresa
-            .single()
-            .execute()
-        )
-        ticket = resp.data
+        if sql_enabled():
+            ticket = ticket_repo.get_company_ticket(ticket_id, company_id)
+        else:
+            resp = (
+                supabase
+                .table("ticket")
+                .select("*")
+                .eq("ticket_id", ticket_id)
+                .eq("id_company", company_id)  # seguridad: que sea de su empresa
+                .single()
+                .execute()
+            )
+            ticket = resp.data
     except Exception as e:
         print("Error obteniendo detalle de ticket:", e)
         ticket = None
@@ -519,11 +400,53 @@ def create_company_user():
         }
         return render_template("notification.html", data=data)
     
+# endpoint para registrar colaboradores en bloque desde un CSV
+@client_admin_bp.route("/client_admin/users/import", methods=["GET", "POST"])
+def import_company_users():
+    if "company_id" not in session:
+        flash("No tienes una compañía asociada.", "danger")
+        return redirect(url_for("auth.login"))
+
+    company_id = session["company_id"]
+    results = None
+
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            data = {
+                "icon": "error",
+                "title": "Archivo requerido",
+                "text": "Selecciona un archivo CSV con los colaboradores.",
+                "redirect": url_for("client_admin.import_company_users"),
+            }
+            return render_template("notification.html", data=data)
+
+        try:
+            results = import_collaborators(upload.stream, company_id)
+        except Exception as e:
+            print("Error en carga masiva de colaboradores:", e)
+            data = {
+                "icon": "error",
+                "title": "Error",
+                "text": "Error al registrar los colaboradores.",
+                "redirect": url_for("client_admin.import_company_users"),
+            }
+            return render_template("notification.html", data=data)
+
+    return render_template(
+        "clients/importCollaborators.html",
+        results=results,
+        created=sum(1 for r in results or [] if r["ok"]),
+        max_rows=COLLABORATOR_IMPORT_MAX_ROWS,
+        active_page="create_company_user",
+    )
+
 #EndPoint para probar supabase
 @client_admin_bp.route("/client_admin/test-supabase")
 def test_supabase():
     data = {"name": "Prueba desde Flask", "is_active": True}
     resp = supabase.table("category").insert(data).execute()
+    reference_cache.invalidate()
     print(resp)
     return "OK"
     
@@ -558,6 +481,21 @@ def choose_create_ticket():
         active_page="op_new_ticket"
     )
 
+
+def _ticket_created(ticket):
+    """
+    Índices en memoria, evento en vivo y SLA de un ticket ya insertado.
+    Si algo de esto falla el ticket igual quedó guardado: solo se registra.
+    """
+    try:
+        index_ticket(ticket)
+        index_for_duplicates(ticket)
+        track_ticket(ticket)
+    except Exception as e:
+        print(f"Error indexando ticket {ticket.get('ticket_id')}:", e)
+    ticket_written("INSERT", ticket)
+
+
 @client_admin_bp.route("/client_admin/tickets/manual", methods=["GET", "POST"])
 def create_ticket_manual():
     # 1. Validar sesión y rol
@@ -571,17 +509,8 @@ def create_ticket_manual():
     # 2. Si es GET → mostrar formulario
     # ─────────────────────────────
     if request.method == "GET":
-        try:
-            resp_cat = supabase.table("category").select("*").order("sort_order").execute()
-            categories = resp_cat.data or []
-        except Exception:
-            categories = []
-
-        try:
-            resp_pri = supabase.table("priority").select("*").order("sort_order").execute()
-            priorities = resp_pri.data or []
-        except Exception:
-            priorities = []
+        categories = reference_cache.categories()
+        priorities = reference_cache.priorities()
 
         return render_template(
             "clients/createTicketManual.html",
@@ -630,10 +559,24 @@ def create_ticket_manual():
     
     # si luego tienes company_user_id, puedes usarlo aquí
 
+    # Posibles duplicados: se muestran antes de crear, salvo que el usuario
+    # ya haya confirmado que es un incidente distinto
+    if not form.get("confirm_duplicate"):
+        duplicates = find_duplicates(company_id, title, description)
+        if duplicates:
+            return render_template(
+                "clients/createTicketManual.html",
+                categories=reference_cache.categories(),
+                priorities=reference_cache.priorities(),
+                active_page="create_ticket_manual",
+                duplicates=duplicates,
+                values=form,
+            )
+
     payload = {
         "id_company": company_id,
         # "created_by_company_user_id": created_by,   # ajusta al nombre real de tu columna
-        "assigned_to_staff_user_id": None,          # sin asignar por ahora
+        "assigned_to_staff_user_id": None,          # lo completa assign_ticket
         "title": title,
         "description": description,
         "category_id": category_id,
@@ -641,11 +584,14 @@ def create_ticket_manual():
         "status": "open",                           # ENUM ticket_status
         "created_at": datetime.utcnow().isoformat()
     }
+    apply_sla(payload)
+    assign_ticket(payload)
 
     try:
         resp = supabase.table("ticket").insert(payload).execute()
     except Exception as e:
         print("Error al crear ticket:", e)
+        release_ticket(payload)
         data = {
             "icon": "error",
             "title": "Error al registrar ticket",
@@ -656,6 +602,7 @@ def create_ticket_manual():
 
     # Si todo fue bien
     if resp.data:
+        _ticket_created(resp.data[0])
         data = {
             "icon": "success",
             "title": "Ticket registrado",
@@ -672,6 +619,61 @@ def create_ticket_manual():
     }
     return render_template("notification.html", data=data)
 
+def _create_ticket_pending_classification(title, description):
+    """
+    Inserta el ticket sin categoría ni prioridad (pending_classification)
+    y lo encola para que lo clasifique un worker: un solo round trip a la base.
+    No se asigna técnico aquí: assign_ticket elige por especialidad
+    (categoría), así que lo asigna el worker al guardar la clasificación.
+    """
+    payload = {
+        "id_company": session.get("company_id"),
+        "created_by_company_user_id": session.get("company_user_id"),
+        "title": title,
+        "description": description,
+        "category_id": None,
+        "priority_id": None,
+        "status": "open",
+        "pending_classification": True,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    # SLA provisorio (sin prioridad); el worker lo recalcula al clasificar
+    apply_sla(payload)
+
+    try:
+        resp_ticket = supabase.table("ticket").insert(payload).execute()
+    except Exception as e:
+        print("Error Supabase:", e)
+        data = {
+            "icon": "error",
+            "title": "Error al guardar ticket",
+            "text": "Ocurrió un error al guardar el ticket.",
+            "redirect": url_for("client_admin.create_ticket_ai"),
+        }
+        return render_template("notification.html", data=data)
+
+    if not resp_ticket.data:
+        data = {
+            "icon": "error",
+            "title": "Error",
+            "text": "No se pudo registrar el ticket. Intenta nuevamente.",
+            "redirect": url_for("client_admin.create_ticket_ai"),
+        }
+        return render_template("notification.html", data=data)
+
+    ticket = resp_ticket.data[0]
+    _ticket_created(ticket)
+    enqueue_classification(ticket)
+
+    data = {
+        "icon": "success",
+        "title": "Ticket creado",
+        "text": "El ticket fue creado. La IA asignará su categoría y prioridad en unos segundos.",
+        "redirect": url_for("client_admin.company_tickets"),
+    }
+    return render_template("notification.html", data=data)
+
+
 @client_admin_bp.route("/client_admin/tickets/ia", methods=["GET", "POST"])
 def create_ticket_ai():
 
@@ -699,17 +701,24 @@ def create_ticket_ai():
         }
         return render_template("notification.html", data=data)
 
-    # --- Llamar a la API IA ---
+    # Posibles duplicados antes de gastar una llamada a la IA
+    if not request.form.get("confirm_duplicate"):
+        duplicates = find_duplicates(session.get("company_id"), title, description)
+        if duplicates:
+            return render_template(
+                "clients/createTicketAI.html",
+                active_page="create_ticket_ai",
+                duplicates=duplicates,
+                values=request.form,
+            )
+
+    # Modo asíncrono: se guarda ya y un worker lo clasifica después
+    if async_classification_enabled():
+        return _create_ticket_pending_classification(title, description)
+
+    # --- Llamar a la API IA (con clasificador local de respaldo) ---
     try:
-        resp = requests.post(
-            f"{TICKETS_IA_API_URL}/api/predict-ticket",
-            json={
-                "title": title,
-                "description": description,
-            }
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        data = classify_ticket(title, description)
     except Exception as e:
         print("API Error:", e)
         # mostrar error con sweetalert
@@ -721,31 +730,29 @@ def create_ticket_ai():
         }
         return render_template("notification.html", data=data)
 
-    # Procesar respuesta
-    cat_name = data["category_name"]
-    prior_name = data["priority_name"]
-    priority_value = data["priority_value"]
-
-    # Aquí mapeas a IDs reales
-    category_id = CATEGORY_NAME_TO_ID.get(cat_name)
-    priority_id = PRIORITY_NAME_TO_ID.get(prior_name)
+    # Mapear nombres del modelo a IDs reales (tablas category / priority)
+    category_id, priority_id = prediction_ids(data)
+    fallback_classified = bool(data.get("fallback"))
 
     # Crear ticket en Supabase
-    try:
-        payload = {
-            "id_company": session.get("company_id"),
-            "created_by_company_user_id": session.get("company_user_id"),
-            "title": title,
-            "description": description,
-            "category_id": category_id,
-            "priority_id": priority_id,
-            "status": "open"
-        }
-
-        supabase.table("ticket").insert(payload).execute()
+    payload = {
+        "id_company": session.get("company_id"),
+        "created_by_company_user_id": session.get("company_user_id"),
+        "title": title,
+        "description": description,
+        "category_id": category_id,
+        "priority_id": priority_id,
+        "fallback_classified": fallback_classified,
+        "status": "open"
+    }
+    apply_sla(payload)
+    assign_ticket(payload)
 
+    try:
+        resp_ticket = supabase.table("ticket").insert(payload).execute()
     except Exception as e:
         print("Error Supabase:", e)
+        release_ticket(payload)
         # mostrar error con sweetalert
         data = {
             "icon": "error",
@@ -754,13 +761,80 @@ def create_ticket_ai():
             "redirect": url_for("client_admin.create_ticket_ai"),
         }
         return render_template("notification.html", data=data)
-    
+
+    if not resp_ticket.data:
+        release_ticket(payload)
+        data = {
+            "icon": "error",
+            "title": "Error",
+            "text": "No se pudo registrar el ticket. Intenta nuevamente.",
+            "redirect": url_for("client_admin.create_ticket_ai"),
+        }
+        return render_template("notification.html", data=data)
+
+    _ticket_created(resp_ticket.data[0])
+
     # Si todo bien
+    text = "El ticket fue creado correctamente usando IA."
+    if fallback_classified:
+        text = (
+            "El ticket fue creado. El servicio de IA no respondió a tiempo, "
+            "así que se clasificó con el modelo local."
+        )
     data = {
         "icon": "success",
         "title": "Ticket creado",
-        "text": "El ticket fue creado correctamente usando IA.",
+        "text": text,
         "redirect": url_for("client_admin.company_tickets"),
     }
     return render_template("notification.html", data=data)
 
+
+
+# ============================
+# Importación masiva de tickets (CSV / JSONL)
+# ============================
+@client_admin_bp.route("/client_admin/tickets/import", methods=["GET", "POST"])
+def import_tickets_file():
+    if "user_id" not in session:
+        return redirect(url_for("auth.login"))
+
+    if session.get("role") not in ["admin_cliente", "admin_op"]:
+        return redirect(url_for("main.index"))
+
+    company_id = session.get("company_id")
+    if not company_id:
+        data = {
+            "icon": "info",
+            "title": "Registrar Compañía",
+            "text": "Debes registrar la compañía para importar tickets.",
+            "redirect": url_for("client_admin.create_company"),
+        }
+        return render_template("notification.html", data=data)
+
+    # GET = mostrar formulario
+    if request.method == "GET":
+        return render_template(
+            "clients/importTickets.html",
+            chunk_size=TICKET_IMPORT_CHUNK_SIZE,
+            active_page="import_tickets",
+        )
+
+    # POST = procesar archivo y responder el progreso como NDJSON
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        data = {
+            "icon": "error",
+            "title": "Archivo requerido",
+            "text": "Selecciona un archivo CSV o JSONL para importar.",
+            "redirect": url_for("client_admin.import_tickets_file"),
+        }
+        return render_template("notification.html", data=data)
+
+    chunk_size = request.form.get("chunk_size", TICKET_IMPORT_CHUNK_SIZE, type=int)
+
+    def generate():
+        for event in import_tickets(upload.stream, upload.filename, company_id, chunk_size):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
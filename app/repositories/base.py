@@ -0,0 +1,60 @@
+# app/repositories/base.py
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import text
+
+
+def _engine():
+    # el engine se crea en create_app: se lee en cada uso, no al importar
+    from app import engine
+    return engine
+
+
+def sql_enabled():
+    """
+    DATA_BACKEND=sql → consultas directas con el pool de SQLAlchemy (requiere
+    DATABASE_URL). supabase (por defecto) → todo por PostgREST, como antes.
+    """
+    return os.getenv("DATA_BACKEND", "supabase").lower() == "sql" and _engine() is not None
+
+
+def _jsonable(value):
+    # Mismo formato que devuelve PostgREST (fechas ISO, números nativos)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def as_dict(row):
+    return {key: _jsonable(value) for key, value in row._mapping.items()}
+
+
+def fetch_all(sql, **params):
+    with _engine().connect() as conn:
+        return [as_dict(row) for row in conn.execute(text(sql), params)]
+
+
+def fetch_one(sql, **params):
+    with _engine().connect() as conn:
+        row = conn.execute(text(sql), params).first()
+    return as_dict(row) if row is not None else None
+
+
+def fetch_value(sql, **params):
+    with _engine().connect() as conn:
+        return conn.execute(text(sql), params).scalar()
+
+
+def stream_all(sql, chunk_size=1000, **params):
+    """
+    Recorre el resultado con un cursor del lado del servidor,
+    sin cargar todas las filas en memoria.
+    """
+    with _engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size) \
+            .execute(text(sql), params)
+        for row in result:
+            yield as_dict(row)
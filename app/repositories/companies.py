@@ -0,0 +1,38 @@
+# app/repositories/companies.py
+from app.repositories.base import fetch_all, fetch_one, fetch_value
+from app.services.pagination import Page
+
+
+def get_company(company_id):
+    return fetch_one(
+        """
+        select company_id, name, "commercialName"
+        from public.company
+        where company_id = :company_id
+        """,
+        company_id=company_id,
+    )
+
+
+def company_page(page=1, per_page=20, count=None):
+    page = max(page or 1, 1)
+    rows = fetch_all(
+        """
+        select company_id, name, "commercialName", "businessName", "countryCity",
+               "stateProvince", "phoneNumber", "webSite", status, created_at
+        from public.company
+        order by created_at desc, company_id desc
+        limit :limit offset :offset
+        """,
+        limit=per_page + 1,
+        offset=(page - 1) * per_page,
+    )
+    total = fetch_value("select count(*) from public.company") if count else None
+    return Page(
+        rows=rows[:per_page],
+        page=page,
+        per_page=per_page,
+        total=total,
+        has_next=len(rows) > per_page,
+        has_prev=page > 1,
+    )
@@ -0,0 +1,21 @@
+# app/repositories/reference.py
+from app.repositories.base import fetch_all
+
+
+def categories():
+    return fetch_all("select * from public.category order by sort_order")
+
+
+def priorities():
+    return fetch_all("select * from public.priority order by sort_order")
+
+
+def platform_counters():
+    rows = fetch_all(
+        """
+        select name, value
+        from public.platform_counters
+        where name in ('tickets', 'users', 'collaborators', 'companies')
+        """
+    )
+    return {row["name"]: row["value"] for row in rows}
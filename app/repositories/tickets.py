@@ -0,0 +1,225 @@
+# app/repositories/tickets.py
+import os
+from app.repositories.base import fetch_all, fetch_one, fetch_value
+from app.services.pagination import build_page, decode_cursor
+
+# count=estimated: por debajo de esta estimación se cuenta exacto (como
+# PostgREST, que solo se queda con la del planner en tablas grandes)
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ESTIMATED_COUNT_THRESHOLD", "10000"))
+
+# Columnas del listado de SysAdmin, con la misma forma anidada que
+# devuelve PostgREST (priority / category / company)
+_ADMIN_LIST_SELECT = """
+    select
+        t.ticket_id, t.title, t.description, t.status, t.created_at,
+        t.created_by_company_user_id,
+        case when p.priority_id is null then null
+             else json_build_object('priority_id', p.priority_id, 'code', p.code) end as priority,
+        case when c.category_id is null then null
+             else json_build_object('category_id', c.category_id, 'name', c.name) end as category,
+        case when co.company_id is null then null
+             else json_build_object('company_id', co.company_id,
+                                    'commercialName', co."commercialName",
+                                    'name', co.name) end as company
+    from public.ticket t
+    left join public.priority p on p.priority_id = t.priority_id
+    left join public.category c on c.category_id = t.category_id
+    left join public.company co on co.company_id = t.id_company
+"""
+
+
+def company_metrics(company_id, month_start):
+    return fetch_one(
+        """
+        select
+            count(*)                                                   as total_tickets,
+            count(*) filter (where status = 'open')                    as open_tickets,
+            count(*) filter (where status in ('resolved', 'closed'))   as resolved_tickets,
+            count(*) filter (where status not in ('resolved', 'closed', 'cancelled')
+                               and sla_breached)                       as overdue_tickets,
+            count(*) filter (where created_at >= :month_start)         as month_tickets
+        from public.ticket
+        where id_company = :company_id
+        """,
+        company_id=company_id, month_start=month_start,
+    ) or {}
+
+
+def company_ticket_counts(company_ids):
+    rows = fetch_all(
+        """
+        select id_company as company_id,
+               count(*) as total_tickets,
+               count(*) filter (where status = 'open') as open_tickets
+        from public.ticket
+        where id_company = any(:company_ids)
+        group by id_company
+        """,
+        company_ids=list(company_ids),
+    )
+    return {
+        row["company_id"]: {
+            "total_tickets": row["total_tickets"],
+            "open_tickets": row["open_tickets"],
+        }
+        for row in rows
+    }
+
+
+def recent_tickets(limit=5):
+    return fetch_all(
+        """
+        select ticket_id, title, status, priority_id, category_id, created_at
+        from public.ticket
+        order by created_at desc, ticket_id desc
+        limit :limit
+        """,
+        limit=limit,
+    )
+
+
+def technician_open_loads():
+    rows = fetch_all(
+        """
+        select assigned_to_staff_user_id as username_id, count(*) as open_tickets
+        from public.ticket
+        where assigned_to_staff_user_id is not null
+          and status not in ('resolved', 'closed', 'cancelled')
+        group by assigned_to_staff_user_id
+        """
+    )
+    return {row["username_id"]: row["open_tickets"] for row in rows}
+
+
+def technician_tickets(tech_id, limit=100):
+    """
+    Tickets abiertos asignados al técnico, los que vencen antes primero.
+    """
+    return fetch_all(
+        """
+        select t.ticket_id, t.title, t.status, t.priority_id, t.category_id, t.created_at,
+               t.response_due_at, t.sla_breached,
+               co."commercialName" as company_commercial_name, co.name as company_name
+        from public.ticket t
+        left join public.company co on co.company_id = t.id_company
+        where t.assigned_to_staff_user_id = :tech_id
+          and t.status not in ('resolved', 'closed', 'cancelled')
+        order by t.response_due_at nulls last, t.ticket_id
+        limit :limit
+        """,
+        tech_id=tech_id, limit=limit,
+    )
+
+
+def technician_ticket_counts(tech_id, urgent_priority_ids):
+    """
+    {"open_count", "urgent_count", "on_hold_count"} de los tickets abiertos
+    asignados al técnico.
+    """
+    return fetch_one(
+        """
+        select count(*) as open_count,
+               count(*) filter (where t.priority_id = any(:urgent_ids)) as urgent_count,
+               count(*) filter (where t.status = 'on_hold') as on_hold_count
+        from public.ticket t
+        where t.assigned_to_staff_user_id = :tech_id
+          and t.status not in ('resolved', 'closed', 'cancelled')
+        """,
+        tech_id=tech_id, urgent_ids=list(urgent_priority_ids),
+    )
+
+
+def get_company_ticket(ticket_id, company_id):
+    return fetch_one(
+        "select * from public.ticket where ticket_id = :ticket_id and id_company = :company_id",
+        ticket_id=ticket_id, company_id=company_id,
+    )
+
+
+def _planned_count(sql, **params):
+    """
+    Filas que estima el planner para la consulta (EXPLAIN, no la ejecuta).
+    """
+    plan = fetch_value(f"explain (format json) {sql}", **params)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _table_estimate():
+    # reltuples es -1 si la tabla nunca se analizó (vacía o recién creada)
+    return fetch_value("select reltuples::bigint from pg_class where oid = 'public.ticket'::regclass")
+
+
+def _count(mode, exact_sql, estimate, **params):
+    """
+    Total según el modo de conteo (exact | planned | estimated | None).
+    `estimate` devuelve la estimación o None si no hay una confiable.
+    """
+    if not mode:
+        return None
+    if mode in ("planned", "estimated"):
+        rows = estimate()
+        if rows is not None and rows >= 0:
+            if mode == "planned" or rows >= ESTIMATED_COUNT_THRESHOLD:
+                return rows
+    return fetch_value(exact_sql, **params)
+
+
+def _keyset_page(select_sql, conditions, params, page, cursor, per_page, total=None):
+    """
+    Keyset por (t.created_at, t.ticket_id) con la misma semántica de cursores
+    que services.pagination.paginate. `total` es una función que devuelve
+    el conteo (o None).
+    """
+    page = max(page or 1, 1)
+    position = decode_cursor(cursor)
+    backwards = bool(position) and position["d"] == "prev"
+
+    conditions = list(conditions)
+    params = dict(params, limit=per_page + 1, offset=0)
+    if position:
+        op = ">" if backwards else "<"
+        conditions.append(f"(t.created_at, t.ticket_id) {op} (:cursor_key, :cursor_id)")
+        params.update(cursor_key=position["k"], cursor_id=position["i"])
+    elif page > 1:
+        params["offset"] = (page - 1) * per_page
+
+    where = f"where {' and '.join(conditions)}" if conditions else ""
+    order = "asc" if backwards else "desc"
+    rows = fetch_all(
+        f"""
+        {select_sql}
+        {where}
+        order by t.created_at {order}, t.ticket_id {order}
+        limit :limit offset :offset
+        """,
+        **params,
+    )
+
+    return build_page(rows, page, per_page, total() if total else None, position)
+
+
+def company_ticket_page(company_id, page=1, cursor=None, per_page=10, count=None):
+    def total():
+        return _count(
+            count,
+            "select count(*) from public.ticket where id_company = :company_id",
+            lambda: _planned_count(
+                "select 1 from public.ticket where id_company = :company_id",
+                company_id=company_id,
+            ),
+            company_id=company_id,
+        )
+
+    return _keyset_page(
+        "select t.ticket_id, t.title, t.status, t.created_at from public.ticket t",
+        ["t.id_company = :company_id"],
+        {"company_id": company_id},
+        page, cursor, per_page, total,
+    )
+
+
+def ticket_page(page=1, cursor=None, per_page=10, count=None):
+    def total():
+        return _count(count, "select count(*) from public.ticket", _table_estimate)
+
+    return _keyset_page(_ADMIN_LIST_SELECT, [], {}, page, cursor, per_page, total)
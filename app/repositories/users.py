@@ -0,0 +1,128 @@
+# app/repositories/users.py
+from app.repositories.base import fetch_all, fetch_one, fetch_value, stream_all
+from app.services.pagination import Page
+
+USER_SORT_COLUMNS = {
+    "created_at": "created_at",
+    "username": "username",
+    "email": "email",
+    "role": "role",
+}
+
+
+def get_username(user_id):
+    row = fetch_one(
+        "select username from public.users where username_id = :user_id",
+        user_id=user_id,
+    )
+    return row["username"] if row else None
+
+
+def get_login_user(email):
+    """
+    Usuario por email con su compañía (si tiene) en una sola consulta.
+    """
+    row = fetch_one(
+        """
+        select
+            u.username_id, u.username, u.email, u.password, u.role,
+            c.company_id, c.name as company_name, c."commercialName" as company_commercial_name
+        from public.users u
+        left join lateral (
+            select company_id, name, "commercialName"
+            from public.company
+            where id_username = u.username_id
+            order by company_id
+            limit 1
+        ) c on true
+        where u.email = :email
+        limit 1
+        """,
+        email=email,
+    )
+    if not row:
+        return None
+
+    company_id = row.pop("company_id")
+    company = {
+        "company_id": company_id,
+        "name": row.pop("company_name"),
+        "commercialName": row.pop("company_commercial_name"),
+    }
+    row["company"] = [company] if company_id is not None else []
+    return row
+
+
+def _filters(role, email):
+    conditions = []
+    params = {}
+    if role:
+        conditions.append("role = :role")
+        params["role"] = role
+    if email:
+        conditions.append("email ilike :email")
+        params["email"] = f"%{email}%"
+    where = f"where {' and '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def user_page(role=None, email=None, sort="created_at", direction="desc",
+              page=1, per_page=25, count=None):
+    page = max(page or 1, 1)
+    where, params = _filters(role, email)
+    column = USER_SORT_COLUMNS.get(sort, "created_at")
+    order = "asc" if direction == "asc" else "desc"
+
+    rows = fetch_all(
+        f"""
+        select username_id, username, email, role, created_at
+        from public.users
+        {where}
+        order by {column} {order}, username_id {order}
+        limit :limit offset :offset
+        """,
+        limit=per_page + 1,
+        offset=(page - 1) * per_page,
+        **params,
+    )
+    total = fetch_value(f"select count(*) from public.users {where}", **params) if count else None
+    return Page(
+        rows=rows[:per_page],
+        page=page,
+        per_page=per_page,
+        total=total,
+        has_next=len(rows) > per_page,
+        has_prev=page > 1,
+    )
+
+
+def iter_users(role=None, email=None, chunk_size=1000):
+    where, params = _filters(role, email)
+    yield from stream_all(
+        f"""
+        select username_id, username, email, role, created_at
+        from public.users
+        {where}
+        order by username_id
+        """,
+        chunk_size=chunk_size,
+        **params,
+    )
+
+
+def technicians():
+    """
+    admin_tech con las categorías en las que se especializan.
+    """
+    rows = fetch_all(
+        """
+        select u.username_id,
+               coalesce(array_agg(s.category_id) filter (where s.category_id is not null),
+                        '{}') as skills
+        from public.users u
+        left join public.technician_skill s on s.username_id = u.username_id
+        where u.role = 'admin_tech'
+        group by u.username_id
+        """
+    )
+    return [{"username_id": row["username_id"], "skills": list(row["skills"])} for row in rows]
@@ -0,0 +1,377 @@
+# app/services/ai_client.py
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.services.metrics import record_dependency, register_collector
+from app.services.prediction_cache import prediction_cache
+
+TICKETS_IA_API_URL = os.getenv("TICKETS_IA_API_URL", "http://localhost:8000")
+
+# Timeouts en segundos: conexión / lectura de la respuesta del modelo
+AI_CONNECT_TIMEOUT = float(os.getenv("AI_CONNECT_TIMEOUT", "2"))
+AI_READ_TIMEOUT = float(os.getenv("AI_READ_TIMEOUT", "10"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "2"))
+AI_RETRY_BACKOFF = float(os.getenv("AI_RETRY_BACKOFF", "0.3"))
+AI_POOL_SIZE = int(os.getenv("AI_POOL_SIZE", "10"))
+
+# Circuit breaker: con al menos MIN_CALLS en la ventana, se abre si la
+# proporción de errores o de llamadas lentas supera el umbral; abierto
+# rechaza al instante durante OPEN_SECONDS y luego deja pasar una prueba
+AI_BREAKER_ENABLED = os.getenv("AI_BREAKER_ENABLED", "1") != "0"
+AI_BREAKER_WINDOW = int(os.getenv("AI_BREAKER_WINDOW", "20"))
+AI_BREAKER_MIN_CALLS = int(os.getenv("AI_BREAKER_MIN_CALLS", "10"))
+AI_BREAKER_ERROR_RATE = float(os.getenv("AI_BREAKER_ERROR_RATE", "0.5"))
+AI_BREAKER_SLOW_SECONDS = float(os.getenv("AI_BREAKER_SLOW_SECONDS", "3"))
+AI_BREAKER_SLOW_RATE = float(os.getenv("AI_BREAKER_SLOW_RATE", "0.5"))
+AI_BREAKER_OPEN_SECONDS = float(os.getenv("AI_BREAKER_OPEN_SECONDS", "30"))
+
+# Hedging: si la respuesta tarda más que el p95 reciente (o AI_HEDGE_DELAY),
+# se lanza una segunda petición y gana la primera que responda
+AI_HEDGE_ENABLED = os.getenv("AI_HEDGE_ENABLED", "0") == "1"
+AI_HEDGE_DELAY = float(os.getenv("AI_HEDGE_DELAY", "0")) or None
+AI_HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", "0.05"))
+AI_HEDGE_MIN_SAMPLES = 20
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class PredictionError(Exception):
+    """
+    Error al obtener una predicción del servicio de IA.
+    """
+
+
+class CircuitOpenError(PredictionError):
+    """
+    El circuit breaker está abierto: no se llama al servicio de IA.
+    """
+
+
+class LatencyStats:
+    """
+    Contadores de llamadas y ventana de latencias recientes (para percentiles).
+    """
+
+    def __init__(self, window=512):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds, ok=True):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(int(round(pct / 100 * (len(samples) - 1))), len(samples) - 1)
+        return samples[index]
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+        }
+
+
+class CircuitBreaker:
+    """
+    closed → open cuando la ventana de llamadas recientes tiene demasiados
+    errores o demasiadas llamadas lentas; open → half_open pasado
+    open_seconds; half_open deja pasar una sola llamada de prueba que
+    cierra el circuito si sale bien o lo vuelve a abrir si falla.
+    """
+
+    def __init__(self, window=AI_BREAKER_WINDOW, min_calls=AI_BREAKER_MIN_CALLS,
+                 error_rate=AI_BREAKER_ERROR_RATE, slow_seconds=AI_BREAKER_SLOW_SECONDS,
+                 slow_rate=AI_BREAKER_SLOW_RATE, open_seconds=AI_BREAKER_OPEN_SECONDS,
+                 enabled=AI_BREAKER_ENABLED):
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)  # (ok, lenta)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.opened_total = 0
+        self.rejected_total = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trial_running = False
+
+    def _open(self, reason):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_running = False
+        self._outcomes.clear()
+        self.opened_total += 1
+        print(f"Circuit breaker de IA abierto ({reason}) por {self.open_seconds:g}s")
+
+    def allow(self):
+        """
+        True si se puede llamar al servicio ahora.
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.rejected_total += 1
+            return False
+
+    def record(self, seconds, ok=True):
+        if not self.enabled:
+            return
+        slow = seconds >= self.slow_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if ok and not slow:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    print("Circuit breaker de IA cerrado")
+                else:
+                    self._open("falló la llamada de prueba")
+                return
+            if self._state == OPEN:
+                # respuestas tardías de llamadas lanzadas antes de abrir
+                return
+
+            self._outcomes.append((ok, slow))
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            errors = sum(1 for ok_, _ in self._outcomes if not ok_)
+            slows = sum(1 for ok_, slow_ in self._outcomes if ok_ and slow_)
+            if errors / calls >= self.error_rate:
+                self._open(f"{errors}/{calls} errores")
+            elif slows / calls >= self.slow_rate:
+                self._open(f"{slows}/{calls} llamadas de más de {self.slow_seconds:g}s")
+
+    def as_dict(self):
+        state = self.state
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return {
+            "state": state,
+            "window_calls": len(outcomes),
+            "window_errors": sum(1 for ok, _ in outcomes if not ok),
+            "window_slow": sum(1 for ok, slow in outcomes if ok and slow),
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+        }
+
+
+class AIClient:
+    """
+    Cliente HTTP del servicio de predicción de tickets.
+    Reutiliza conexiones (keep-alive), acota los tiempos de espera y
+    reintenta con backoff los fallos transitorios.
+    """
+
+    def __init__(self, base_url=TICKETS_IA_API_URL,
+                 connect_timeout=AI_CONNECT_TIMEOUT, read_timeout=AI_READ_TIMEOUT,
+                 max_retries=AI_MAX_RETRIES, backoff=AI_RETRY_BACKOFF,
+                 pool_size=AI_POOL_SIZE, hedge=AI_HEDGE_ENABLED, hedge_delay=AI_HEDGE_DELAY):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = LatencyStats()
+        self.breaker = CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedged_total = 0
+        self.hedge_wins = 0
+        # peticiones principal y de respaldo; aparte del pool de ticket_classifier
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=pool_size * 2, thread_name_prefix="ai-hedge"
+        )
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["POST"]),  # la predicción es idempotente
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, title, description, timeout=None):
+        started = time.perf_counter()
+        try:
+            resp = self.session.post(
+                f"{self.base_url}/api/predict-ticket",
+                json={"title": title, "description": description},
+                timeout=timeout or self.timeout,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            elapsed = time.perf_counter() - started
+            self.stats.record(elapsed, ok=False)
+            self.breaker.record(elapsed, ok=False)
+            record_dependency("ai", elapsed)
+            raise PredictionError(str(e)) from e
+
+        elapsed = time.perf_counter() - started
+        self.stats.record(elapsed)
+        self.breaker.record(elapsed)
+        record_dependency("ai", elapsed)
+        return data
+
+    def _submit(self, *args):
+        # cada petición con su copia del contexto (métricas del request)
+        ctx = contextvars.copy_context()
+        return self._hedge_executor.submit(ctx.run, self._request, *args)
+
+    def current_hedge_delay(self):
+        """
+        Segundos a esperar antes de la petición de respaldo, o None si no
+        corresponde hedging (desactivado, sin muestras o circuito no cerrado).
+        """
+        if not self.hedge or self.breaker.state != CLOSED:
+            return None
+        if self.hedge_delay:
+            return self.hedge_delay
+        if self.stats.calls < AI_HEDGE_MIN_SAMPLES:
+            return None
+        p95 = self.stats.percentile(95)
+        return max(p95, AI_HEDGE_MIN_DELAY) if p95 else None
+
+    def _hedged(self, delay, title, description, timeout):
+        primary = self._submit(title, description, timeout)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+
+        # sin circuito cerrado no se duplica carga sobre un servicio degradado
+        if self.breaker.state != CLOSED:
+            return primary.result()
+        self.hedged_total += 1
+        secondary = self._submit(title, description, timeout)
+
+        pending = {primary, secondary}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    data = future.result()
+                except PredictionError as e:
+                    error = e
+                    continue
+                if future is secondary:
+                    self.hedge_wins += 1
+                # la otra petición sigue en segundo plano y solo suma a las métricas
+                return data
+        raise error
+
+    def predict_ticket(self, title, description, timeout=None):
+        """
+        Devuelve el JSON de /api/predict-ticket
+        (category_name, priority_name, priority_value, ...).
+        Lanza CircuitOpenError sin llamar al servicio si el circuito está abierto.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Servicio de IA no disponible (circuito abierto)")
+        delay = self.current_hedge_delay()
+        if delay is None:
+            return self._request(title, description, timeout)
+        return self._hedged(delay, title, description, timeout)
+
+    def status(self):
+        return {
+            "breaker": self.breaker.as_dict(),
+            "latency": self.stats.as_dict(),
+            "hedged_total": self.hedged_total,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+# Instancia compartida (un pool de conexiones por proceso)
+ai_client = AIClient()
+
+
+@register_collector
+def _ai_client_metrics():
+    status = ai_client.status()
+    breaker = status["breaker"]
+    lines = [
+        "# HELP ai_circuit_state Estado del circuit breaker de la IA (1 = estado actual).",
+        "# TYPE ai_circuit_state gauge",
+    ]
+    for state in (CLOSED, OPEN, HALF_OPEN):
+        lines.append(f'ai_circuit_state{{state="{state}"}} {int(breaker["state"] == state)}')
+    for name, help_text, value in (
+        ("ai_circuit_opened_total", "Veces que se abrió el circuito.", breaker["opened_total"]),
+        ("ai_circuit_rejected_total", "Llamadas rechazadas con el circuito abierto.", breaker["rejected_total"]),
+        ("ai_hedged_requests_total", "Peticiones de respaldo (hedging) lanzadas.", status["hedged_total"]),
+        ("ai_hedge_wins_total", "Peticiones de respaldo que respondieron primero.", status["hedge_wins"]),
+    ):
+        lines.extend([
+            f"# HELP {name} {help_text}",
+            f"# TYPE {name} counter",
+            f"{name} {value}",
+        ])
+    return lines
+
+
+def predict_ticket(title, description):
+    """
+    Predicción con caché: tickets casi idénticos no vuelven a llamar al modelo.
+    """
+    prediction = prediction_cache.get(title, description)
+    if prediction is not None:
+        return prediction
+
+    prediction = ai_client.predict_ticket(title, description)
+    prediction_cache.set(title, description, prediction)
+    return prediction
@@ -0,0 +1,274 @@
+# app/services/assignment.py
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import Counter
+from app import supabase
+from app.repositories import tickets as ticket_repo
+from app.repositories import users as user_repo
+from app.repositories.base import sql_enabled
+from app.services.tickets_common import FINAL_STATUSES
+
+# Asignación automática de tickets nuevos al técnico (admin_tech) con menos carga
+ASSIGNMENT_ENABLED = os.getenv("ASSIGNMENT_ENABLED", "1") != "0"
+# Cada cuánto el hilo de fondo recalcula las cargas desde la base (cambios de
+# otros procesos, tickets cerrados, técnicos nuevos)
+ASSIGNMENT_RELOAD_SECONDS = float(os.getenv("ASSIGNMENT_RELOAD_SECONDS", "300"))
+# Tickets de ventaja que se le permiten al técnico de la categoría sobre el
+# menos cargado en general antes de asignar a cualquiera
+ASSIGNMENT_SKILL_SLACK = int(os.getenv("ASSIGNMENT_SKILL_SLACK", "3"))
+
+ANY_CATEGORY = None
+
+_LOAD_CHUNK = 1000
+
+
+class TechnicianQueue:
+    """
+    Técnicos ordenados por tickets abiertos en un heap general y uno por
+    categoría (técnicos con esa especialidad). Asignar o liberar empuja una
+    entrada nueva con la carga actualizada; las viejas se descartan al salir
+    del heap (invalidación perezosa), así cada operación es O(log n).
+    Las cargas se recalculan desde la base solo en el hilo de fondo:
+    asignar nunca consulta la base.
+    """
+
+    def __init__(self, ttl=ASSIGNMENT_RELOAD_SECONDS, skill_slack=ASSIGNMENT_SKILL_SLACK):
+        self.ttl = ttl
+        self.skill_slack = skill_slack
+        self._lock = threading.Lock()
+        self._thread = None
+        self.loaded = False
+        self._stamps = itertools.count()
+        self._load = {}
+        self._stamp = {}
+        self._skills = {}
+        self._heaps = {}
+
+    # ─────────────────────────────────────
+    # Carga desde la base
+    # ─────────────────────────────────────
+    def _fetch_technicians(self):
+        """
+        [{"username_id", "skills": [category_id, ...]}] de los admin_tech.
+        """
+        if sql_enabled():
+            return user_repo.technicians()
+
+        technicians = (
+            supabase
+            .table("users")
+            .select("username_id")
+            .eq("role", "admin_tech")
+            .execute()
+            .data or []
+        )
+        skills = {}
+        try:
+            rows = supabase.table("technician_skill").select("username_id, category_id").execute().data or []
+            for row in rows:
+                skills.setdefault(row["username_id"], []).append(row["category_id"])
+        except Exception as e:
+            print("Tabla technician_skill no disponible, todos los técnicos son generales:", e)
+        return [
+            {"username_id": tech["username_id"], "skills": skills.get(tech["username_id"], [])}
+            for tech in technicians
+        ]
+
+    def _loads_fallback(self):
+        """
+        Respaldo si technician_open_loads no está instalada: solo la columna
+        de asignación de los tickets abiertos, paginada, y se cuenta aquí.
+        """
+        loads = Counter()
+        start = 0
+        while True:
+            rows = (
+                supabase
+                .table("ticket")
+                .select("assigned_to_staff_user_id")
+                .not_.is_("assigned_to_staff_user_id", "null")
+                .not_.in_("status", FINAL_STATUSES)
+                .order("ticket_id")
+                .range(start, start + _LOAD_CHUNK - 1)
+                .execute()
+                .data or []
+            )
+            for row in rows:
+                loads[row["assigned_to_staff_user_id"]] += 1
+            if len(rows) < _LOAD_CHUNK:
+                return loads
+            start += _LOAD_CHUNK
+
+    def _fetch_loads(self):
+        """
+        {username_id: tickets abiertos asignados}.
+        """
+        if sql_enabled():
+            return ticket_repo.technician_open_loads()
+        try:
+            resp = supabase.rpc("technician_open_loads", {}).execute()
+        except Exception as e:
+            print("RPC technician_open_loads no disponible, contando en Python:", e)
+            return self._loads_fallback()
+        return {row["username_id"]: row.get("open_tickets") or 0 for row in resp.data or []}
+
+    def rebuild(self):
+        """
+        Reconstruye los heaps con las cargas actuales de la base.
+        """
+        technicians = self._fetch_technicians()
+        loads = self._fetch_loads()
+
+        with self._lock:
+            self._load = {}
+            self._stamp = {}
+            self._skills = {}
+            self._heaps = {ANY_CATEGORY: []}
+            for tech in technicians:
+                tech_id = tech["username_id"]
+                self._load[tech_id] = loads.get(tech_id, 0)
+                self._stamp[tech_id] = next(self._stamps)
+                self._skills[tech_id] = frozenset(tech.get("skills") or ())
+                for category_id in self._skills[tech_id]:
+                    self._heaps.setdefault(category_id, [])
+            for heap_key in self._heaps:
+                self._heaps[heap_key] = [
+                    self._entry(tech_id) for tech_id in self._load
+                    if heap_key is ANY_CATEGORY or heap_key in self._skills[tech_id]
+                ]
+                heapq.heapify(self._heaps[heap_key])
+            self.loaded = True
+
+    def refresh(self):
+        try:
+            self.rebuild()
+            return True
+        except Exception as e:
+            # se sigue con las cargas que haya y se reintenta antes
+            print("Error cargando cargas de técnicos:", e)
+            return False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="assignment-reload")
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            ok = self.refresh()
+            time.sleep(self.ttl if ok else min(self.ttl, 30))
+
+    # ─────────────────────────────────────
+    # Heaps
+    # ─────────────────────────────────────
+    def _entry(self, tech_id):
+        # a igual carga, primero el que hace más tiempo no recibe ticket
+        return (self._load[tech_id], self._stamp[tech_id], tech_id)
+
+    def _push(self, tech_id):
+        self._stamp[tech_id] = next(self._stamps)
+        entry = self._entry(tech_id)
+        heapq.heappush(self._heaps[ANY_CATEGORY], entry)
+        for category_id in self._skills[tech_id]:
+            heapq.heappush(self._heaps[category_id], entry)
+
+    def _peek(self, heap_key):
+        heap = self._heaps.get(heap_key)
+        while heap:
+            load, stamp, tech_id = heap[0]
+            if self._stamp.get(tech_id) == stamp:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _compact(self):
+        # demasiadas entradas viejas (p. ej. muchas liberaciones): rehacer
+        for heap_key, heap in self._heaps.items():
+            if len(heap) > 4 * len(self._load) + 64:
+                self._heaps[heap_key] = [
+                    self._entry(tech_id) for tech_id in self._load
+                    if heap_key is ANY_CATEGORY or heap_key in self._skills[tech_id]
+                ]
+                heapq.heapify(self._heaps[heap_key])
+
+    # ─────────────────────────────────────
+    # API
+    # ─────────────────────────────────────
+    def assign(self, category_id=None):
+        """
+        Técnico con menos tickets abiertos (prefiriendo los de la categoría)
+        y le suma uno a su carga. None si no hay técnicos o las cargas aún
+        no se cargaron.
+        """
+        with self._lock:
+            best = self._peek(ANY_CATEGORY)
+            if best is None:
+                return None
+            skilled = self._peek(category_id) if category_id is not None else None
+            if skilled is not None and skilled[0] <= best[0] + self.skill_slack:
+                best = skilled
+
+            tech_id = best[2]
+            self._load[tech_id] += 1
+            self._push(tech_id)
+            self._compact()
+            return tech_id
+
+    def release(self, tech_id):
+        """
+        El ticket dejó de contar para el técnico (se cerró, se reasignó o
+        no se llegó a insertar).
+        """
+        with self._lock:
+            if tech_id not in self._load:
+                return
+            self._load[tech_id] = max(self._load[tech_id] - 1, 0)
+            self._push(tech_id)
+            self._compact()
+
+    def loads(self):
+        with self._lock:
+            return dict(self._load)
+
+
+technician_queue = TechnicianQueue()
+
+
+def assign_ticket(payload):
+    """
+    Completa assigned_to_staff_user_id del payload de un ticket nuevo
+    abierto. Devuelve el técnico asignado (o None).
+    """
+    if not ASSIGNMENT_ENABLED or payload.get("assigned_to_staff_user_id"):
+        return None
+    if payload.get("status", "open") in FINAL_STATUSES:
+        return None
+    try:
+        tech_id = technician_queue.assign(payload.get("category_id"))
+    except Exception as e:
+        print("Error asignando técnico:", e)
+        return None
+    payload["assigned_to_staff_user_id"] = tech_id
+    return tech_id
+
+
+def release_ticket(payload):
+    """
+    Deshace assign_ticket si el insert falló.
+    """
+    tech_id = payload.get("assigned_to_staff_user_id")
+    if ASSIGNMENT_ENABLED and tech_id is not None:
+        technician_queue.release(tech_id)
+
+
+def init_app(app):
+    app.extensions["technician_queue"] = technician_queue
+    if ASSIGNMENT_ENABLED:
+        # carga al arrancar y cada ASSIGNMENT_RELOAD_SECONDS, sin bloquear
+        # requests. Va en cada proceso (no en worker.py): los heaps viven en
+        # la memoria del proceso que asigna, y la recarga es una sola
+        # consulta agrupada (technician_open_loads)
+        technician_queue.start()
@@ -0,0 +1,341 @@
+# app/services/classification_queue.py
+import os
+import queue
+import threading
+import time
+from datetime import timedelta
+from app import supabase
+from app.services.assignment import assign_ticket, release_ticket
+from app.services.live_events import ticket_written
+from app.services.sla import sla_due_times, track_ticket
+from app.services.ticket_classifier import classify_tickets, prediction_ids
+from app.services.tickets_common import utcnow
+
+# sync  → create_ticket_ai espera al modelo antes de guardar (comportamiento original)
+# async → se guarda con pending_classification=true y un worker clasifica después
+AI_CLASSIFICATION_MODE = os.getenv("AI_CLASSIFICATION_MODE", "sync").lower()
+# Implementación de la cola (ver QUEUE_BACKENDS)
+CLASSIFICATION_QUEUE_BACKEND = os.getenv("CLASSIFICATION_QUEUE_BACKEND", "local").lower()
+CLASSIFICATION_QUEUE_SIZE = int(os.getenv("CLASSIFICATION_QUEUE_SIZE", "10000"))
+CLASSIFY_WORKERS = int(os.getenv("CLASSIFY_WORKERS", "2"))
+# Micro-lotes: hasta N tickets o lo que llegue en este tiempo
+CLASSIFY_BATCH_SIZE = int(os.getenv("CLASSIFY_BATCH_SIZE", "16"))
+CLASSIFY_BATCH_WAIT = float(os.getenv("CLASSIFY_BATCH_WAIT", "0.05"))
+# Cada cuánto se buscan en la base tickets pendientes que no están en la cola
+# (proceso reiniciado, otro worker caído); solo los más viejos que esto
+CLASSIFY_RECOVER_SECONDS = float(os.getenv("CLASSIFY_RECOVER_SECONDS", "60"))
+# La recuperación recorre la base completa: solo en un proceso (worker.py).
+# Los workers sí corren en cada proceso, porque consumen su cola local
+CLASSIFY_RECOVER_ENABLED = os.getenv("CLASSIFY_RECOVER_ENABLED", "0") == "1"
+# Intentos fallidos antes de dejar el ticket para clasificación manual; entre
+# intentos se espera CLASSIFY_RECOVER_SECONDS * 2^(intentos - 1)
+CLASSIFY_MAX_ATTEMPTS = int(os.getenv("CLASSIFY_MAX_ATTEMPTS", "5"))
+
+_RECOVER_LIMIT = 500
+
+
+def async_classification_enabled():
+    return AI_CLASSIFICATION_MODE == "async"
+
+
+class LocalQueue:
+    """
+    Cola en memoria del proceso. Otro backend (Redis, SQS, pgmq...) solo
+    necesita put(job) -> bool y get_batch(max_items, wait) -> [job].
+    Los jobs son dicts serializables a JSON.
+    """
+
+    def __init__(self, maxsize=CLASSIFICATION_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, job):
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except queue.Full:
+            # queda pendiente en la base; lo recupera recover()
+            return False
+
+    def get_batch(self, max_items, wait, idle_timeout=1.0):
+        try:
+            batch = [self._queue.get(timeout=idle_timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + wait
+        while len(batch) < max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+QUEUE_BACKENDS = {
+    "local": LocalQueue,
+}
+
+
+def _executor_shut_down(error):
+    # ThreadPoolExecutor.submit: "cannot schedule new futures after
+    # (interpreter) shutdown"
+    return "after shutdown" in str(error) or "interpreter shutdown" in str(error)
+
+
+class ClassificationPipeline:
+    """
+    Workers que clasifican con la IA los tickets guardados con
+    pending_classification=true, en micro-lotes, y actualizan
+    category_id / priority_id, los vencimientos de SLA y el técnico.
+    La base es la fuente de verdad: la cola es solo un aviso, y el update
+    solo aplica si el ticket sigue pendiente (idempotente entre procesos).
+    """
+
+    def __init__(self, backend=CLASSIFICATION_QUEUE_BACKEND, workers=CLASSIFY_WORKERS,
+                 batch_size=CLASSIFY_BATCH_SIZE, batch_wait=CLASSIFY_BATCH_WAIT,
+                 recover_seconds=CLASSIFY_RECOVER_SECONDS, max_attempts=CLASSIFY_MAX_ATTEMPTS,
+                 recover=CLASSIFY_RECOVER_ENABLED):
+        self.queue = QUEUE_BACKENDS[backend]()
+        self.workers = max(workers, 1)
+        self.batch_size = max(batch_size, 1)
+        self.batch_wait = batch_wait
+        self.recover_seconds = recover_seconds
+        self.max_attempts = max(max_attempts, 1)
+        self.recover_enabled = recover
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.classified_total = 0
+        self.failed_total = 0
+        self.manual_total = 0
+
+    # ─────────────────────────────────────
+    # Encolar
+    # ─────────────────────────────────────
+    def enqueue(self, ticket):
+        ticket_id = ticket.get("ticket_id")
+        if ticket_id is None:
+            return False
+        with self._lock:
+            if ticket_id in self._queued:
+                return True
+            self._queued.add(ticket_id)
+        job = {
+            field: ticket.get(field)
+            for field in ("ticket_id", "id_company", "title", "description", "created_at")
+        }
+        job["attempts"] = ticket.get("classification_attempts") or 0
+        if not self.queue.put(job):
+            with self._lock:
+                self._queued.discard(ticket_id)
+            print(f"Cola de clasificación llena; el ticket {ticket_id} se recuperará de la base")
+            return False
+        return True
+
+    def pending(self):
+        with self._lock:
+            return len(self._queued)
+
+    # ─────────────────────────────────────
+    # Workers
+    # ─────────────────────────────────────
+    def start(self):
+        if self._threads:
+            return
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True, name=f"ai-classify-{n}")
+            thread.start()
+            self._threads.append(thread)
+        if self.recover_enabled:
+            thread = threading.Thread(target=self._recover_loop, daemon=True, name="ai-classify-recover")
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            batch = self.queue.get_batch(self.batch_size, self.batch_wait)
+            if not batch:
+                continue
+            try:
+                self.process(batch)
+            except RuntimeError as e:
+                if _executor_shut_down(e):
+                    # el executor de la IA ya no acepta tareas: el proceso se
+                    # está cerrando y lo pendiente queda en la base para recover()
+                    print("Workers de clasificación detenidos:", e)
+                    return
+                print("Error clasificando lote de tickets:", e)
+            except Exception as e:
+                print("Error clasificando lote de tickets:", e)
+            finally:
+                with self._lock:
+                    self._queued.difference_update(job["ticket_id"] for job in batch)
+
+    def process(self, batch):
+        """
+        Clasifica un lote (en paralelo contra la IA) y guarda el resultado.
+        Los que no se pudieron clasificar (sin predicción o con nombres que
+        no existen en category / priority) cuentan como intento fallido.
+        """
+        predictions = classify_tickets([(job["title"], job["description"]) for job in batch])
+
+        rows = []
+        failed = []
+        for job, prediction in zip(batch, predictions):
+            if not prediction:
+                failed.append(job)
+                continue
+            category_id, priority_id = prediction_ids(prediction)
+            if category_id is None or priority_id is None:
+                print(f"Predicción sin categoría/prioridad conocida para el ticket {job['ticket_id']}:", prediction)
+                failed.append(job)
+                continue
+            row = {
+                "ticket_id": job["ticket_id"],
+                "category_id": category_id,
+                "priority_id": priority_id,
+                "fallback_classified": bool(prediction.get("fallback")),
+                **sla_due_times(priority_id, job.get("created_at")),
+            }
+            assign_ticket(row)
+            rows.append(row)
+
+        self._record_failures(failed)
+
+        updated = {ticket["ticket_id"]: ticket for ticket in self._apply(rows)}
+        for row in rows:
+            ticket = updated.get(row["ticket_id"])
+            if ticket is None:
+                # otro proceso ya lo clasificó
+                release_ticket(row)
+                continue
+            with self._lock:
+                self.classified_total += 1
+            old = {
+                **ticket,
+                "category_id": None,
+                "priority_id": None,
+                "assigned_to_staff_user_id": None,
+                "pending_classification": True,
+            }
+            ticket_written("UPDATE", ticket, old)
+            track_ticket(ticket)
+
+    def _apply(self, rows):
+        """
+        Guarda las clasificaciones del lote; devuelve los tickets actualizados.
+        """
+        if not rows:
+            return []
+        try:
+            resp = supabase.rpc("apply_ticket_classifications", {"p_rows": rows}).execute()
+            return resp.data or []
+        except Exception as e:
+            print("RPC apply_ticket_classifications no disponible, actualizando uno a uno:", e)
+
+        updated = []
+        for row in rows:
+            changes = {key: value for key, value in row.items() if key != "ticket_id"}
+            changes["pending_classification"] = False
+            try:
+                resp = (
+                    supabase
+                    .table("ticket")
+                    .update(changes)
+                    .eq("ticket_id", row["ticket_id"])
+                    .eq("pending_classification", True)
+                    .execute()
+                )
+                updated.extend(resp.data or [])
+            except Exception as e:
+                print(f"Error guardando clasificación del ticket {row['ticket_id']}:", e)
+        return updated
+
+    def _record_failures(self, jobs):
+        """
+        Cuenta el intento fallido y programa el próximo con backoff
+        exponencial; pasados max_attempts el ticket deja de estar pendiente
+        y queda marcado para clasificación manual.
+        """
+        now = utcnow()
+        for job in jobs:
+            attempts = (job.get("attempts") or 0) + 1
+            changes = {"classification_attempts": attempts}
+            if attempts >= self.max_attempts:
+                changes.update({
+                    "pending_classification": False,
+                    "needs_manual_classification": True,
+                })
+            else:
+                delay = self.recover_seconds * 2 ** (attempts - 1)
+                changes["classification_retry_at"] = (now + timedelta(seconds=delay)).isoformat()
+            try:
+                (
+                    supabase
+                    .table("ticket")
+                    .update(changes)
+                    .eq("ticket_id", job["ticket_id"])
+                    .eq("pending_classification", True)
+                    .execute()
+                )
+            except Exception as e:
+                print(f"Error registrando intento de clasificación del ticket {job['ticket_id']}:", e)
+                continue
+            with self._lock:
+                self.failed_total += 1
+                if attempts >= self.max_attempts:
+                    self.manual_total += 1
+            if attempts >= self.max_attempts:
+                print(f"Ticket {job['ticket_id']} sin clasificar tras {attempts} intentos: queda para clasificación manual")
+
+    # ─────────────────────────────────────
+    # Recuperación desde la base
+    # ─────────────────────────────────────
+    def _recover_loop(self):
+        while True:
+            time.sleep(self.recover_seconds)
+            try:
+                self.recover()
+            except Exception as e:
+                print("Error recuperando tickets pendientes de clasificar:", e)
+
+    def recover(self):
+        """
+        Encola los tickets que siguen pendientes hace más de recover_seconds
+        y cuyo próximo reintento (si ya fallaron) ya llegó.
+        """
+        now = utcnow()
+        older_than = now - timedelta(seconds=self.recover_seconds)
+        rows = (
+            supabase
+            .table("ticket")
+            .select("ticket_id, id_company, title, description, created_at, classification_attempts")
+            .eq("pending_classification", True)
+            .lt("created_at", older_than.isoformat())
+            .or_(f"classification_retry_at.is.null,classification_retry_at.lte.{now.isoformat()}")
+            .order("created_at")
+            .limit(_RECOVER_LIMIT)
+            .execute()
+            .data or []
+        )
+        for row in rows:
+            self.enqueue(row)
+        return len(rows)
+
+
+classification_pipeline = ClassificationPipeline()
+
+
+def enqueue_classification(ticket):
+    classification_pipeline.enqueue(ticket)
+
+
+def init_app(app):
+    app.extensions["classification_pipeline"] = classification_pipeline
+    if async_classification_enabled():
+        classification_pipeline.start()
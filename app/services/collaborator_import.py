@@ -0,0 +1,218 @@
+# app/services/collaborator_import.py
+import csv
+import io
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from werkzeug.security import generate_password_hash
+from app import supabase
+
+# Filas máximas por archivo y procesos para hashear contraseñas
+COLLABORATOR_IMPORT_MAX_ROWS = int(os.getenv("COLLABORATOR_IMPORT_MAX_ROWS", "1000"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+# Emails por consulta de existentes (el filtro in.(...) va en la URL)
+EMAIL_LOOKUP_CHUNK = 100
+
+COLLABORATOR_ROLES = {"admin_op"}
+TRUE_VALUES = {"1", "true", "si", "sí", "yes", "on", "x"}
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class CollaboratorRowError(Exception):
+    """
+    Fila del CSV que no se puede registrar.
+    """
+
+
+# ─────────────────────────────────────
+# Hash de contraseñas en procesos aparte
+# ─────────────────────────────────────
+def _hash_password(password):
+    return generate_password_hash(password)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: el proceso ya tiene hilos (scheduler de SLA, barrido de
+            # sesiones, pools) y un fork podría heredar locks tomados
+            _pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def hash_passwords(passwords):
+    """
+    scrypt/pbkdf2 son CPU puro: en un ProcessPoolExecutor no bloquean el GIL
+    de los hilos que atienden requests. Si el pool no está disponible se
+    hashea en el proceso actual.
+    """
+    global _pool
+    if not passwords:
+        return []
+    if len(passwords) == 1 or PASSWORD_HASH_WORKERS <= 1:
+        return [_hash_password(password) for password in passwords]
+
+    chunksize = max(1, len(passwords) // (PASSWORD_HASH_WORKERS * 4))
+    try:
+        return list(_get_pool().map(_hash_password, passwords, chunksize=chunksize))
+    except (BrokenProcessPool, OSError) as e:
+        print("Pool de hash no disponible, hasheando en el proceso:", e)
+        with _pool_lock:
+            _pool = None
+        return [_hash_password(password) for password in passwords]
+
+
+# ─────────────────────────────────────
+# Lectura y validación
+# ─────────────────────────────────────
+def _clean(row, key):
+    return str(row.get(key) or "").strip()
+
+
+def build_collaborator(row):
+    """
+    Valida una fila y devuelve (payload sin hash, contraseña en claro).
+    """
+    email = _clean(row, "email").lower()
+    username = _clean(row, "username_company")
+    password = _clean(row, "password")
+    role = _clean(row, "role") or "admin_op"
+
+    if not email or not username or not password:
+        raise CollaboratorRowError("email, username_company y password son obligatorios")
+    if not EMAIL_RE.match(email):
+        raise CollaboratorRowError(f"email no válido: {email}")
+    if role not in COLLABORATOR_ROLES:
+        raise CollaboratorRowError(f"rol no válido: {role}")
+
+    is_activate = _clean(row, "is_activate").lower()
+    payload = {
+        "email": email,
+        "role": role,
+        "is_activate": is_activate in TRUE_VALUES if is_activate else True,
+        "imageSelfieUrl": _clean(row, "imageSelfieUrl") or None,
+        "phoneNumber": _clean(row, "phoneNumber") or None,
+        "username_company": username,
+    }
+    return payload, password
+
+
+def _existing_emails(emails):
+    """
+    Emails (en minúsculas) que ya están registrados. Se consulta en bloques
+    para no armar URLs enormes con archivos grandes.
+    """
+    emails = sorted(set(emails))
+    existing = set()
+    for start in range(0, len(emails), EMAIL_LOOKUP_CHUNK):
+        resp = (
+            supabase
+            .table("company_users")
+            .select("email")
+            .in_("email", emails[start:start + EMAIL_LOOKUP_CHUNK])
+            .execute()
+        )
+        existing.update(str(row.get("email") or "").lower() for row in resp.data or [])
+    return existing
+
+
+def _insert(pending):
+    """
+    Un solo insert para todo el lote; si falla, fila por fila para
+    reportar exactamente cuáles tienen problema.
+    Devuelve {línea: error} de las que no se insertaron.
+    """
+    if not pending:
+        return {}
+
+    try:
+        supabase.table("company_users").insert([payload for _, payload in pending]).execute()
+        return {}
+    except Exception as e:
+        print("Error en insert masivo de colaboradores, reintentando fila por fila:", e)
+
+    errors = {}
+    for line_no, payload in pending:
+        try:
+            supabase.table("company_users").insert(payload).execute()
+        except Exception as e:
+            errors[line_no] = str(e)
+    return errors
+
+
+def import_collaborators(stream, company_id, max_rows=COLLABORATOR_IMPORT_MAX_ROWS):
+    """
+    Registra colaboradores desde un CSV (email, username_company, password,
+    role, phoneNumber, imageSelfieUrl, is_activate).
+    Devuelve una lista con el resultado de cada fila:
+      {"line", "email", "ok", "error"}
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    results = []
+    valid = []
+    seen = set()
+    spellings = set()
+
+    try:
+        reader = csv.DictReader(text)
+        for row in reader:
+            line_no = reader.line_num
+            if len(results) >= max_rows:
+                results.append({
+                    "line": line_no, "email": None, "ok": False,
+                    "error": f"Se procesan como máximo {max_rows} filas por archivo",
+                })
+                break
+            result = {"line": line_no, "email": _clean(row, "email").lower() or None,
+                      "ok": False, "error": None}
+            results.append(result)
+            try:
+                payload, password = build_collaborator(row)
+                if payload["email"] in seen:
+                    raise CollaboratorRowError("email repetido en el archivo")
+                seen.add(payload["email"])
+                # registros viejos pueden tener el email tal como se escribió
+                spellings.update({payload["email"], _clean(row, "email")})
+                valid.append((result, payload, password))
+            except CollaboratorRowError as e:
+                result["error"] = str(e)
+    except (UnicodeDecodeError, csv.Error) as e:
+        results.append({"line": None, "email": None, "ok": False, "error": str(e)})
+        return results
+
+    existing = _existing_emails(spellings)
+    ready = []
+    for result, payload, password in valid:
+        if payload["email"] in existing:
+            result["error"] = "ya existe un colaborador con ese email"
+        else:
+            ready.append((result, payload, password))
+
+    # solo se hashean las filas que van a insertarse
+    hashes = hash_passwords([password for _, _, password in ready])
+    created_at = datetime.utcnow().isoformat()
+    pending = []
+    for (result, payload, _), hashed in zip(ready, hashes):
+        payload.update({
+            "password": hashed,
+            "Id_company": company_id,
+            "created_at": created_at,
+        })
+        pending.append((result["line"], payload))
+
+    errors = _insert(pending)
+    for result, _, _ in ready:
+        result["error"] = errors.get(result["line"])
+        result["ok"] = result["error"] is None
+    return results
@@ -0,0 +1,75 @@
+# app/services/companies.py
+from app import supabase
+from app.repositories import tickets as ticket_repo
+from app.repositories.base import sql_enabled
+from app.services.fanout import FanOut
+
+# Solo las columnas que muestra el listado de compañías
+COMPANY_LIST_COLUMNS = (
+    "company_id, name, commercialName, businessName, countryCity, "
+    "stateProvince, phoneNumber, webSite, status, created_at"
+)
+
+
+def _count_tickets(company_id, status=None):
+    # head=True: PostgREST solo devuelve el total, sin filas (no lo recorta max-rows)
+    query = (
+        supabase
+        .table("ticket")
+        .select("ticket_id", count="exact", head=True)
+        .eq("id_company", company_id)
+    )
+    if status is not None:
+        query = query.eq("status", status)
+    return query.execute().count or 0
+
+
+def _counts_fallback(company_ids):
+    """
+    Respaldo si company_ticket_counts no está instalada: conteos exactos
+    por compañía (total y abiertos), en paralelo.
+    """
+    fan = FanOut()
+    for company_id in company_ids:
+        fan.submit(("total", company_id), _count_tickets, company_id)
+        fan.submit(("open", company_id), _count_tickets, company_id, "open")
+    results = fan.gather()
+    if fan.errors:
+        # mejor sin conteos que con conteos equivocados
+        raise next(iter(fan.errors.values()))
+    return {
+        company_id: {
+            "total_tickets": results[("total", company_id)],
+            "open_tickets": results[("open", company_id)],
+        }
+        for company_id in company_ids
+    }
+
+
+def company_ticket_counts(company_ids):
+    """
+    {company_id: {"total_tickets": n, "open_tickets": n}} para las
+    compañías indicadas, en un solo round trip.
+    """
+    company_ids = [company_id for company_id in company_ids if company_id is not None]
+    if not company_ids:
+        return {}
+
+    if sql_enabled():
+        return ticket_repo.company_ticket_counts(company_ids)
+
+    try:
+        resp = supabase.rpc(
+            "company_ticket_counts", {"p_company_ids": company_ids}
+        ).execute()
+    except Exception as e:
+        print("RPC company_ticket_counts no disponible, contando por compañía:", e)
+        return _counts_fallback(company_ids)
+
+    return {
+        row["company_id"]: {
+            "total_tickets": row.get("total_tickets") or 0,
+            "open_tickets": row.get("open_tickets") or 0,
+        }
+        for row in resp.data or []
+    }
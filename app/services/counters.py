@@ -0,0 +1,81 @@
+# app/services/counters.py
+import os
+from dataclasses import dataclass, asdict
+from app import supabase
+from app.repositories import reference as reference_repo
+from app.repositories.base import sql_enabled
+
+# table     → tabla platform_counters (mantenida por triggers)
+# planned / estimated / exact → conteos de PostgREST si la tabla no existe
+COUNTERS_MODE = os.getenv("COUNTERS_MODE", "table").lower()
+COUNTERS_FALLBACK_COUNT = os.getenv("COUNTERS_FALLBACK_COUNT", "planned").lower()
+
+
+@dataclass
+class PlatformCounters:
+    total_tickets: int = 0
+    total_users: int = 0
+    total_collaborators: int = 0
+    total_companies: int = 0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def _from_table():
+    if sql_enabled():
+        values = reference_repo.platform_counters()
+    else:
+        resp = (
+            supabase
+            .table("platform_counters")
+            .select("name, value")
+            .in_("name", ["tickets", "users", "collaborators", "companies"])
+            .execute()
+        )
+        values = {row["name"]: row["value"] for row in resp.data or []}
+    values = {name: value or 0 for name, value in values.items()}
+    if not values:
+        raise LookupError("platform_counters vacía")
+    return PlatformCounters(
+        total_tickets=values.get("tickets", 0),
+        total_users=values.get("users", 0),
+        total_collaborators=values.get("collaborators", 0),
+        total_companies=values.get("companies", 0),
+    )
+
+
+def _count(table, column, count, **filters):
+    # head=True: PostgREST solo devuelve el total, sin filas
+    query = supabase.table(table).select(column, count=count, head=True)
+    for key, value in filters.items():
+        query = query.eq(key, value)
+    return query.execute().count or 0
+
+
+def _from_counts(count):
+    """
+    Conteos directos. Con count="planned" el total sale de las
+    estadísticas del planner (no recorre la tabla).
+    """
+    return PlatformCounters(
+        total_tickets=_count("ticket", "ticket_id", count),
+        total_users=_count("users", "username_id", count),
+        # con filtro el planner estima mal: este siempre es exacto
+        total_collaborators=_count("users", "username_id", "exact", role="admin_tech"),
+        total_companies=_count("company", "company_id", count),
+    )
+
+
+def get_platform_counters():
+    """
+    Totales del panel SysAdmin en tiempo constante.
+    """
+    if COUNTERS_MODE == "table":
+        try:
+            return _from_table()
+        except Exception as e:
+            print("platform_counters no disponible, usando conteos:", e)
+        return _from_counts(COUNTERS_FALLBACK_COUNT)
+
+    return _from_counts(COUNTERS_MODE)
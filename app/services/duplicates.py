@@ -0,0 +1,316 @@
+# app/services/duplicates.py
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+from app import supabase
+from app.services.live_events import on_ticket_change
+from app.services.lru_cache import TTLCache
+from app.services.text import tokenize
+from app.services.tickets_common import FINAL_STATUSES, parse_ts, utcnow
+
+# Aviso de posibles duplicados al crear tickets
+DUPLICATE_CHECK_ENABLED = os.getenv("DUPLICATE_CHECK_ENABLED", "1") != "0"
+# Similitud de Jaccard (palabras y pares de palabras) a partir de la que se avisa
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.6"))
+# Solo se comparan tickets abiertos de los últimos N días
+DUPLICATE_WINDOW_DAYS = int(os.getenv("DUPLICATE_WINDOW_DAYS", "30"))
+# Tickets por compañía que se mantienen en el índice (los más recientes)
+DUPLICATE_MAX_PER_COMPANY = int(os.getenv("DUPLICATE_MAX_PER_COMPANY", "2000"))
+# Cada índice de compañía se recarga de la base en segundo plano pasado este
+# tiempo (tickets creados por otros procesos) y se mantienen a lo sumo N
+# compañías (LRU)
+DUPLICATE_RELOAD_SECONDS = float(os.getenv("DUPLICATE_RELOAD_SECONDS", "300"))
+DUPLICATE_MAX_COMPANIES = int(os.getenv("DUPLICATE_MAX_COMPANIES", "200"))
+DUPLICATE_LOAD_WORKERS = int(os.getenv("DUPLICATE_LOAD_WORKERS", "2"))
+# Hashes de shingles memorizados (~3 KB cada uno)
+DUPLICATE_HASH_CACHE_SIZE = int(os.getenv("DUPLICATE_HASH_CACHE_SIZE", "4096"))
+DUPLICATE_MAX_RESULTS = 3
+
+# 64 permutaciones en 16 bandas de 4 filas: un par con Jaccard 0.6 cae en
+# al menos una banda con probabilidad ~0.89; con 0.3, ~0.12
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+_LOAD_CHUNK = 1000
+
+
+def shingles(title, description):
+    """
+    Palabras normalizadas y pares de palabras consecutivas del ticket.
+    """
+    tokens = tokenize(f"{title or ''} {description or ''}")
+    result = set(tokens)
+    result.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return frozenset(result)
+
+
+@lru_cache(maxsize=DUPLICATE_HASH_CACHE_SIZE)
+def _shingle_hashes(shingle):
+    # el vocabulario se repite mucho entre tickets: cada shingle se
+    # permuta una sola vez y la firma es el mínimo columna a columna
+    h = zlib.crc32(shingle.encode("utf-8"))
+    return tuple((a * h + b) % _PRIME for a, b in _PERMUTATIONS)
+
+
+def minhash(shingle_set):
+    if not shingle_set:
+        return None
+    return tuple(map(min, zip(*map(_shingle_hashes, shingle_set))))
+
+
+def _bands(signature):
+    for band in range(LSH_BANDS):
+        start = band * LSH_ROWS
+        yield band, signature[start:start + LSH_ROWS]
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _CompanyIndex:
+    def __init__(self):
+        self.docs = {}     # ticket_id -> (shingles, created_at, title)
+        self.buckets = {}  # (banda, valores) -> {ticket_id}
+        self.keys = {}     # ticket_id -> [(banda, valores)]
+
+    def add(self, ticket_id, shingle_set, signature, created_at, title):
+        self.remove(ticket_id)
+        keys = list(_bands(signature))
+        for key in keys:
+            self.buckets.setdefault(key, set()).add(ticket_id)
+        self.keys[ticket_id] = keys
+        self.docs[ticket_id] = (shingle_set, created_at, title)
+
+    def remove(self, ticket_id):
+        for key in self.keys.pop(ticket_id, ()):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.discard(ticket_id)
+            if not bucket:
+                del self.buckets[key]
+        self.docs.pop(ticket_id, None)
+
+    def trim(self, max_docs, oldest):
+        expired = [
+            ticket_id for ticket_id, (_, created_at, _) in self.docs.items()
+            if created_at is not None and created_at < oldest
+        ]
+        for ticket_id in expired:
+            self.remove(ticket_id)
+        if len(self.docs) > max_docs:
+            by_age = sorted(self.docs, key=lambda ticket_id: self.docs[ticket_id][1] or oldest)
+            for ticket_id in by_age[:len(self.docs) - max_docs]:
+                self.remove(ticket_id)
+
+
+class DuplicateIndex:
+    """
+    Índice MinHash/LSH por compañía de los tickets abiertos recientes.
+    Cada compañía se carga de la base en segundo plano la primera vez que se
+    consulta (hasta entonces no hay candidatos) y se recarga igual pasado
+    reload_seconds, sin que el request espere; entre cargas se mantiene con
+    add()/remove() al crear o cerrar tickets. La búsqueda de candidatos solo
+    mira los buckets que coinciden en alguna banda y confirma con Jaccard exacto.
+    """
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD, window_days=DUPLICATE_WINDOW_DAYS,
+                 max_per_company=DUPLICATE_MAX_PER_COMPANY,
+                 reload_seconds=DUPLICATE_RELOAD_SECONDS, max_companies=DUPLICATE_MAX_COMPANIES):
+        self.threshold = threshold
+        self.window = timedelta(days=window_days)
+        self.max_per_company = max_per_company
+        self.reload_seconds = reload_seconds
+        self._lock = threading.RLock()
+        # compañía -> (índice, cargado_en); sin expiración, solo LRU
+        self._companies = TTLCache(maxsize=max_companies, ttl=float("inf"))
+        self._loading = set()
+        self._loader = ThreadPoolExecutor(
+            max_workers=DUPLICATE_LOAD_WORKERS, thread_name_prefix="duplicates-load"
+        )
+
+    def _load_company(self, company_id):
+        index = _CompanyIndex()
+        oldest = utcnow() - self.window
+        start = 0
+        while start < self.max_per_company:
+            resp = (
+                supabase
+                .table("ticket")
+                .select("ticket_id, title, description, created_at")
+                .eq("id_company", company_id)
+                .not_.in_("status", FINAL_STATUSES)
+                .gte("created_at", oldest.isoformat())
+                .order("created_at", desc=True)
+                .order("ticket_id", desc=True)
+                .range(start, min(start + _LOAD_CHUNK, self.max_per_company) - 1)
+                .execute()
+            )
+            rows = resp.data or []
+            for row in rows:
+                shingle_set = shingles(row.get("title"), row.get("description"))
+                signature = minhash(shingle_set)
+                if signature is not None:
+                    index.add(row["ticket_id"], shingle_set, signature,
+                              parse_ts(row.get("created_at")), row.get("title"))
+            if len(rows) < _LOAD_CHUNK:
+                break
+            start += _LOAD_CHUNK
+        return index
+
+    def refresh(self, company_id):
+        """
+        Carga (o recarga) el índice de la compañía desde la base.
+        """
+        try:
+            index = self._load_company(company_id)
+            self._companies.set(company_id, (index, time.monotonic()))
+        except Exception as e:
+            print(f"Error cargando índice de duplicados de la compañía {company_id}:", e)
+        finally:
+            with self._lock:
+                self._loading.discard(company_id)
+
+    def _schedule(self, company_id):
+        with self._lock:
+            if company_id in self._loading:
+                return
+            self._loading.add(company_id)
+        self._loader.submit(self.refresh, company_id)
+
+    def _loaded(self, company_id):
+        entry = self._companies.get(company_id)
+        return entry[0] if entry else None
+
+    def _company(self, company_id):
+        """
+        Índice actual de la compañía (None si todavía no está cargado);
+        si no existe o está vencido, pide la carga en segundo plano.
+        """
+        entry = self._companies.get(company_id)
+        if entry is None:
+            self._schedule(company_id)
+            return None
+        index, loaded_at = entry
+        if time.monotonic() - loaded_at >= self.reload_seconds:
+            self._schedule(company_id)
+        return index
+
+    def candidates(self, company_id, title, description, limit=DUPLICATE_MAX_RESULTS):
+        """
+        [{"ticket_id", "title", "similarity", "created_at"}] de tickets
+        abiertos de la compañía parecidos al texto, más parecido primero.
+        """
+        if company_id is None:
+            return []
+        shingle_set = shingles(title, description)
+        signature = minhash(shingle_set)
+        if signature is None:
+            return []
+
+        index = self._company(company_id)
+        if index is None:
+            return []
+        oldest = utcnow() - self.window
+        with self._lock:
+            seen = set()
+            for key in _bands(signature):
+                seen.update(index.buckets.get(key, ()))
+            matches = []
+            for ticket_id in seen:
+                other, created_at, other_title = index.docs[ticket_id]
+                if created_at is not None and created_at < oldest:
+                    continue
+                similarity = jaccard(shingle_set, other)
+                if similarity >= self.threshold:
+                    matches.append({
+                        "ticket_id": ticket_id,
+                        "title": other_title,
+                        "similarity": round(similarity, 2),
+                        "created_at": created_at,
+                    })
+        matches.sort(key=lambda m: (-m["similarity"], -m["ticket_id"]))
+        return matches[:limit]
+
+    def add(self, ticket):
+        """
+        Agrega un ticket recién insertado (solo si su compañía ya está cargada:
+        si no, entrará con la carga inicial).
+        """
+        company_id = ticket.get("id_company")
+        if ticket.get("ticket_id") is None or ticket.get("status") in FINAL_STATUSES:
+            return
+        shingle_set = shingles(ticket.get("title"), ticket.get("description"))
+        signature = minhash(shingle_set)
+        if signature is None:
+            return
+        created_at = parse_ts(ticket.get("created_at")) or utcnow()
+        index = self._loaded(company_id)
+        if index is None:
+            return
+        with self._lock:
+            index.add(ticket["ticket_id"], shingle_set, signature, created_at, ticket.get("title"))
+            if len(index.docs) > self.max_per_company:
+                index.trim(self.max_per_company, utcnow() - self.window)
+
+    def remove(self, ticket):
+        index = self._loaded(ticket.get("id_company"))
+        if index is None:
+            return
+        with self._lock:
+            index.remove(ticket.get("ticket_id"))
+
+
+duplicate_index = DuplicateIndex()
+
+
+def find_duplicates(company_id, title, description):
+    """
+    Posibles duplicados del ticket que se va a crear ([] si está desactivado
+    o si el índice no se puede cargar).
+    """
+    if not DUPLICATE_CHECK_ENABLED:
+        return []
+    try:
+        return duplicate_index.candidates(company_id, title, description)
+    except Exception as e:
+        print("Error buscando tickets duplicados:", e)
+        return []
+
+
+def index_for_duplicates(ticket):
+    """
+    Llamar después de insertar un ticket.
+    """
+    if DUPLICATE_CHECK_ENABLED and ticket:
+        duplicate_index.add(ticket)
+
+
+@on_ticket_change
+def _ticket_changed(kind, record=None, old=None):
+    # los que se cierran (o borran) dejan de sugerirse; si cambió el texto
+    # de uno abierto se vuelve a indexar
+    if not DUPLICATE_CHECK_ENABLED or kind == "INSERT":
+        return
+    ticket = record if kind != "DELETE" else old
+    if not ticket:
+        return
+    if kind == "DELETE" or ticket.get("status") in FINAL_STATUSES:
+        duplicate_index.remove(ticket)
+    elif old and (old.get("title"), old.get("description")) != (ticket.get("title"), ticket.get("description")):
+        duplicate_index.add(ticket)
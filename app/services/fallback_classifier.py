@@ -0,0 +1,201 @@
+# app/services/fallback_classifier.py
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from app import supabase
+from app.services.reference_cache import reference_cache
+from app.services.text import tokenize
+
+# Tickets históricos usados para entrenar y cada cuánto se reentrena (segundos)
+FALLBACK_TRAINING_ROWS = int(os.getenv("FALLBACK_TRAINING_ROWS", "5000"))
+FALLBACK_RETRAIN_SECONDS = int(os.getenv("FALLBACK_RETRAIN_SECONDS", "21600"))
+# Tras un entrenamiento fallido se reintenta con backoff exponencial desde
+# este valor (segundos), sin pasar de FALLBACK_RETRAIN_SECONDS
+FALLBACK_RETRY_SECONDS = int(os.getenv("FALLBACK_RETRY_SECONDS", "60"))
+_LOAD_CHUNK = 1000
+
+
+class NaiveBayesModel:
+    """
+    Naive Bayes multinomial sobre tokens (suavizado de Laplace).
+    Suficiente para dar una categoría/prioridad razonable sin el modelo remoto.
+    """
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.labels = []
+        self._log_prior = {}
+        self._token_counts = {}
+        self._token_totals = {}
+        self._vocab_size = 0
+
+    def fit(self, documents, labels):
+        doc_counts = Counter()
+        token_counts = defaultdict(Counter)
+        vocab = set()
+
+        for tokens, label in zip(documents, labels):
+            doc_counts[label] += 1
+            token_counts[label].update(tokens)
+            vocab.update(tokens)
+
+        total_docs = sum(doc_counts.values())
+        self.labels = list(doc_counts)
+        self._log_prior = {
+            label: math.log(count / total_docs) for label, count in doc_counts.items()
+        }
+        self._token_counts = dict(token_counts)
+        self._token_totals = {
+            label: sum(counts.values()) for label, counts in token_counts.items()
+        }
+        self._vocab_size = len(vocab) or 1
+        return self
+
+    def predict(self, tokens):
+        """
+        Devuelve (label, confianza) o (None, 0.0) si el modelo está vacío.
+        """
+        if not self.labels:
+            return None, 0.0
+
+        scores = {}
+        for label in self.labels:
+            counts = self._token_counts[label]
+            denominator = self._token_totals[label] + self.alpha * self._vocab_size
+            score = self._log_prior[label]
+            for token in tokens:
+                score += math.log((counts.get(token, 0) + self.alpha) / denominator)
+            scores[label] = score
+
+        best = max(scores, key=scores.get)
+        # softmax para tener una confianza comparable entre tickets
+        top = scores[best]
+        total = sum(math.exp(score - top) for score in scores.values())
+        return best, 1.0 / total
+
+
+class FallbackClassifier:
+    """
+    Clasificador local (categoría y prioridad) entrenado con los tickets
+    históricos. Se usa cuando el servicio de IA no responde a tiempo.
+    """
+
+    def __init__(self, training_rows=FALLBACK_TRAINING_ROWS,
+                 retrain_seconds=FALLBACK_RETRAIN_SECONDS,
+                 retry_seconds=FALLBACK_RETRY_SECONDS):
+        self.training_rows = training_rows
+        self.retrain_seconds = retrain_seconds
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._training = False
+        self._trained_at = None
+        self._failed_at = None
+        self._failures = 0
+        self.category_model = NaiveBayesModel()
+        self.priority_model = NaiveBayesModel()
+
+    def _load_rows(self):
+        rows = []
+        start = 0
+        while start < self.training_rows:
+            end = min(start + _LOAD_CHUNK, self.training_rows) - 1
+            resp = (
+                supabase
+                .table("ticket")
+                .select("title, description, category_id, priority_id")
+                .not_.is_("category_id", "null")
+                .not_.is_("priority_id", "null")
+                .order("created_at", desc=True)
+                .range(start, end)
+                .execute()
+            )
+            chunk = resp.data or []
+            rows.extend(chunk)
+            if len(chunk) < end - start + 1:
+                break
+            start = end + 1
+        return rows
+
+    def train(self, rows):
+        documents = [
+            tokenize(f"{row.get('title') or ''} {row.get('description') or ''}")
+            for row in rows
+        ]
+        self.category_model = NaiveBayesModel().fit(
+            documents, [row["category_id"] for row in rows]
+        )
+        self.priority_model = NaiveBayesModel().fit(
+            documents, [row["priority_id"] for row in rows]
+        )
+        self._trained_at = time.monotonic()
+
+    def _due(self):
+        now = time.monotonic()
+        if self._failed_at is not None:
+            delay = min(self.retry_seconds * 2 ** (self._failures - 1), self.retrain_seconds)
+            if now - self._failed_at < delay:
+                return False
+        return self._trained_at is None or now - self._trained_at >= self.retrain_seconds
+
+    def _train_in_background(self):
+        try:
+            self.train(self._load_rows())
+        except Exception as e:
+            print("Error entrenando clasificador local:", e)
+            with self._lock:
+                self._failed_at = time.monotonic()
+                self._failures += 1
+        else:
+            with self._lock:
+                self._failed_at = None
+                self._failures = 0
+        finally:
+            with self._lock:
+                self._training = False
+
+    def ensure_trained(self):
+        """
+        Lanza el (re)entrenamiento en un hilo si corresponde; no espera.
+        Mientras tanto se sigue usando el modelo anterior (o ninguno).
+        """
+        with self._lock:
+            if self._training or not self._due():
+                return
+            self._training = True
+        threading.Thread(
+            target=self._train_in_background, daemon=True, name="fallback-train"
+        ).start()
+
+    def predict(self, title, description):
+        """
+        Misma forma que la respuesta de /api/predict-ticket, con los IDs ya
+        resueltos y fallback=True. None si todavía no hay modelo entrenado.
+        """
+        self.ensure_trained()
+
+        tokens = tokenize(f"{title} {description}")
+        category_id, category_confidence = self.category_model.predict(tokens)
+        priority_id, priority_confidence = self.priority_model.predict(tokens)
+        if category_id is None or priority_id is None:
+            return None
+
+        return {
+            "category_id": category_id,
+            "priority_id": priority_id,
+            "category_name": reference_cache.category_name(category_id),
+            "priority_name": reference_cache.priority_name(priority_id),
+            "priority_value": priority_id,
+            "confidence": min(category_confidence, priority_confidence),
+            "fallback": True,
+        }
+
+
+fallback_classifier = FallbackClassifier()
+
+
+def init_app(app):
+    app.extensions["fallback_classifier"] = fallback_classifier
+    # entrena al arrancar, antes de que un request lo necesite
+    fallback_classifier.ensure_trained()
@@ -0,0 +1,57 @@
+# app/services/fanout.py
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "16"))
+# Segundos máximos por consulta (desde que se envía)
+FANOUT_TIMEOUT = float(os.getenv("FANOUT_TIMEOUT", "5"))
+
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="fanout")
+
+
+class FanOut:
+    """
+    Ejecuta en paralelo consultas independientes de una misma petición,
+    para que la latencia sea la de la más lenta y no la suma de todas.
+
+        fan = FanOut()
+        fan.submit("metrics", get_company_ticket_metrics, company_id, default=TicketMetrics())
+        fan.submit("name", get_company_name, company_id, default="Sin compañía")
+        results = fan.gather()
+
+    Si una consulta falla o se pasa de su timeout se usa su `default`
+    y el error queda en `fan.errors`; las demás siguen su curso.
+    Las tareas no deben lanzar a su vez otro FanOut (comparten el pool).
+    """
+
+    def __init__(self, timeout=FANOUT_TIMEOUT):
+        self.timeout = timeout
+        self.errors = {}
+        self._tasks = {}
+
+    def submit(self, name, fn, *args, default=None, timeout=None, **kwargs):
+        # Copiar el contexto para que la tarea vea el mismo app/request context
+        ctx = contextvars.copy_context()
+        future = _executor.submit(ctx.run, fn, *args, **kwargs)
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        self._tasks[name] = (future, default, deadline)
+        return future
+
+    def gather(self):
+        results = {}
+        for name, (future, default, deadline) in self._tasks.items():
+            try:
+                results[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeout as e:
+                future.cancel()
+                print(f"Consulta '{name}' excedió su tiempo límite")
+                self.errors[name] = e
+                results[name] = default
+            except Exception as e:
+                print(f"Error en consulta '{name}':", e)
+                self.errors[name] = e
+                results[name] = default
+        self._tasks.clear()
+        return results
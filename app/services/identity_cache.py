@@ -0,0 +1,104 @@
+# app/services/identity_cache.py
+import os
+from app import supabase
+from app.repositories import companies as company_repo
+from app.repositories import users as user_repo
+from app.repositories.base import sql_enabled
+from app.services.lru_cache import TTLCache
+
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "4096"))
+IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", "600"))
+
+# user_id -> username  /  company_id -> nombre a mostrar
+# La app no edita usuarios ni compañías: un cambio hecho por fuera se ve
+# a lo sumo IDENTITY_CACHE_TTL segundos después
+_usernames = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+_company_names = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+
+
+def company_display_name(company, default=None):
+    """
+    Nombre a mostrar de una compañía: comercial si existe, si no el legal.
+    """
+    if not company:
+        return default
+    return company.get("commercialName") or company.get("name") or default
+
+
+# ─────────────────────────────────────
+# Hidratar (login / escrituras)
+# ─────────────────────────────────────
+def remember_username(user_id, username):
+    if user_id and username:
+        _usernames.set(user_id, username)
+
+
+def remember_company(company):
+    """
+    Guarda el nombre de la compañía a partir de una fila de la tabla company.
+    """
+    if not company or not company.get("company_id"):
+        return
+    name = company_display_name(company)
+    if name:
+        _company_names.set(company["company_id"], name)
+
+
+# ─────────────────────────────────────
+# Lecturas (solo van a Supabase si no está en caché)
+# ─────────────────────────────────────
+def get_username(user_id, default=None):
+    if not user_id:
+        return default
+
+    username = _usernames.get(user_id)
+    if username:
+        return username
+
+    try:
+        if sql_enabled():
+            username = user_repo.get_username(user_id)
+        else:
+            resp = (
+                supabase
+                .table("users")
+                .select("username")
+                .eq("username_id", user_id)
+                .single()
+                .execute()
+            )
+            username = (resp.data or {}).get("username")
+    except Exception as e:
+        print("Error obteniendo usuario:", e)
+        return default
+
+    remember_username(user_id, username)
+    return username or default
+
+
+def get_company_name(company_id, default=None):
+    if not company_id:
+        return default
+
+    name = _company_names.get(company_id)
+    if name:
+        return name
+
+    try:
+        if sql_enabled():
+            company = company_repo.get_company(company_id)
+        else:
+            company = (
+                supabase
+                .table("company")
+                .select("company_id, name, commercialName")
+                .eq("company_id", company_id)
+                .single()
+                .execute()
+            ).data
+    except Exception as e:
+        print("Error obteniendo compañía:", e)
+        return default
+
+    remember_company(company)
+    return company_display_name(company, default)
@@ -0,0 +1,331 @@
+# app/services/live_events.py
+import asyncio
+import json
+import os
+import queue
+import threading
+from app.services.reference_cache import reference_cache
+from app.services.tickets_common import FINAL_STATUSES, RESOLVED_STATUSES, parse_ts, utcnow
+
+# Origen de los cambios de tickets que se empujan por SSE:
+#   realtime → una suscripción a Supabase Realtime por proceso; ve los
+#              cambios de todos los workers (por defecto si hay SUPABASE_URL/KEY)
+#   local    → las propias rutas de la app publican al insertar/editar. Solo
+#              llegan los cambios hechos en el mismo proceso: con varios
+#              workers los paneles no ven lo que escriben los demás
+#              (sirve para un solo proceso, pruebas y benchmarks)
+#   off      → sin eventos en vivo
+# Cada stream SSE abierto ocupa un hilo del worker mientras la pestaña esté
+# abierta: dimensionar los hilos (gunicorn --threads) o usar workers gevent.
+LIVE_EVENTS_SOURCE = os.getenv("LIVE_EVENTS_SOURCE", "auto").lower()
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "200"))
+# Tickets que se mandan en un evento de lote (los contadores cuentan todos)
+LIVE_BATCH_MAX_TICKETS = int(os.getenv("LIVE_BATCH_MAX_TICKETS", "50"))
+
+SUMMARY_FIELDS = ("ticket_id", "title", "status", "priority_id", "category_id", "created_at")
+
+ADMIN_CHANNEL = "admin"
+
+# Funciones (kind, record, old) que se llaman con cada cambio de ticket,
+# venga de la propia app o de Realtime (p. ej. índices en memoria)
+CHANGE_LISTENERS = []
+
+
+def on_ticket_change(listener):
+    CHANGE_LISTENERS.append(listener)
+    return listener
+
+
+def _notify_listeners(kind, record=None, old=None):
+    for listener in CHANGE_LISTENERS:
+        try:
+            listener(kind, record, old)
+        except Exception as e:
+            print("Error en listener de cambios de ticket:", e)
+
+
+def company_channel(company_id):
+    return f"company:{company_id}"
+
+
+# ─────────────────────────────────────
+# Broker en memoria
+# ─────────────────────────────────────
+class Subscription:
+    def __init__(self, maxsize=LIVE_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stale = False
+
+    def put(self, event, data):
+        try:
+            self.queue.put_nowait((event, data))
+        except queue.Full:
+            # el navegador va atrasado: que recargue en vez de acumular deltas
+            self.stale = True
+
+
+class EventBroker:
+    """
+    Fan-out de eventos a los navegadores conectados, por canal.
+    """
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription()
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        with self._lock:
+            subscribers = self._channels.get(channel)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event, data)
+        return len(subscribers)
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._channels.get(channel, ()))
+            return sum(len(subs) for subs in self._channels.values())
+
+    def stream(self, channel, heartbeat=LIVE_HEARTBEAT_SECONDS):
+        """
+        Generador de texto text/event-stream para una Response de Flask.
+        """
+        subscription = self.subscribe(channel)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if subscription.stale:
+                    yield format_sse("resync", {})
+                    return
+                try:
+                    event, data = subscription.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    # comentario SSE: mantiene viva la conexión y detecta desconexiones
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            self.unsubscribe(channel, subscription)
+
+
+def format_sse(event, data):
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+broker = EventBroker()
+
+
+# ─────────────────────────────────────
+# Deltas de métricas
+# ─────────────────────────────────────
+def _metric_flags(ticket, now):
+    """
+    A qué contadores del panel del cliente suma este ticket (0/1 cada uno).
+    """
+    if not ticket:
+        return {}
+    status = ticket.get("status")
+    created_at = parse_ts(ticket.get("created_at"))
+    if "sla_breached" in ticket:
+        # bandera que mantiene app/services/sla.py
+        breached = bool(ticket["sla_breached"])
+    else:
+        due = parse_ts(ticket.get("response_due_at"))
+        breached = due is not None and due < now
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "total_tickets": 1,
+        "open_tickets": int(status == "open"),
+        "resolved_tickets": int(status in RESOLVED_STATUSES),
+        "overdue_tickets": int(status not in FINAL_STATUSES and breached),
+        "month_tickets": int(created_at is not None and created_at >= month_start),
+    }
+
+
+def ticket_deltas(kind, record=None, old=None, now=None):
+    """
+    Diferencia en los contadores que produce un INSERT / UPDATE / DELETE.
+    Solo se devuelven los que cambian.
+    """
+    now = now or utcnow()
+    after = _metric_flags(record if kind != "DELETE" else None, now)
+    before = _metric_flags(old if kind != "INSERT" else None, now)
+    if kind == "UPDATE" and not old:
+        # sin old_record (REPLICA IDENTITY por defecto) no sabemos qué cambió
+        return {}
+    deltas = {}
+    for name in set(after) | set(before):
+        delta = after.get(name, 0) - before.get(name, 0)
+        if delta:
+            deltas[name] = delta
+    return deltas
+
+
+def ticket_summary(ticket):
+    summary = {field: ticket.get(field) for field in SUMMARY_FIELDS}
+    summary["category_name"] = reference_cache.category_name(ticket.get("category_id"), "Sin categoría")
+    summary["priority_name"] = reference_cache.priority_name(ticket.get("priority_id"), "N/D")
+    return summary
+
+
+def publish_ticket_change(kind, record=None, old=None):
+    """
+    Empuja el cambio de un ticket al canal de su compañía y al del SysAdmin.
+    """
+    ticket = record if kind != "DELETE" else old
+    if not ticket:
+        return
+    _notify_listeners(kind, record, old)
+    deltas = ticket_deltas(kind, record, old)
+    try:
+        summary = ticket_summary(ticket)
+    except Exception as e:
+        print("Error armando resumen de ticket para SSE:", e)
+        summary = {field: ticket.get(field) for field in SUMMARY_FIELDS}
+
+    company_id = ticket.get("id_company")
+    if company_id is not None:
+        broker.publish(company_channel(company_id), "ticket", {
+            "type": kind, "ticket": summary, "deltas": deltas,
+        })
+    # el panel SysAdmin solo muestra el total de tickets
+    admin_deltas = {"total_tickets": deltas["total_tickets"]} if "total_tickets" in deltas else {}
+    broker.publish(ADMIN_CHANNEL, "ticket", {
+        "type": kind, "ticket": summary, "deltas": admin_deltas,
+    })
+
+
+def publish_ticket_batch(kind, records):
+    """
+    Un solo evento "tickets" por compañía para muchos tickets escritos juntos
+    (importaciones): los deltas suman todos y solo viajan los últimos
+    LIVE_BATCH_MAX_TICKETS resúmenes, así un lote no llena la cola del navegador.
+    """
+    now = utcnow()
+    by_company = {}
+    for record in records:
+        _notify_listeners(kind, record)
+        by_company.setdefault(record.get("id_company"), []).append(record)
+
+    admin_total = 0
+    admin_summaries = []
+    for company_id, tickets in by_company.items():
+        deltas = {}
+        for ticket in tickets:
+            for name, delta in ticket_deltas(kind, ticket, now=now).items():
+                deltas[name] = deltas.get(name, 0) + delta
+        summaries = []
+        for ticket in tickets[-LIVE_BATCH_MAX_TICKETS:]:
+            try:
+                summaries.append(ticket_summary(ticket))
+            except Exception as e:
+                print("Error armando resumen de ticket para SSE:", e)
+                summaries.append({field: ticket.get(field) for field in SUMMARY_FIELDS})
+        if company_id is not None:
+            broker.publish(company_channel(company_id), "tickets", {
+                "type": kind, "tickets": summaries, "deltas": deltas,
+            })
+        admin_total += deltas.get("total_tickets", 0)
+        admin_summaries.extend(summaries)
+
+    broker.publish(ADMIN_CHANNEL, "tickets", {
+        "type": kind,
+        "tickets": admin_summaries[-LIVE_BATCH_MAX_TICKETS:],
+        "deltas": {"total_tickets": admin_total} if admin_total else {},
+    })
+
+
+def tickets_written(kind, records):
+    """
+    Como ticket_written, para un lote de tickets escritos en un solo insert.
+    """
+    if LIVE_EVENTS_SOURCE != "local" or not records:
+        return
+    try:
+        publish_ticket_batch(kind, records)
+    except Exception as e:
+        print("Error publicando eventos de tickets:", e)
+
+
+def ticket_written(kind, record, old=None):
+    """
+    Llamar desde las rutas después de escribir en la tabla ticket.
+    Con LIVE_EVENTS_SOURCE=realtime no hace nada: el evento llega por Realtime.
+    """
+    if LIVE_EVENTS_SOURCE != "local":
+        return
+    try:
+        publish_ticket_change(kind, record, old)
+    except Exception as e:
+        print("Error publicando evento de ticket:", e)
+
+
+# ─────────────────────────────────────
+# Supabase Realtime (una suscripción por proceso)
+# ─────────────────────────────────────
+class RealtimeSubscriber:
+    """
+    Escucha INSERT/UPDATE/DELETE de public.ticket y los reenvía al broker.
+    Corre en un hilo con su propio event loop. Para tener old_record en los
+    UPDATE la tabla necesita REPLICA IDENTITY FULL (ver supabase/migrations).
+    """
+
+    def __init__(self, url, key):
+        self.url = f"{url.rstrip('/')}/realtime/v1"
+        self.key = key
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="live-realtime")
+            self._thread.start()
+
+    def _run(self):
+        try:
+            asyncio.run(self._listen())
+        except Exception as e:
+            print("Suscripción Realtime terminada:", e)
+
+    def _on_change(self, payload):
+        data = payload.get("data") or {}
+        kind = str(data.get("type") or "").split(".")[-1].upper()
+        publish_ticket_change(kind, data.get("record"), data.get("old_record"))
+
+    async def _listen(self):
+        from realtime import AsyncRealtimeClient
+
+        client = AsyncRealtimeClient(self.url, self.key)
+        await client.connect()
+        channel = client.channel("live-tickets")
+        await channel.on_postgres_changes(
+            "*", schema="public", table="ticket", callback=self._on_change
+        ).subscribe()
+        # el cliente escucha en su propia tarea; este hilo solo la mantiene viva
+        await asyncio.Event().wait()
+
+
+def init_app(app, supabase_url=None, supabase_key=None):
+    global LIVE_EVENTS_SOURCE
+    app.extensions["live_events"] = broker
+    if LIVE_EVENTS_SOURCE == "auto":
+        LIVE_EVENTS_SOURCE = "realtime" if supabase_url and supabase_key else "local"
+    if LIVE_EVENTS_SOURCE == "realtime" and supabase_url and supabase_key:
+        subscriber = RealtimeSubscriber(supabase_url, supabase_key)
+        subscriber.start()
+        app.extensions["live_events_realtime"] = subscriber
@@ -0,0 +1,259 @@
+# app/services/metrics.py
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, abort, g, has_request_context, request
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+
+# Exponer /metrics y el header Server-Timing (0 para desactivar)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") != "0"
+# Si se define, /metrics exige "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CALL_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Dependencias medidas por request (nombre en Server-Timing)
+DEPENDENCIES = ("supabase", "sql", "ai", "template")
+
+
+class Histogram:
+    """
+    Histograma acumulativo con etiquetas, en formato de Prometheus.
+    """
+
+    def __init__(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = {key: (list(b), s, c) for key, (b, s, c) in self._series.items()}
+
+        for key, (buckets, total, count) in sorted(series.items()):
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+            for bound, hits in zip(self.buckets, buckets):
+                cumulative += hits
+                le = ",".join(labels + [f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{le}}} {cumulative}")
+            le = ",".join(labels + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{{{le}}} {count}")
+            base = ",".join(labels)
+            lines.append(f"{self.name}_sum{{{base}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Latencia total de la request.",
+    ["endpoint", "method", "status"],
+)
+dependency_duration = Histogram(
+    "dependency_call_duration_seconds",
+    "Duración de cada llamada a una dependencia (supabase, sql, ai, template).",
+    ["endpoint", "dependency"],
+)
+dependency_calls = Histogram(
+    "dependency_calls_per_request",
+    "Número de llamadas a cada dependencia por request.",
+    ["endpoint", "dependency"],
+    buckets=CALL_BUCKETS,
+)
+dependency_time = Histogram(
+    "dependency_time_per_request_seconds",
+    "Tiempo acumulado en cada dependencia por request.",
+    ["endpoint", "dependency"],
+)
+
+REGISTRY = [request_duration, dependency_duration, dependency_calls, dependency_time]
+# Funciones que devuelven líneas extra en formato Prometheus (estado de
+# componentes: circuit breaker de la IA, colas, etc.)
+COLLECTORS = []
+
+
+def register_collector(collector):
+    COLLECTORS.append(collector)
+    return collector
+
+
+class RequestTimings:
+    """
+    Acumulado por request. Puede recibir datos desde los hilos del FanOut
+    (comparten g gracias a copy_context), por eso el lock.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, dependency, seconds):
+        with self._lock:
+            self.totals[dependency] = self.totals.get(dependency, 0.0) + seconds
+            self.counts[dependency] = self.counts.get(dependency, 0) + 1
+
+    def server_timing(self, total):
+        parts = []
+        for dependency in DEPENDENCIES:
+            if dependency in self.counts:
+                parts.append(
+                    f'{dependency};dur={self.totals[dependency] * 1000:.1f};'
+                    f'desc="{self.counts[dependency]} calls"'
+                )
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or "unknown"
+    return "background"
+
+
+def record_dependency(dependency, seconds):
+    """
+    Registra una llamada a una dependencia: histograma global y, si hay
+    request en curso, el acumulado para Server-Timing.
+    """
+    dependency_duration.observe(seconds, endpoint=_endpoint(), dependency=dependency)
+    if has_request_context():
+        timings = g.get("_timings")
+        if timings is not None:
+            timings.add(dependency, seconds)
+
+
+# ─────────────────────────────────────
+# Instrumentación de clientes
+# ─────────────────────────────────────
+def instrument_httpx(client, dependency="supabase"):
+    """
+    Envuelve client.send (httpx) para medir cada request, incluida la
+    lectura del cuerpo.
+    """
+    if getattr(client, "_metrics_instrumented", False):
+        return client
+    send = client.send
+
+    def timed_send(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return send(*args, **kwargs)
+        finally:
+            record_dependency(dependency, time.perf_counter() - started)
+
+    client.send = timed_send
+    client._metrics_instrumented = True
+    return client
+
+
+def instrument_engine(engine, dependency="sql"):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["_query_started"].pop()
+        record_dependency(dependency, time.perf_counter() - started)
+
+
+# ─────────────────────────────────────
+# Flask
+# ─────────────────────────────────────
+def render_metrics():
+    lines = []
+    for histogram in REGISTRY:
+        lines.extend(histogram.render())
+    for collector in COLLECTORS:
+        try:
+            lines.extend(collector())
+        except Exception as e:
+            print("Error en collector de métricas:", e)
+    return "\n".join(lines) + "\n"
+
+
+def metrics_endpoint():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        abort(401)
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app, supabase_client=None, engine=None):
+    if not METRICS_ENABLED:
+        return
+
+    if supabase_client is not None:
+        # Todas las consultas .table()/.rpc() pasan por este cliente httpx
+        instrument_httpx(supabase_client.postgrest.session)
+    if engine is not None:
+        instrument_engine(engine)
+
+    @app.before_request
+    def _start_timings():
+        g._timings = RequestTimings()
+
+    @before_render_template.connect_via(app)
+    def _template_started(sender, template, context, **extra):
+        g._template_started = time.perf_counter()
+
+    @template_rendered.connect_via(app)
+    def _template_done(sender, template, context, **extra):
+        started = g.pop("_template_started", None)
+        if started is not None:
+            record_dependency("template", time.perf_counter() - started)
+
+    @app.after_request
+    def _finish_timings(response):
+        timings = g.pop("_timings", None)
+        if timings is None or request.endpoint == "metrics":
+            return response
+
+        total = time.perf_counter() - timings.started
+        endpoint = request.endpoint or "unknown"
+        request_duration.observe(
+            total, endpoint=endpoint, method=request.method, status=response.status_code
+        )
+        for dependency in DEPENDENCIES:
+            dependency_calls.observe(
+                timings.counts.get(dependency, 0), endpoint=endpoint, dependency=dependency
+            )
+            if dependency in timings.totals:
+                dependency_time.observe(
+                    timings.totals[dependency], endpoint=endpoint, dependency=dependency
+                )
+
+        if SERVER_TIMING_ENABLED:
+            response.headers["Server-Timing"] = timings.server_timing(total)
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint)
@@ -0,0 +1,159 @@
+# app/services/pagination.py
+import base64
+import json
+import os
+from dataclasses import dataclass, field
+from math import ceil
+
+# Modo de conteo para listados: exact | planned | estimated | none
+# ("estimated" usa el planner de Postgres en páginas grandes y es casi gratis)
+TICKETS_COUNT_MODE = os.getenv("TICKETS_COUNT_MODE", "exact").lower()
+
+
+def count_mode():
+    """
+    Valor para el parámetro count= de select() según TICKETS_COUNT_MODE.
+    """
+    if TICKETS_COUNT_MODE in ("exact", "planned", "estimated"):
+        return TICKETS_COUNT_MODE
+    return None
+
+
+# ─────────────────────────────────────
+# Cursores opacos
+# ─────────────────────────────────────
+def encode_cursor(row, direction, sort_key="created_at", tie_key="ticket_id"):
+    raw = json.dumps(
+        {"k": row.get(sort_key), "i": row.get(tie_key), "d": direction},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Devuelve {"k", "i", "d"} o None si el cursor no es válido.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        return None
+    if not isinstance(data, dict) or data.get("d") not in ("next", "prev"):
+        return None
+    if data.get("k") is None or data.get("i") is None:
+        return None
+    return data
+
+
+@dataclass
+class Page:
+    rows: list = field(default_factory=list)
+    page: int = 1
+    per_page: int = 10
+    total: int | None = None
+    has_next: bool = False
+    has_prev: bool = False
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+    @property
+    def total_pages(self):
+        if self.total is not None:
+            return max(ceil(self.total / self.per_page), 1)
+        # sin conteo solo sabemos si hay una página más
+        return self.page + (1 if self.has_next else 0)
+
+
+def paginate(query, page=1, cursor=None, per_page=10,
+             sort_key="created_at", tie_key="ticket_id"):
+    """
+    Pagina una consulta de PostgREST ordenada por (sort_key, tie_key) desc.
+
+    Con cursor se usa paginación por llave (keyset): la página N cuesta lo
+    mismo que la 1. Sin cursor y con page > 1 se hace un salto por offset
+    (para los enlaces numéricos) y se devuelven cursores para seguir desde ahí.
+    """
+    page = max(page or 1, 1)
+    position = decode_cursor(cursor)
+    backwards = bool(position) and position["d"] == "prev"
+
+    if position:
+        op = "gt" if backwards else "lt"
+        key = json.dumps(str(position["k"]))  # entre comillas por ':' y '+'
+        tie = position["i"]
+        query = query.or_(
+            f"{sort_key}.{op}.{key},and({sort_key}.eq.{key},{tie_key}.{op}.{tie})"
+        )
+
+    query = (
+        query
+        .order(sort_key, desc=not backwards)
+        .order(tie_key, desc=not backwards)
+    )
+
+    if position or page == 1:
+        resp = query.limit(per_page + 1).execute()
+    else:
+        start = (page - 1) * per_page
+        resp = query.range(start, start + per_page).execute()
+
+    return build_page(
+        resp.data or [], page, per_page, resp.count, position, sort_key, tie_key
+    )
+
+
+def build_page(rows, page, per_page, total, position=None,
+               sort_key="created_at", tie_key="ticket_id"):
+    """
+    Arma el Page a partir de per_page + 1 filas traídas en el orden de la
+    consulta (invertido si el cursor es "prev").
+    Lo comparten el backend PostgREST y los repositorios SQL.
+    """
+    backwards = bool(position) and position["d"] == "prev"
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, bool(position) or page > 1
+
+    result = Page(
+        rows=rows,
+        page=page,
+        per_page=per_page,
+        total=total,
+        has_next=has_next and bool(rows),
+        has_prev=has_prev and bool(rows),
+    )
+    if rows:
+        if result.has_next:
+            result.next_cursor = encode_cursor(rows[-1], "next", sort_key, tie_key)
+        if result.has_prev:
+            result.prev_cursor = encode_cursor(rows[0], "prev", sort_key, tie_key)
+    return result
+
+
+def offset_paginate(query, page=1, per_page=10):
+    """
+    Paginación por offset para listados con orden elegido por el usuario
+    (donde no aplica el keyset). La consulta ya debe venir ordenada.
+    """
+    page = max(page or 1, 1)
+    start = (page - 1) * per_page
+    resp = query.range(start, start + per_page).execute()
+
+    rows = resp.data or []
+    return Page(
+        rows=rows[:per_page],
+        page=page,
+        per_page=per_page,
+        total=resp.count,
+        has_next=len(rows) > per_page,
+        has_prev=page > 1,
+    )
@@ -0,0 +1,65 @@
+# app/services/prediction_cache.py
+import hashlib
+import os
+import threading
+from app.services.lru_cache import TTLCache
+from app.services.text import normalize_text
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "5000"))
+PREDICTION_CACHE_TTL = int(os.getenv("PREDICTION_CACHE_TTL", "86400"))
+# Versión del modelo desplegado; si el servicio la devuelve en la respuesta
+# (campo model_version) se toma de ahí.
+AI_MODEL_VERSION = os.getenv("AI_MODEL_VERSION", "")
+
+
+def prediction_key(title, description):
+    """
+    Hash de título + descripción normalizados: "No hay  Internet" y
+    "no hay internet" comparten la misma entrada.
+    """
+    text = f"{normalize_text(title)}\n{normalize_text(description)}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """
+    Caché de predicciones de la IA, acotada (LRU) y con TTL.
+    Las llaves incluyen la versión del modelo: al cambiar el modelo
+    las entradas anteriores se descartan.
+    """
+
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL,
+                 model_version=AI_MODEL_VERSION):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.model_version = model_version
+
+    def set_model_version(self, version):
+        with self._lock:
+            if version == self.model_version:
+                return
+            self.model_version = version
+        self._cache.clear()
+
+    def get(self, title, description):
+        key = (self.model_version, prediction_key(title, description))
+        prediction = self._cache.get(key)
+        return dict(prediction) if prediction else None
+
+    def set(self, title, description, prediction):
+        version = prediction.get("model_version")
+        if version and str(version) != self.model_version:
+            self.set_model_version(str(version))
+        key = (self.model_version, prediction_key(title, description))
+        self._cache.set(key, dict(prediction))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats["model_version"] = self.model_version
+        return stats
+
+
+prediction_cache = PredictionCache()
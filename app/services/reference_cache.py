@@ -0,0 +1,139 @@
+# app/services/reference_cache.py
+import os
+import threading
+import time
+from app import supabase
+from app.repositories import reference as reference_repo
+from app.repositories.base import sql_enabled
+from app.services.text import normalize_text
+
+# Segundos que se mantienen en memoria las tablas category / priority
+REFERENCE_CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", "3600"))
+
+
+class ReferenceCache:
+    """
+    Caché en proceso de las tablas de referencia (category y priority).
+    Se carga una sola vez, expira por TTL y se puede invalidar a mano
+    cuando alguien escribe en esas tablas.
+    """
+
+    def __init__(self, ttl=REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self._categories = []
+        self._priorities = []
+        self._category_by_id = {}
+        self._category_id_by_name = {}
+        self._priority_by_id = {}
+        self._priority_id_by_name = {}
+
+    # ─────────────────────────────────────
+    # Carga / invalidación
+    # ─────────────────────────────────────
+    def _load(self):
+        if sql_enabled():
+            categories = reference_repo.categories()
+            priorities = reference_repo.priorities()
+        else:
+            categories = (
+                supabase.table("category").select("*").order("sort_order").execute().data or []
+            )
+            priorities = (
+                supabase.table("priority").select("*").order("sort_order").execute().data or []
+            )
+
+        category_by_id = {}
+        category_id_by_name = {}
+        for row in categories:
+            category_by_id[row["category_id"]] = row
+            category_id_by_name[normalize_text(row.get("name"))] = row["category_id"]
+
+        priority_by_id = {}
+        priority_id_by_name = {}
+        for row in priorities:
+            priority_by_id[row["priority_id"]] = row
+            # El modelo devuelve "Baja", "Media"...; la tabla puede tenerlo en name o code
+            for key in ("name", "code"):
+                if row.get(key):
+                    priority_id_by_name[normalize_text(row[key])] = row["priority_id"]
+
+        self._categories = categories
+        self._priorities = priorities
+        self._category_by_id = category_by_id
+        self._category_id_by_name = category_id_by_name
+        self._priority_by_id = priority_by_id
+        self._priority_id_by_name = priority_id_by_name
+        self._expires_at = time.monotonic() + self.ttl
+
+    def _ensure_loaded(self):
+        if time.monotonic() < self._expires_at:
+            return
+        with self._lock:
+            if time.monotonic() < self._expires_at:
+                return
+            try:
+                self._load()
+            except Exception as e:
+                # Si falla, seguimos con lo que haya (aunque esté vencido)
+                # y se reintenta en la siguiente llamada.
+                print("Error cargando tablas de referencia:", e)
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0.0
+
+    # ─────────────────────────────────────
+    # Consultas
+    # ─────────────────────────────────────
+    def categories(self):
+        self._ensure_loaded()
+        return list(self._categories)
+
+    def priorities(self):
+        self._ensure_loaded()
+        return list(self._priorities)
+
+    def category_name(self, category_id, default=None):
+        self._ensure_loaded()
+        row = self._category_by_id.get(category_id)
+        return row.get("name", default) if row else default
+
+    def category_id(self, name):
+        self._ensure_loaded()
+        return self._category_id_by_name.get(normalize_text(name))
+
+    def priority(self, priority_id):
+        self._ensure_loaded()
+        return self._priority_by_id.get(priority_id)
+
+    def priority_name(self, priority_id, default=None):
+        self._ensure_loaded()
+        row = self._priority_by_id.get(priority_id)
+        if not row:
+            return default
+        return row.get("name") or row.get("code") or default
+
+    def priority_id(self, name):
+        self._ensure_loaded()
+        return self._priority_id_by_name.get(normalize_text(name))
+
+    def priority_ids_at_least(self, name):
+        """
+        IDs de la prioridad `name` y de las más urgentes (sort_order mayor o
+        igual; sin sort_order, priority_id mayor o igual).
+        """
+        self._ensure_loaded()
+        base = self._priority_by_id.get(self._priority_id_by_name.get(normalize_text(name)))
+        if not base:
+            return []
+        key = "sort_order" if base.get("sort_order") is not None else "priority_id"
+        return sorted(
+            priority_id for priority_id, row in self._priority_by_id.items()
+            if row.get(key) is not None and row[key] >= base[key]
+        )
+
+
+# Instancia compartida por todos los blueprints
+reference_cache = ReferenceCache()
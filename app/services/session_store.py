@@ -0,0 +1,120 @@
+# app/services/session_store.py
+import threading
+from datetime import datetime
+from sqlalchemy import (
+    Column, DateTime, LargeBinary, MetaData, String, Table, create_engine,
+    delete, select, update,
+)
+from sqlalchemy.exc import IntegrityError
+from flask_session.base import ServerSideSession, ServerSideSessionInterface
+
+metadata = MetaData()
+
+sessions_table = Table(
+    "flask_sessions",
+    metadata,
+    Column("session_id", String(255), primary_key=True),
+    Column("data", LargeBinary, nullable=False),
+    Column("expiry", DateTime, nullable=False, index=True),
+)
+
+
+class SqlSession(ServerSideSession):
+    pass
+
+
+class SqlSessionInterface(ServerSideSessionInterface):
+    """
+    Sesiones del lado del servidor en una tabla SQL (SQLite o Postgres),
+    usando SQLAlchemy Core directamente (sin Flask-SQLAlchemy).
+    La lectura es por llave primaria y las sesiones vencidas se borran
+    con un barrido periódico en segundo plano.
+    """
+
+    session_class = SqlSession
+    ttl = False
+
+    def __init__(self, app, database_url, sweep_interval=300, **kwargs):
+        connect_args = {}
+        if database_url.startswith("sqlite"):
+            connect_args["check_same_thread"] = False
+
+        self.engine = create_engine(
+            database_url, pool_pre_ping=True, connect_args=connect_args
+        )
+        metadata.create_all(self.engine, checkfirst=True)
+        self.sweep_interval = sweep_interval
+        self._stop = threading.Event()
+
+        super().__init__(app, **kwargs)
+
+        if sweep_interval:
+            threading.Thread(
+                target=self._sweep_loop, name="session-sweeper", daemon=True
+            ).start()
+
+    # ─────────────────────────────────────
+    # Barrido de sesiones vencidas
+    # ─────────────────────────────────────
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self._delete_expired_sessions()
+            except Exception as e:
+                print("Error limpiando sesiones vencidas:", e)
+
+    def stop(self):
+        self._stop.set()
+
+    def _delete_expired_sessions(self):
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(sessions_table).where(sessions_table.c.expiry <= datetime.utcnow())
+            )
+
+    # ─────────────────────────────────────
+    # Almacenamiento
+    # ─────────────────────────────────────
+    def _retrieve_session_data(self, store_id):
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(sessions_table.c.data, sessions_table.c.expiry)
+                .where(sessions_table.c.session_id == store_id)
+            ).first()
+
+        if row is None:
+            return None
+        if row.expiry <= datetime.utcnow():
+            self._delete_session(store_id)
+            return None
+        return self.serializer.decode(bytes(row.data))
+
+    def _delete_session(self, store_id):
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(sessions_table).where(sessions_table.c.session_id == store_id)
+            )
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        values = {
+            "data": self.serializer.encode(session),
+            "expiry": datetime.utcnow() + session_lifetime,
+        }
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(sessions_table)
+                .where(sessions_table.c.session_id == store_id)
+                .values(**values)
+            )
+            if result.rowcount:
+                return
+            try:
+                with conn.begin_nested():
+                    conn.execute(sessions_table.insert().values(session_id=store_id, **values))
+            except IntegrityError:
+                # otra petición la creó al mismo tiempo
+                conn.execute(
+                    update(sessions_table)
+                    .where(sessions_table.c.session_id == store_id)
+                    .values(**values)
+                )
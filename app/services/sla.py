@@ -0,0 +1,274 @@
+# app/services/sla.py
+import heapq
+import os
+import threading
+import time
+from datetime import timedelta
+from app import supabase
+from app.services.live_events import ticket_written
+from app.services.reference_cache import reference_cache
+from app.services.text import normalize_text
+from app.services.tickets_common import FINAL_STATUSES, parse_ts, utcnow
+
+# Background scheduler que marca sla_breached al vencer response_due_at.
+# Es trabajo de toda la base: va en un solo proceso (worker.py), no en
+# cada worker web
+SLA_SCHEDULER_ENABLED = os.getenv("SLA_SCHEDULER_ENABLED", "0") == "1"
+# Cada cuánto se recarga el heap desde la base (tickets creados por otros procesos)
+SLA_RELOAD_SECONDS = float(os.getenv("SLA_RELOAD_SECONDS", "300"))
+# Tickets pendientes que se mantienen en memoria (los que vencen antes)
+SLA_HEAP_MAX = int(os.getenv("SLA_HEAP_MAX", "20000"))
+
+# Horas de respuesta / resolución por prioridad si la tabla priority no
+# trae response_hours / resolution_hours
+DEFAULT_SLA_HOURS = {
+    "urgente": (1, 8),
+    "urgent": (1, 8),
+    "alta": (4, 24),
+    "high": (4, 24),
+    "media": (8, 72),
+    "medium": (8, 72),
+    "baja": (24, 120),
+    "low": (24, 120),
+}
+FALLBACK_SLA_HOURS = (24, 120)
+
+_LOAD_CHUNK = 1000
+
+
+# ─────────────────────────────────────
+# Políticas
+# ─────────────────────────────────────
+def sla_hours(priority_id):
+    """
+    (horas de respuesta, horas de resolución) para la prioridad.
+    """
+    row = reference_cache.priority(priority_id) or {}
+    response = row.get("response_hours")
+    resolution = row.get("resolution_hours")
+    if response and resolution:
+        return float(response), float(resolution)
+
+    for key in ("code", "name"):
+        hours = DEFAULT_SLA_HOURS.get(normalize_text(row.get(key)))
+        if hours:
+            return hours
+    return FALLBACK_SLA_HOURS
+
+
+def sla_due_times(priority_id, created_at=None):
+    """
+    {"response_due_at", "resolution_due_at"} contados desde created_at.
+    """
+    start = parse_ts(created_at) or utcnow()
+    response, resolution = sla_hours(priority_id)
+    return {
+        "response_due_at": (start + timedelta(hours=response)).isoformat(),
+        "resolution_due_at": (start + timedelta(hours=resolution)).isoformat(),
+    }
+
+
+def apply_sla(payload, now=None):
+    """
+    Completa response_due_at / resolution_due_at del payload de un ticket
+    nuevo según su prioridad. Devuelve el mismo payload.
+    """
+    if payload.get("response_due_at") and payload.get("resolution_due_at"):
+        return payload
+    due = sla_due_times(payload.get("priority_id"), payload.get("created_at") or now)
+    for key, value in due.items():
+        payload.setdefault(key, value)
+    payload.setdefault("sla_breached", False)
+    return payload
+
+
+# ─────────────────────────────────────
+# Scheduler de vencimientos
+# ─────────────────────────────────────
+class SlaScheduler:
+    """
+    Min-heap de (response_due_at, ticket_id) de los tickets abiertos aún
+    dentro de SLA. Un hilo duerme hasta el próximo vencimiento y marca
+    sla_breached en la base, así el panel solo lee la bandera (índice
+    parcial) en vez de comparar fechas en cada vista.
+    """
+
+    def __init__(self, reload_seconds=SLA_RELOAD_SECONDS, heap_max=SLA_HEAP_MAX):
+        self.reload_seconds = reload_seconds
+        self.heap_max = heap_max
+        self._heap = []
+        self._due = {}  # ticket_id -> vencimiento vigente (las entradas viejas se saltan)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._last_reload = None
+        self.breached_total = 0
+
+    # -- API --------------------------------------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="sla-scheduler")
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def track(self, ticket):
+        """
+        Agrega un ticket recién creado al heap (si está en SLA y abierto),
+        o lo reprograma si cambió su vencimiento.
+        """
+        if not ticket or ticket.get("ticket_id") is None:
+            return
+        if ticket.get("sla_breached") or ticket.get("status") in FINAL_STATUSES:
+            return
+        due = parse_ts(ticket.get("response_due_at"))
+        if due is None:
+            return
+        with self._cond:
+            if self._due.get(ticket["ticket_id"]) == due:
+                return
+            heapq.heappush(self._heap, (due, ticket["ticket_id"]))
+            self._due[ticket["ticket_id"]] = due
+            # si es el nuevo mínimo hay que despertar al hilo antes
+            if self._heap[0][1] == ticket["ticket_id"]:
+                self._cond.notify()
+
+    def next_due(self):
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def pending(self):
+        with self._cond:
+            return len(self._due)
+
+    # -- Hilo -------------------------------------------------------
+    def _run(self):
+        while True:
+            try:
+                if self._needs_reload():
+                    self.reload()
+                due_ids = self._wait_for_due()
+                if due_ids is None:
+                    return
+                if due_ids:
+                    self._flag(due_ids)
+            except Exception as e:
+                print("Error en scheduler de SLA:", e)
+                time.sleep(5)
+
+    def _needs_reload(self):
+        return (
+            self._last_reload is None
+            or time.monotonic() - self._last_reload >= self.reload_seconds
+        )
+
+    def _wait_for_due(self):
+        """
+        Duerme hasta el próximo vencimiento (o la próxima recarga) y
+        devuelve los IDs vencidos.
+        """
+        with self._cond:
+            while not self._stopped:
+                now = utcnow()
+                due_ids = []
+                while self._heap and self._heap[0][0] <= now:
+                    due, ticket_id = heapq.heappop(self._heap)
+                    if self._due.get(ticket_id) != due:
+                        continue  # reprogramado
+                    del self._due[ticket_id]
+                    due_ids.append(ticket_id)
+                if due_ids:
+                    return due_ids
+
+                until_reload = self.reload_seconds - (time.monotonic() - self._last_reload)
+                if until_reload <= 0:
+                    return []
+                timeout = until_reload
+                if self._heap:
+                    timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+                self._cond.wait(timeout=max(timeout, 0.05))
+            return None
+
+    def reload(self):
+        """
+        Reconstruye el heap con los tickets abiertos aún dentro de SLA,
+        ordenados por vencimiento. Primero marca los que ya vencieron
+        (p. ej. mientras la app estuvo apagada).
+        """
+        now = utcnow()
+        self._flag_overdue_before(now)
+
+        entries = []
+        start = 0
+        while len(entries) < self.heap_max:
+            end = min(start + _LOAD_CHUNK, self.heap_max) - 1
+            resp = (
+                supabase
+                .table("ticket")
+                .select("ticket_id, response_due_at")
+                .eq("sla_breached", False)
+                .not_.in_("status", FINAL_STATUSES)
+                .not_.is_("response_due_at", "null")
+                .order("response_due_at")
+                .range(start, end)
+                .execute()
+            )
+            rows = resp.data or []
+            for row in rows:
+                due = parse_ts(row.get("response_due_at"))
+                if due is not None:
+                    entries.append((due, row["ticket_id"]))
+            if len(rows) < end - start + 1:
+                break
+            start = end + 1
+
+        heapq.heapify(entries)
+        with self._cond:
+            self._heap = entries
+            self._due = {ticket_id: due for due, ticket_id in entries}
+            self._last_reload = time.monotonic()
+            self._cond.notify()
+
+    def _flag_overdue_before(self, now):
+        try:
+            resp = supabase.rpc("flag_sla_breaches", {"p_now": now.isoformat()}).execute()
+            self.breached_total += int(resp.data or 0)
+        except Exception as e:
+            print("RPC flag_sla_breaches no disponible:", e)
+
+    def _flag(self, ticket_ids):
+        """
+        Marca como fuera de SLA los tickets vencidos que siguen abiertos.
+        """
+        resp = (
+            supabase
+            .table("ticket")
+            .update({"sla_breached": True, "sla_breached_at": utcnow().isoformat()})
+            .in_("ticket_id", ticket_ids)
+            .eq("sla_breached", False)
+            .not_.in_("status", FINAL_STATUSES)
+            .execute()
+        )
+        for ticket in resp.data or []:
+            self.breached_total += 1
+            ticket_written("UPDATE", ticket, {**ticket, "sla_breached": False})
+
+
+sla_scheduler = SlaScheduler()
+
+
+def track_ticket(ticket):
+    """
+    Llamar después de insertar un ticket con apply_sla.
+    """
+    if SLA_SCHEDULER_ENABLED:
+        sla_scheduler.track(ticket)
+
+
+def init_app(app):
+    app.extensions["sla_scheduler"] = sla_scheduler
+    if SLA_SCHEDULER_ENABLED:
+        sla_scheduler.start()
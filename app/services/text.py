@@ -0,0 +1,49 @@
+# app/services/text.py
+import re
+import unicodedata
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Palabras vacías más comunes en español (no aportan a búsquedas ni similitud)
+SPANISH_STOPWORDS = frozenset("""
+a al algo como con de del el ella ellos en era es esta este esto ha hay la las
+le les lo los mas me mi mis muy no nos o para pero por que se si sin sobre su
+sus te tu un una uno unos unas y ya yo
+""".split())
+
+
+def fold_accents(value):
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def normalize_text(value):
+    """
+    Minúsculas, sin acentos y con espacios colapsados
+    ("  Impresora  NO imprimé " -> "impresora no imprime").
+    """
+    return " ".join(fold_accents(value).casefold().split())
+
+
+def light_stem(word):
+    """
+    Stemming muy ligero para español: quita plurales simples
+    (impresoras -> impresora, redes -> red).
+    """
+    if len(word) > 4 and word.endswith("es"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def tokenize(value, stem=True):
+    """
+    Tokens normalizados sin palabras vacías.
+    """
+    tokens = []
+    for word in _WORD_RE.findall(normalize_text(value)):
+        if word in SPANISH_STOPWORDS:
+            continue
+        tokens.append(light_stem(word) if stem else word)
+    return tokens
@@ -0,0 +1,80 @@
+# app/services/ticket_classifier.py
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from app.services.ai_client import AI_POOL_SIZE, PredictionError, predict_ticket
+from app.services.fallback_classifier import fallback_classifier
+from app.services.reference_cache import reference_cache
+
+# Segundos máximos que un request espera al modelo remoto antes de
+# clasificar con el modelo local
+AI_LATENCY_BUDGET = float(os.getenv("AI_LATENCY_BUDGET", "3"))
+
+_executor = ThreadPoolExecutor(max_workers=AI_POOL_SIZE, thread_name_prefix="ai-predict")
+
+
+def _submit(title, description):
+    # con el contexto del request para que la latencia de la IA
+    # cuente en sus métricas
+    ctx = contextvars.copy_context()
+    return _executor.submit(ctx.run, predict_ticket, title, description)
+
+
+def _resolve(future, title, description, budget, deadline):
+    # La llamada remota sigue en segundo plano aunque se agote el presupuesto:
+    # si termina, su resultado queda en la caché de predicciones.
+    try:
+        prediction = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        prediction.setdefault("fallback", False)
+        return prediction
+    except FutureTimeout:
+        print(f"IA sin respuesta en {budget}s, usando clasificador local")
+    except Exception as e:
+        print("API Error:", e)
+
+    return fallback_classifier.predict(title, description)
+
+
+def classify_ticket(title, description, budget=AI_LATENCY_BUDGET):
+    """
+    Clasifica un ticket con el servicio de IA; si falla o excede el
+    presupuesto de latencia usa el clasificador local (fallback=True).
+    Lanza PredictionError si ninguno de los dos puede clasificar.
+    """
+    deadline = time.monotonic() + budget
+    future = _submit(title, description)
+    prediction = _resolve(future, title, description, budget, deadline)
+    if prediction is None:
+        raise PredictionError("Sin servicio de IA ni datos para el clasificador local")
+    return prediction
+
+
+def classify_tickets(items, budget=AI_LATENCY_BUDGET):
+    """
+    Clasifica un lote de (title, description) en paralelo contra la IA.
+    El presupuesto es para el lote completo, no por elemento.
+    Devuelve una predicción por elemento (None si no se pudo clasificar).
+    """
+    deadline = time.monotonic() + budget
+    futures = [_submit(title, description) for title, description in items]
+    return [
+        _resolve(future, title, description, budget, deadline)
+        for (title, description), future in zip(items, futures)
+    ]
+
+
+def prediction_ids(prediction):
+    """
+    (category_id, priority_id) de una predicción: el modelo remoto devuelve
+    nombres y el clasificador local ya devuelve los IDs.
+    """
+    category_id = (
+        prediction.get("category_id")
+        or reference_cache.category_id(prediction.get("category_name"))
+    )
+    priority_id = (
+        prediction.get("priority_id")
+        or reference_cache.priority_id(prediction.get("priority_name"))
+    )
+    return category_id, priority_id
@@ -0,0 +1,239 @@
+# app/services/ticket_import.py
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from app import supabase
+from app.services.ai_client import AI_POOL_SIZE
+from app.services.assignment import assign_ticket, release_ticket
+from app.services.duplicates import index_for_duplicates
+from app.services.live_events import tickets_written
+from app.services.reference_cache import reference_cache
+from app.services.sla import apply_sla, track_ticket
+from app.services.ticket_classifier import classify_tickets
+from app.services.ticket_search import index_ticket
+
+# Filas por insert masivo y filas que se mandan juntas a la IA
+TICKET_IMPORT_CHUNK_SIZE = int(os.getenv("TICKET_IMPORT_CHUNK_SIZE", "500"))
+TICKET_IMPORT_MAX_CHUNK_SIZE = 5000
+TICKET_IMPORT_CLASSIFY_BATCH = int(os.getenv("TICKET_IMPORT_CLASSIFY_BATCH", str(AI_POOL_SIZE)))
+
+VALID_STATUSES = {"open", "in_progress", "on_hold", "resolved", "closed", "cancelled"}
+
+
+class ImportRowError(Exception):
+    """
+    Fila del archivo que no se puede importar.
+    """
+
+
+# ─────────────────────────────────────
+# Lectura incremental del archivo
+# ─────────────────────────────────────
+def iter_raw_rows(stream, filename):
+    """
+    Recorre el archivo fila por fila sin cargarlo completo en memoria.
+    Devuelve (número de línea, dict | ImportRowError).
+    """
+    name = (filename or "").lower()
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if name.endswith((".jsonl", ".ndjson")):
+        for line_no, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, ImportRowError(f"JSON inválido: {e}")
+                continue
+            if not isinstance(row, dict):
+                yield line_no, ImportRowError("Cada línea debe ser un objeto JSON")
+                continue
+            yield line_no, row
+    elif name.endswith(".csv"):
+        reader = csv.DictReader(text)
+        for row in reader:
+            # line_num apunta a la última línea leída (la fila actual)
+            yield reader.line_num, row
+    else:
+        raise ImportRowError("Formato no soportado: usa .csv o .jsonl")
+
+
+def _reference_id(row, id_key, name_key, lookup):
+    value = row.get(id_key)
+    if value in (None, ""):
+        value = row.get(name_key)
+    if value in (None, ""):
+        return None
+    if isinstance(value, int) or str(value).strip().isdigit():
+        return int(value)
+    ref_id = lookup(value)
+    if ref_id is None:
+        raise ImportRowError(f"{name_key} desconocida: {value}")
+    return ref_id
+
+
+def build_payload(row, company_id):
+    """
+    Convierte una fila del archivo en el payload de la tabla ticket.
+    category_id / priority_id pueden quedar en None (se clasifican con IA).
+    """
+    title = str(row.get("title") or "").strip()
+    description = str(row.get("description") or "").strip()
+    if not title or not description:
+        raise ImportRowError("title y description son obligatorios")
+
+    status = str(row.get("status") or "open").strip()
+    if status not in VALID_STATUSES:
+        raise ImportRowError(f"status no válido: {status}")
+
+    return {
+        "id_company": company_id,
+        "assigned_to_staff_user_id": None,
+        "title": title,
+        "description": description,
+        "category_id": _reference_id(row, "category_id", "category", reference_cache.category_id),
+        "priority_id": _reference_id(row, "priority_id", "priority", reference_cache.priority_id),
+        "fallback_classified": False,
+        "status": status,
+        "created_at": row.get("created_at") or datetime.utcnow().isoformat(),
+    }
+
+
+# ─────────────────────────────────────
+# Clasificación e inserción por lotes
+# ─────────────────────────────────────
+def _classify_missing(pending):
+    """
+    Completa category_id / priority_id con la IA, en lotes paralelos.
+    Devuelve la lista de (línea, error) de las filas que no se pudieron clasificar.
+    """
+    missing = [
+        item for item in pending
+        if item[1]["category_id"] is None or item[1]["priority_id"] is None
+    ]
+    errors = []
+
+    for start in range(0, len(missing), TICKET_IMPORT_CLASSIFY_BATCH):
+        batch = missing[start:start + TICKET_IMPORT_CLASSIFY_BATCH]
+        predictions = classify_tickets(
+            [(payload["title"], payload["description"]) for _, payload in batch]
+        )
+        for (line_no, payload), prediction in zip(batch, predictions):
+            if not prediction:
+                errors.append((line_no, "No se pudo clasificar con IA"))
+                continue
+            if payload["category_id"] is None:
+                payload["category_id"] = (
+                    prediction.get("category_id")
+                    or reference_cache.category_id(prediction.get("category_name"))
+                )
+            if payload["priority_id"] is None:
+                payload["priority_id"] = (
+                    prediction.get("priority_id")
+                    or reference_cache.priority_id(prediction.get("priority_name"))
+                )
+            payload["fallback_classified"] = bool(prediction.get("fallback"))
+    return errors
+
+
+def _after_insert(tickets):
+    """
+    Índices en memoria, SLA y un solo evento en vivo para los tickets ya
+    insertados. Un error aquí no deshace ni repite el insert.
+    """
+    for ticket in tickets:
+        try:
+            index_ticket(ticket)
+            index_for_duplicates(ticket)
+            track_ticket(ticket)
+        except Exception as e:
+            print(f"Error indexando ticket importado {ticket.get('ticket_id')}:", e)
+    tickets_written("INSERT", tickets)
+
+
+def _insert_chunk(pending):
+    """
+    Inserta el bloque con un solo insert. Si falla, reintenta fila por fila
+    para saber exactamente cuáles son las que tienen problema.
+    Devuelve (insertados, [(línea, error)]).
+    """
+    if not pending:
+        return 0, []
+
+    try:
+        resp = supabase.table("ticket").insert([payload for _, payload in pending]).execute()
+    except Exception as e:
+        print("Error en insert masivo, reintentando fila por fila:", e)
+    else:
+        _after_insert(resp.data or [])
+        return len(pending), []
+
+    tickets = []
+    errors = []
+    for line_no, payload in pending:
+        try:
+            resp = supabase.table("ticket").insert(payload).execute()
+        except Exception as e:
+            errors.append((line_no, str(e)))
+            continue
+        tickets.extend(resp.data or [])
+    _after_insert(tickets)
+    return len(pending) - len(errors), errors
+
+
+def import_tickets(stream, filename, company_id, chunk_size=TICKET_IMPORT_CHUNK_SIZE):
+    """
+    Importa tickets desde un CSV/JSONL. Es un generador de eventos de
+    progreso (dicts) para poder ir respondiendo mientras se procesa:
+      {"event": "error", "line": n, "error": "..."}
+      {"event": "progress", "processed": n, "inserted": n, "failed": n}
+      {"event": "done", ...}
+    """
+    chunk_size = max(1, min(chunk_size, TICKET_IMPORT_MAX_CHUNK_SIZE))
+    processed = inserted = failed = 0
+    pending = []
+
+    def flush():
+        nonlocal inserted, failed
+        errors = _classify_missing(pending)
+        failed_lines = {line_no for line_no, _ in errors}
+        ready = [item for item in pending if item[0] not in failed_lines]
+        # SLA (según prioridad) y técnico (según categoría), ya clasificados
+        for _, payload in ready:
+            apply_sla(payload)
+            assign_ticket(payload)
+        count, insert_errors = _insert_chunk(ready)
+        errors.extend(insert_errors)
+        not_inserted = {line_no for line_no, _ in insert_errors}
+        for line_no, payload in ready:
+            if line_no in not_inserted:
+                release_ticket(payload)
+
+        inserted += count
+        failed += len(errors)
+        pending.clear()
+        for line_no, error in errors:
+            yield {"event": "error", "line": line_no, "error": error}
+        yield {"event": "progress", "processed": processed, "inserted": inserted, "failed": failed}
+
+    try:
+        for line_no, row in iter_raw_rows(stream, filename):
+            processed += 1
+            try:
+                if isinstance(row, ImportRowError):
+                    raise row
+                pending.append((line_no, build_payload(row, company_id)))
+            except ImportRowError as e:
+                failed += 1
+                yield {"event": "error", "line": line_no, "error": str(e)}
+
+            if len(pending) >= chunk_size:
+                yield from flush()
+    except (ImportRowError, UnicodeDecodeError, csv.Error) as e:
+        yield {"event": "error", "line": None, "error": str(e)}
+
+    yield from flush()
+    yield {"event": "done", "processed": processed, "inserted": inserted, "failed": failed}
@@ -0,0 +1,99 @@
+# app/services/ticket_metrics.py
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from app import supabase
+from app.repositories import tickets as ticket_repo
+from app.repositories.base import sql_enabled
+from app.services.tickets_common import FINAL_STATUSES, RESOLVED_STATUSES
+
+
+@dataclass
+class TicketMetrics:
+    """
+    KPIs de tickets de una compañía (lo que muestra el panel del cliente).
+    """
+    total_tickets: int = 0
+    open_tickets: int = 0
+    resolved_tickets: int = 0
+    overdue_tickets: int = 0
+    month_tickets: int = 0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def _month_start(now):
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _count(query):
+    return query.execute().count or 0
+
+
+def _legacy_metrics(company_id, now):
+    """
+    Respaldo por si la función company_ticket_metrics no está instalada
+    en la base: cinco conteos exactos, como se hacía antes.
+    """
+    def base():
+        return (
+            supabase
+            .table("ticket")
+            .select("ticket_id", count="exact")
+            .eq("id_company", company_id)
+        )
+
+    return TicketMetrics(
+        total_tickets=_count(base()),
+        open_tickets=_count(base().eq("status", "open")),
+        resolved_tickets=_count(base().in_("status", RESOLVED_STATUSES)),
+        overdue_tickets=_count(
+            base()
+            .not_.in_("status", FINAL_STATUSES)
+            .eq("sla_breached", True)
+        ),
+        month_tickets=_count(base().gte("created_at", _month_start(now).isoformat())),
+    )
+
+
+def _from_row(row):
+    row = row or {}
+    return TicketMetrics(
+        total_tickets=row.get("total_tickets") or 0,
+        open_tickets=row.get("open_tickets") or 0,
+        resolved_tickets=row.get("resolved_tickets") or 0,
+        overdue_tickets=row.get("overdue_tickets") or 0,
+        month_tickets=row.get("month_tickets") or 0,
+    )
+
+
+def get_company_ticket_metrics(company_id, now=None):
+    """
+    Devuelve todas las métricas de tickets de la compañía en un solo
+    round trip (RPC a company_ticket_metrics, ver supabase/migrations).
+    """
+    if not company_id:
+        return TicketMetrics()
+
+    now = now or datetime.utcnow()
+
+    if sql_enabled():
+        return _from_row(ticket_repo.company_metrics(company_id, _month_start(now)))
+
+    try:
+        resp = supabase.rpc(
+            "company_ticket_metrics",
+            {
+                "p_company_id": company_id,
+                "p_now": now.isoformat(),
+                "p_month_start": _month_start(now).isoformat(),
+            },
+        ).execute()
+    except Exception as e:
+        print("RPC company_ticket_metrics no disponible, usando conteos:", e)
+        return _legacy_metrics(company_id, now)
+
+    rows = resp.data or []
+    row = rows[0] if isinstance(rows, list) and rows else (rows or {})
+
+    return _from_row(row)
@@ -0,0 +1,310 @@
+# app/services/ticket_search.py
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from markupsafe import Markup, escape
+from app import supabase
+from app.services.pagination import Page
+from app.services.text import light_stem, normalize_text, tokenize
+
+# postgres → RPC search_tickets (tsvector + GIN)
+# local    → índice invertido en memoria (entornos de prueba / sin la migración)
+TICKET_SEARCH_BACKEND = os.getenv("TICKET_SEARCH_BACKEND", "postgres").lower()
+# Si la función search_tickets no existe, cada cuánto se vuelve a probar
+SEARCH_RPC_RETRY_SECONDS = float(os.getenv("SEARCH_RPC_RETRY_SECONDS", "300"))
+# Antigüedad máxima del índice local antes de recargarlo desde la base
+SEARCH_LOCAL_INDEX_TTL = float(os.getenv("SEARCH_LOCAL_INDEX_TTL", "300"))
+
+# Errores de PostgREST / Postgres de "la función no existe"
+RPC_MISSING_CODES = {"PGRST202", "42883"}
+
+# Marcas de resaltado (las mismas que usa la función SQL)
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+TITLE_WEIGHT = 2.0
+SNIPPET_WORDS = 30
+_LOAD_CHUNK = 1000
+_SPLIT_RE = re.compile(r"(\w+)", re.UNICODE)
+
+
+def render_highlight(text):
+    """
+    Escapa el texto y convierte las marcas de resaltado en <mark>.
+    """
+    if not text:
+        return Markup("")
+    html = str(escape(text))
+    return Markup(
+        html.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+class InvertedIndex:
+    """
+    Índice invertido en memoria para la búsqueda de tickets.
+    Misma semántica que websearch_to_tsquery (todas las palabras deben
+    aparecer) y ranking tf-idf con más peso para el título.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._postings = {}  # término -> {ticket_id: peso}
+        self._docs = {}      # ticket_id -> términos del documento
+        self.built_at = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    @property
+    def built(self):
+        return self.built_at is not None
+
+    def _fresh(self, max_age):
+        if self.built_at is None:
+            return False
+        return max_age is None or time.monotonic() - self.built_at < max_age
+
+    def ensure_built(self, load_rows, max_age=None):
+        """
+        Carga el índice con load_rows() (dicts con ticket_id, title,
+        description) si nunca se cargó o si tiene más de max_age segundos.
+        Se arma aparte y se reemplaza de una vez: las búsquedas no esperan
+        a la recarga, y solo un hilo recarga a la vez.
+        """
+        if self._fresh(max_age):
+            return
+        with self._build_lock:
+            if self._fresh(max_age):
+                return
+            fresh = InvertedIndex()
+            for row in load_rows():
+                fresh.add(row["ticket_id"], row.get("title"), row.get("description"))
+            with self._lock:
+                self._postings = fresh._postings
+                self._docs = fresh._docs
+                self.built_at = time.monotonic()
+
+    def add(self, doc_id, title, description):
+        weights = Counter()
+        for term in tokenize(title):
+            weights[term] += TITLE_WEIGHT
+        for term in tokenize(description):
+            weights[term] += 1
+
+        with self._lock:
+            self.remove(doc_id)
+            for term, weight in weights.items():
+                self._postings.setdefault(term, {})[doc_id] = weight
+            self._docs[doc_id] = tuple(weights)
+
+    def remove(self, doc_id):
+        with self._lock:
+            for term in self._docs.pop(doc_id, ()):
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def search(self, query, limit=10, offset=0):
+        """
+        Devuelve (total, [(ticket_id, score), ...]) de la página pedida.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return 0, []
+
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return 0, []
+
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    return 0, []
+
+            total_docs = len(self._docs)
+            scores = []
+            for doc_id in candidates:
+                score = 0.0
+                for posting in postings:
+                    idf = math.log(1 + total_docs / len(posting))
+                    score += (1 + math.log(posting[doc_id])) * idf
+                scores.append((doc_id, score))
+
+        # más relevante primero; a igual score, el más reciente (id mayor)
+        scores.sort(key=lambda item: (-item[1], -item[0]))
+        return len(scores), scores[offset:offset + limit]
+
+
+def highlight_terms(text, query, max_words=None):
+    """
+    Marca las palabras de `text` que coinciden con la búsqueda. Con
+    max_words devuelve solo un fragmento alrededor de la primera coincidencia.
+    """
+    terms = set(tokenize(query))
+    pieces = _SPLIT_RE.split(text or "")
+
+    first_match = None
+    word_positions = []
+    for i, piece in enumerate(pieces):
+        if i % 2 == 0:
+            continue
+        word_positions.append(i)
+        if light_stem(normalize_text(piece)) in terms:
+            pieces[i] = f"{HIGHLIGHT_START}{piece}{HIGHLIGHT_STOP}"
+            if first_match is None:
+                first_match = len(word_positions) - 1
+
+    if max_words and len(word_positions) > max_words:
+        first = max((first_match or 0) - max_words // 3, 0)
+        last = min(first + max_words, len(word_positions)) - 1
+        pieces = pieces[word_positions[first]:word_positions[last] + 1]
+
+    return "".join(pieces)
+
+
+local_index = InvertedIndex()
+
+
+def _load_ticket_texts():
+    start = 0
+    while True:
+        resp = (
+            supabase
+            .table("ticket")
+            .select("ticket_id, title, description")
+            .order("ticket_id")
+            .range(start, start + _LOAD_CHUNK - 1)
+            .execute()
+        )
+        rows = resp.data or []
+        yield from rows
+        if len(rows) < _LOAD_CHUNK:
+            return
+        start += _LOAD_CHUNK
+
+
+def _ensure_local_index():
+    local_index.ensure_built(_load_ticket_texts, max_age=SEARCH_LOCAL_INDEX_TTL)
+
+
+def index_ticket(ticket):
+    """
+    Mantiene el índice local al día cuando se crea o edita un ticket.
+    (Con el backend postgres no hace falta: la columna es generada.)
+    """
+    if ticket and local_index.built and ticket.get("ticket_id") is not None:
+        local_index.add(ticket["ticket_id"], ticket.get("title"), ticket.get("description"))
+
+
+# ─────────────────────────────────────
+# Backends
+# ─────────────────────────────────────
+_rpc_retry_at = 0.0
+
+
+def _rpc_available():
+    return time.monotonic() >= _rpc_retry_at
+
+
+def _rpc_missing(error):
+    """
+    True si la función no está instalada; en ese caso no se vuelve a
+    intentar hasta pasados SEARCH_RPC_RETRY_SECONDS.
+    """
+    global _rpc_retry_at
+    if getattr(error, "code", None) not in RPC_MISSING_CODES:
+        return False
+    _rpc_retry_at = time.monotonic() + SEARCH_RPC_RETRY_SECONDS
+    return True
+
+
+def _search_postgres(q, limit, offset):
+    resp = supabase.rpc(
+        "search_tickets",
+        {"p_query": q, "p_limit": limit, "p_offset": offset},
+    ).execute()
+    rows = resp.data or []
+    total = rows[0].get("total_count", 0) if rows else 0
+    return total, rows
+
+
+def _search_local(q, limit, offset, refresh=True):
+    if refresh:
+        _ensure_local_index()
+    total, scored = local_index.search(q, limit=limit, offset=offset)
+    return total, [{"ticket_id": doc_id, "rank": score} for doc_id, score in scored]
+
+
+def search_tickets(q, columns, page=1, per_page=10):
+    """
+    Busca tickets por título/descripción ordenados por relevancia.
+    `columns` es el select de PostgREST que espera la plantilla (con joins).
+    Cada fila vuelve con title_highlight y description_highlight.
+    """
+    page = max(page or 1, 1)
+    offset = (page - 1) * per_page
+
+    if TICKET_SEARCH_BACKEND == "postgres" and _rpc_available():
+        try:
+            total, hits = _search_postgres(q, per_page, offset)
+        except Exception as e:
+            if _rpc_missing(e):
+                print("RPC search_tickets no instalada, usando índice local:", e)
+                total, hits = _search_local(q, per_page, offset)
+            elif local_index.built:
+                print("Error en RPC search_tickets, usando el índice local que ya hay:", e)
+                total, hits = _search_local(q, per_page, offset, refresh=False)
+            else:
+                # error pasajero: no se carga toda la tabla en memoria por eso
+                raise
+    else:
+        total, hits = _search_local(q, per_page, offset)
+
+    ids = [hit["ticket_id"] for hit in hits]
+    rows_by_id = {}
+    if ids:
+        resp = (
+            supabase
+            .table("ticket")
+            .select(columns)
+            .in_("ticket_id", ids)
+            .execute()
+        )
+        rows_by_id = {row["ticket_id"]: row for row in resp.data or []}
+
+    rows = []
+    for hit in hits:
+        row = rows_by_id.get(hit["ticket_id"])
+        if not row:
+            continue
+        title_hl = hit.get("title_highlight")
+        if title_hl is None:
+            title_hl = highlight_terms(row.get("title"), q)
+        description_hl = hit.get("description_highlight")
+        if description_hl is None:
+            description_hl = highlight_terms(row.get("description"), q, SNIPPET_WORDS)
+
+        row["rank"] = hit.get("rank")
+        row["title_highlight"] = render_highlight(title_hl)
+        row["description_highlight"] = render_highlight(description_hl)
+        rows.append(row)
+
+    return Page(
+        rows=rows,
+        page=page,
+        per_page=per_page,
+        total=total,
+        has_next=offset + len(hits) < total,
+        has_prev=page > 1,
+    )
@@ -0,0 +1,28 @@
+# app/services/tickets_common.py
+from datetime import datetime, timezone
+
+# Estados que cuentan como "resuelto" y estados que ya no aplican para
+# SLA, asignación ni duplicados
+RESOLVED_STATUSES = ["resolved", "closed"]
+FINAL_STATUSES = ["resolved", "closed", "cancelled"]
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def parse_ts(value):
+    """
+    datetime con zona (UTC si no trae) a partir de un timestamp de
+    PostgREST o un datetime; None si está vacío o no se puede leer.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        ts = value
+    else:
+        try:
+            ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
@@ -0,0 +1,120 @@
+# app/services/users.py
+import csv
+import io
+from app import supabase
+from app.repositories import users as user_repo
+from app.repositories.base import sql_enabled
+
+USER_LIST_COLUMNS = "username_id, username, email, role, created_at"
+# Login: solo lo que va a la sesión, con la compañía embebida
+# (company.id_username -> users) para no hacer un segundo round trip
+LOGIN_COLUMNS = (
+    "username_id, username, email, password, role, "
+    "company(company_id, name, commercialName)"
+)
+USER_ROLES = ["sysAdmin", "admin_tech", "admin_cliente", "admin_op"]
+USER_SORT_COLUMNS = ["created_at", "username", "email", "role"]
+EXPORT_CHUNK_SIZE = 1000
+
+
+def users_query(columns=USER_LIST_COLUMNS, role=None, email=None, count=None):
+    """
+    Consulta base de la tabla users con los filtros del listado.
+    """
+    query = supabase.table("users").select(columns, count=count)
+    if role:
+        query = query.eq("role", role)
+    if email:
+        query = query.ilike("email", f"%{email}%")
+    return query
+
+
+def apply_sort(query, sort="created_at", direction="desc"):
+    if sort not in USER_SORT_COLUMNS:
+        sort = "created_at"
+    desc = direction != "asc"
+    # username_id desempata para que el orden entre páginas sea estable
+    return query.order(sort, desc=desc).order("username_id", desc=desc)
+
+
+def get_login_user(email):
+    """
+    Usuario por email con su lista `company` embebida, o None.
+    """
+    if sql_enabled():
+        return user_repo.get_login_user(email)
+
+    try:
+        resp = (
+            supabase
+            .table("users")
+            .select(LOGIN_COLUMNS)
+            .eq("email", email)
+            .limit(1)
+            .execute()
+        )
+    except Exception as e:
+        # sin la relación company.id_username en el esquema: dos consultas
+        print("Embed users→company no disponible, consultando por separado:", e)
+        resp = (
+            supabase
+            .table("users")
+            .select("username_id, username, email, password, role")
+            .eq("email", email)
+            .limit(1)
+            .execute()
+        )
+        if resp.data:
+            user = resp.data[0]
+            user["company"] = (
+                supabase
+                .table("company")
+                .select("company_id, name, commercialName")
+                .eq("id_username", user["username_id"])
+                .limit(1)
+                .execute()
+            ).data or []
+            return user
+        return None
+
+    return resp.data[0] if resp.data else None
+
+
+def iter_users(role=None, email=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Recorre los usuarios por bloques usando keyset sobre username_id,
+    sin cargar la tabla completa en memoria.
+    """
+    if sql_enabled():
+        # cursor del lado del servidor, una sola consulta
+        yield from user_repo.iter_users(role, email, chunk_size)
+        return
+
+    last_id = None
+    while True:
+        query = users_query(role=role, email=email)
+        if last_id is not None:
+            query = query.gt("username_id", last_id)
+        rows = query.order("username_id").limit(chunk_size).execute().data or []
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]["username_id"]
+
+
+def users_csv(role=None, email=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Genera el CSV de usuarios línea por línea (para una respuesta en streaming).
+    """
+    fields = [column.strip() for column in USER_LIST_COLUMNS.split(",")]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+
+    writer.writeheader()
+    for i, user in enumerate(iter_users(role, email, chunk_size), start=1):
+        writer.writerow(user)
+        if i % 100 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,91 @@
+// Actualizaciones en vivo (SSE) para paneles y listados de tickets.
+//
+// <div data-live-url="/client_admin/events">       → abre el EventSource
+// <h4 data-live-counter="open_tickets">             → suma los deltas
+// <tbody data-live-list data-live-limit="5">        → inserta tickets nuevos
+//   con un <template data-live-row> cuyas celdas llevan data-field="..."
+//   y enlaces con data-href="/ruta/__id__"
+(function () {
+  const root = document.querySelector("[data-live-url]");
+  if (!root || !window.EventSource) return;
+
+  const STATUS_LABELS = {
+    open: "Abierto",
+    in_progress: "En progreso",
+    on_hold: "En espera",
+    resolved: "Resuelto",
+    closed: "Cerrado",
+    cancelled: "Cancelado",
+  };
+
+  function applyDeltas(deltas) {
+    Object.entries(deltas || {}).forEach(([name, delta]) => {
+      document.querySelectorAll(`[data-live-counter="${name}"]`).forEach((el) => {
+        el.textContent = (parseInt(el.textContent, 10) || 0) + delta;
+      });
+    });
+  }
+
+  function fillRow(row, ticket) {
+    row.dataset.ticketId = ticket.ticket_id;
+    row.querySelectorAll("[data-field]").forEach((el) => {
+      const field = el.dataset.field;
+      let value = ticket[field];
+      if (field === "status_label") value = STATUS_LABELS[ticket.status] || ticket.status;
+      if (field === "created_date") value = (ticket.created_at || "").slice(0, 10);
+      el.textContent = value == null ? "" : value;
+    });
+    row.querySelectorAll("[data-href]").forEach((el) => {
+      el.setAttribute("href", el.dataset.href.replace("__id__", ticket.ticket_id));
+    });
+  }
+
+  function upsertTicket(kind, ticket) {
+    document.querySelectorAll("[data-live-list]").forEach((list) => {
+      const existing = list.querySelector(`tr[data-ticket-id="${ticket.ticket_id}"]`);
+      if (kind === "DELETE") {
+        if (existing) existing.remove();
+        return;
+      }
+      if (existing) {
+        fillRow(existing, ticket);
+        return;
+      }
+      if (kind !== "INSERT") return;
+
+      const template = list.parentElement.querySelector("template[data-live-row]");
+      if (!template) return;
+      list.querySelectorAll("tr[data-live-empty]").forEach((el) => el.remove());
+      const row = template.content.firstElementChild.cloneNode(true);
+      fillRow(row, ticket);
+      list.prepend(row);
+
+      const limit = parseInt(list.dataset.liveLimit, 10);
+      if (limit) {
+        const rows = list.querySelectorAll("tr[data-ticket-id]");
+        for (let i = limit; i < rows.length; i++) rows[i].remove();
+      }
+    });
+  }
+
+  const source = new EventSource(root.dataset.liveUrl);
+
+  source.addEventListener("ticket", (ev) => {
+    const data = JSON.parse(ev.data);
+    applyDeltas(data.deltas);
+    upsertTicket(data.type, data.ticket);
+  });
+
+  // lote (importaciones): un evento con los contadores sumados
+  source.addEventListener("tickets", (ev) => {
+    const data = JSON.parse(ev.data);
+    applyDeltas(data.deltas);
+    (data.tickets || []).forEach((ticket) => upsertTicket(data.type, ticket));
+  });
+
+  // el servidor descartó eventos (pestaña atrasada): recargar datos completos
+  source.addEventListener("resync", () => {
+    source.close();
+    window.location.reload();
+  });
+})();
@@ -0,0 +1,71 @@
+# bench/fake_ai.py
+"""
+Servicio /api/predict-ticket de mentira con latencia configurable.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.seed import CATEGORIES, PRIORITIES
+
+MODEL_VERSION = "bench-1"
+
+
+class FakeAIHandler(BaseHTTPRequestHandler):
+    latency = 0.2
+    jitter = 0.05
+    error_rate = 0.0
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.rstrip("/") != "/api/predict-ticket":
+            self._send(404, {"detail": "Not Found"})
+            return
+
+        time.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+        if self.error_rate and random.random() < self.error_rate:
+            self._send(503, {"detail": "model overloaded"})
+            return
+
+        # determinista por texto, para que la caché de predicciones se comporte
+        # igual que con el modelo real
+        rng = random.Random(f"{payload.get('title')}|{payload.get('description')}")
+        category = rng.choice(CATEGORIES)
+        priority = rng.choice(PRIORITIES)
+        self._send(200, {
+            "category_name": category["name"],
+            "priority_name": priority["name"],
+            "priority_value": priority["priority_id"],
+            "model_version": MODEL_VERSION,
+        })
+
+
+def start_fake_ai(latency=0.2, jitter=0.05, error_rate=0.0, host="127.0.0.1", port=0):
+    """
+    Levanta el servicio en un hilo. Devuelve (server, url base).
+    """
+    handler = type(
+        "BoundFakeAIHandler",
+        (FakeAIHandler,),
+        {"latency": latency, "jitter": jitter, "error_rate": error_rate},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-ai").start()
+    return server, f"http://{host}:{server.server_address[1]}"
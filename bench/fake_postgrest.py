@@ -0,0 +1,485 @@
+# bench/fake_postgrest.py
+"""
+PostgREST en memoria para los benchmarks.
+
+Implementa el subconjunto de la API que usa la app (select con recursos
+embebidos, filtros eq/neq/gt/gte/lt/lte/in/ilike/is/not, or=(...), order,
+limit/offset, count, .single(), insert/update/delete) y las funciones RPC
+company_ticket_metrics y company_ticket_counts. Las demás RPC responden 404
+(PGRST202) y la app usa su ruta de respaldo, igual que sin las migraciones.
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# tabla -> columna de la llave primaria
+PRIMARY_KEYS = {
+    "ticket": "ticket_id",
+    "company": "company_id",
+    "users": "username_id",
+    "category": "category_id",
+    "priority": "priority_id",
+    "company_users": "company_user_id",
+    "platform_counters": "name",
+    # llave compuesta (username_id, category_id): sin id autoincremental
+    "technician_skill": None,
+}
+
+# (tabla, columna) -> tabla referenciada (por su llave primaria)
+FOREIGN_KEYS = {
+    ("ticket", "priority_id"): "priority",
+    ("ticket", "category_id"): "category",
+    ("ticket", "id_company"): "company",
+    ("ticket", "assigned_to_staff_user_id"): "users",
+    ("company", "id_username"): "users",
+    ("company_users", "company_id"): "company",
+    ("company_users", "username_id"): "users",
+}
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Store:
+    """
+    Tablas como listas de dicts, protegidas por un solo lock.
+    """
+
+    def __init__(self):
+        self.tables = {name: [] for name in PRIMARY_KEYS}
+        self._next_id = {}
+        self.lock = threading.RLock()
+
+    def insert(self, table, row):
+        with self.lock:
+            row = dict(row)
+            key = PRIMARY_KEYS.get(table)
+            if key and row.get(key) is None:
+                next_id = self._next_id.get(table, 1)
+                row[key] = next_id
+                self._next_id[table] = next_id + 1
+            elif key and isinstance(row[key], int):
+                self._next_id[table] = max(self._next_id.get(table, 1), row[key] + 1)
+            row.setdefault("created_at", now_iso())
+            self.tables.setdefault(table, []).append(row)
+            return row
+
+    def rows(self, table):
+        return self.tables.get(table, [])
+
+
+# ─────────────────────────────────────
+# Parsing de la sintaxis de PostgREST
+# ─────────────────────────────────────
+def split_top(text, sep=","):
+    """
+    Divide por `sep` respetando paréntesis y comillas dobles.
+    """
+    parts, depth, quoted, current = [], 0, False, []
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    if current:
+        parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def parse_select(text):
+    """
+    "a, b, alias:fk(c, d)" -> [("a", None, None), ("alias", "fk", [...])]
+    """
+    fields = []
+    for item in split_top(text or "*"):
+        if "(" in item:
+            head, inner = item.split("(", 1)
+            alias, _, source = head.partition(":")
+            if not source:
+                alias, source = head, head
+            fields.append((alias.strip(), source.strip().split("!")[0], parse_select(inner[:-1])))
+        else:
+            alias, _, column = item.partition(":")
+            fields.append((alias.strip(), (column or alias).strip(), None))
+    return fields
+
+
+def coerce(sample, raw):
+    raw = unquote(raw)
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, int):
+        try:
+            return int(raw)
+        except ValueError:
+            return float(raw)
+    if isinstance(sample, float):
+        return float(raw)
+    return raw
+
+
+def like_regex(pattern):
+    pattern = unquote(pattern).replace("*", "%")
+    parts = [re.escape(part) for part in pattern.split("%")]
+    return re.compile("^" + ".*".join(parts) + "$", re.IGNORECASE | re.DOTALL)
+
+
+def _compare(op, value, raw):
+    if op == "is":
+        raw = raw.lower()
+        return value is None if raw == "null" else value is (raw == "true")
+    if op == "in":
+        items = [unquote(item) for item in split_top(raw.strip("()"))]
+        if value is None:
+            return False
+        return any(value == coerce(value, item) for item in items)
+    if value is None:
+        return False
+    if op in ("like", "ilike"):
+        return bool(like_regex(raw).match(str(value)))
+    target = coerce(value, raw)
+    if op == "eq":
+        return value == target
+    if op == "neq":
+        return value != target
+    if op == "gt":
+        return value > target
+    if op == "gte":
+        return value >= target
+    if op == "lt":
+        return value < target
+    if op == "lte":
+        return value <= target
+    raise ValueError(f"operador no soportado: {op}")
+
+
+def parse_condition(column, expr):
+    negate = expr.startswith("not.")
+    if negate:
+        expr = expr[4:]
+    op, _, raw = expr.partition(".")
+
+    def predicate(row):
+        result = _compare(op, row.get(column), raw)
+        return not result if negate else result
+
+    return predicate
+
+
+def parse_logic(expr, mode="or"):
+    """
+    "(a.eq.1,and(b.eq.2,c.lt.3))" -> predicado
+    """
+    predicates = []
+    for item in split_top(expr.strip()[1:-1]):
+        if item.startswith(("and(", "or(")):
+            inner_mode, _, rest = item.partition("(")
+            predicates.append(parse_logic("(" + rest, inner_mode))
+        else:
+            column, _, cond = item.partition(".")
+            predicates.append(parse_condition(column, cond))
+    combine = any if mode == "or" else all
+    return lambda row: combine(p(row) for p in predicates)
+
+
+def sort_rows(rows, order):
+    rows = list(rows)
+    for term in reversed(split_top(order)):
+        column, *flags = term.split(".")
+        desc = "desc" in flags
+        # None al final en asc, al principio en desc (como Postgres)
+        rows.sort(
+            key=lambda row: (row.get(column) is None, row.get(column)),
+            reverse=desc,
+        )
+    return rows
+
+
+# ─────────────────────────────────────
+# Consultas
+# ─────────────────────────────────────
+class PostgrestError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.payload = {"code": code, "message": message, "details": None, "hint": None}
+
+
+def project(store, table, row, fields):
+    result = {}
+    for alias, source, nested in fields:
+        if nested is None:
+            if source == "*":
+                result.update(row)
+            else:
+                result[alias] = row.get(source)
+            continue
+
+        target = FOREIGN_KEYS.get((table, source))
+        if target:
+            # muchos-a-uno: por columna FK (priority:priority_id(...))
+            key = PRIMARY_KEYS[target]
+            match = next((r for r in store.rows(target) if r.get(key) == row.get(source)), None)
+            result[alias] = project(store, target, match, nested) if match else None
+            continue
+
+        forward = [col for (tbl, col), ref in FOREIGN_KEYS.items() if tbl == table and ref == source]
+        if forward:
+            # muchos-a-uno: por nombre de tabla (company(...))
+            key = PRIMARY_KEYS[source]
+            match = next((r for r in store.rows(source) if r.get(key) == row.get(forward[0])), None)
+            result[alias] = project(store, source, match, nested) if match else None
+            continue
+
+        reverse = [col for (tbl, col), ref in FOREIGN_KEYS.items() if tbl == source and ref == table]
+        if reverse:
+            # uno-a-muchos: lista de filas que apuntan a esta
+            key = PRIMARY_KEYS[table]
+            result[alias] = [
+                project(store, source, r, nested)
+                for r in store.rows(source)
+                if r.get(reverse[0]) == row.get(key)
+            ]
+            continue
+
+        raise PostgrestError(400, "PGRST200", f"sin relación entre {table} y {source}")
+    return result
+
+
+def filter_rows(store, table, params):
+    predicates = []
+    for key, value in params:
+        if key in ("select", "order", "limit", "offset", "columns", "on_conflict"):
+            continue
+        if key in ("or", "and"):
+            predicates.append(parse_logic(value, key))
+        else:
+            predicates.append(parse_condition(key, value))
+    return [row for row in store.rows(table) if all(p(row) for p in predicates)]
+
+
+# ─────────────────────────────────────
+# RPC
+# ─────────────────────────────────────
+RESOLVED = ("resolved", "closed")
+FINAL = ("resolved", "closed", "cancelled")
+
+
+def rpc_company_ticket_metrics(store, p_company_id, p_now, p_month_start):
+    tickets = [t for t in store.rows("ticket") if t.get("id_company") == p_company_id]
+    return [{
+        "total_tickets": len(tickets),
+        "open_tickets": sum(t.get("status") == "open" for t in tickets),
+        "resolved_tickets": sum(t.get("status") in RESOLVED for t in tickets),
+        "overdue_tickets": sum(
+            t.get("status") not in FINAL
+            and t.get("sla_breached") is True
+            for t in tickets
+        ),
+        "month_tickets": sum((t.get("created_at") or "") >= p_month_start for t in tickets),
+    }]
+
+
+def rpc_company_ticket_counts(store, p_company_ids):
+    counts = {}
+    for t in store.rows("ticket"):
+        company_id = t.get("id_company")
+        if company_id in p_company_ids:
+            total, opened = counts.get(company_id, (0, 0))
+            counts[company_id] = (total + 1, opened + (t.get("status") == "open"))
+    return [
+        {"company_id": company_id, "total_tickets": total, "open_tickets": opened}
+        for company_id, (total, opened) in counts.items()
+    ]
+
+
+def rpc_flag_sla_breaches(store, p_now):
+    flagged = 0
+    for t in store.rows("ticket"):
+        if (
+            t.get("sla_breached") is False
+            and t.get("status") not in FINAL
+            and t.get("response_due_at") is not None
+            and t["response_due_at"] < p_now
+        ):
+            t["sla_breached"] = True
+            t["sla_breached_at"] = p_now
+            flagged += 1
+    return flagged
+
+
+def rpc_technician_open_loads(store):
+    loads = {}
+    for t in store.rows("ticket"):
+        tech_id = t.get("assigned_to_staff_user_id")
+        if tech_id is not None and t.get("status") not in FINAL:
+            loads[tech_id] = loads.get(tech_id, 0) + 1
+    return [
+        {"username_id": tech_id, "open_tickets": count}
+        for tech_id, count in loads.items()
+    ]
+
+
+def rpc_apply_ticket_classifications(store, p_rows):
+    by_id = {t["ticket_id"]: t for t in store.rows("ticket")}
+    updated = []
+    for row in p_rows:
+        ticket = by_id.get(row["ticket_id"])
+        if ticket is None or not ticket.get("pending_classification"):
+            continue
+        ticket["category_id"] = row.get("category_id")
+        ticket["priority_id"] = row.get("priority_id")
+        # coalesce(nuevo, actual) como la función SQL
+        for key in ("response_due_at", "resolution_due_at", "assigned_to_staff_user_id"):
+            if row.get(key) is not None:
+                ticket[key] = row[key]
+        ticket["pending_classification"] = False
+        updated.append(dict(ticket))
+    return updated
+
+
+RPC_FUNCTIONS = {
+    "company_ticket_metrics": rpc_company_ticket_metrics,
+    "company_ticket_counts": rpc_company_ticket_counts,
+    "flag_sla_breaches": rpc_flag_sla_breaches,
+    "technician_open_loads": rpc_technician_open_loads,
+    "apply_ticket_classifications": rpc_apply_ticket_classifications,
+}
+
+
+# ─────────────────────────────────────
+# Servidor HTTP
+# ─────────────────────────────────────
+class FakePostgrestHandler(BaseHTTPRequestHandler):
+    store = None
+    latency = 0.0
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        data = b"" if body is None else json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        path = parts.path.removeprefix("/rest/v1/").strip("/")
+        return path, params
+
+    def _handle(self):
+        # leer siempre el cuerpo: la conexión es keep-alive
+        self.payload = self._body()
+        if self.latency:
+            time.sleep(self.latency)
+        path, params = self._route()
+        try:
+            if path.startswith("rpc/"):
+                status, body, headers = self._rpc(path[4:])
+            elif path.split("/")[0] not in PRIMARY_KEYS:
+                raise PostgrestError(404, "42P01", f'relation "public.{path}" does not exist')
+            else:
+                status, body, headers = self._table(path, params)
+        except PostgrestError as e:
+            status, body, headers = e.status, e.payload, {}
+        except (ValueError, KeyError, TypeError) as e:
+            status, body, headers = 400, {"code": "PGRST100", "message": str(e)}, {}
+        self._send(status, body, headers)
+
+    def _rpc(self, name):
+        fn = RPC_FUNCTIONS.get(name)
+        if fn is None:
+            raise PostgrestError(404, "PGRST202", f"function public.{name} not found")
+        with self.store.lock:
+            return 200, fn(self.store, **(self.payload or {})), {}
+
+    def _table(self, table, params):
+        store = self.store
+        prefer = self.headers.get("Prefer") or ""
+        single = "vnd.pgrst.object" in (self.headers.get("Accept") or "")
+        args = dict(params)
+
+        with store.lock:
+            if self.command == "POST":
+                body = self.payload
+                rows = [store.insert(table, row) for row in (body if isinstance(body, list) else [body])]
+                return 201, rows, {}
+
+            rows = filter_rows(store, table, params)
+            if self.command == "PATCH":
+                changes = self.payload or {}
+                for row in rows:
+                    row.update(changes)
+                return 200, [dict(row) for row in rows], {}
+            if self.command == "DELETE":
+                store.tables[table] = [row for row in store.rows(table) if row not in rows]
+                return 200, rows, {}
+
+            total = len(rows)
+            if "order" in args:
+                rows = sort_rows(rows, args["order"])
+            offset = int(args.get("offset") or 0)
+            limit = int(args["limit"]) if "limit" in args else None
+            rows = rows[offset:offset + limit if limit is not None else None]
+            fields = parse_select(args.get("select"))
+            body = [project(store, table, row, fields) for row in rows]
+
+        headers = {}
+        if "count=" in prefer:
+            span = f"{offset}-{offset + len(body) - 1}" if body else "*"
+            headers["Content-Range"] = f"{span}/{total}"
+        if single:
+            if len(body) != 1:
+                raise PostgrestError(
+                    406, "PGRST116",
+                    f"JSON object requested, multiple (or no) rows returned ({len(body)})",
+                )
+            body = body[0]
+        return 200, body, headers
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = _handle
+
+
+def start_fake_postgrest(store, latency=0.0, host="127.0.0.1", port=0):
+    """
+    Levanta el servidor en un hilo. Devuelve (server, url base de Supabase).
+    """
+    handler = type(
+        "BoundFakePostgrestHandler",
+        (FakePostgrestHandler,),
+        {"store": store, "latency": latency},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-postgrest").start()
+    return server, f"http://{host}:{server.server_address[1]}"
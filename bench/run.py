@@ -0,0 +1,271 @@
+# bench/run.py
+"""
+Benchmark de la app completa contra un PostgREST en memoria y una IA falsa.
+
+    python -m bench.run --users 16 --duration 15
+    python -m bench.run --scenarios admin_tickets,search --ai-latency-ms 800
+    python -m bench.run --scenarios create_ticket_ai --ai-mode async
+
+Levanta create_app() en un servidor WSGI con hilos, conecta N usuarios
+virtuales por escenario y reporta req/s y latencias p50/p95/p99.
+No necesita Supabase ni el servidor del modelo.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from math import ceil
+
+import requests
+
+from bench.fake_ai import start_fake_ai
+from bench.fake_postgrest import start_fake_postgrest
+from bench.seed import (
+    BENCH_PASSWORD, SYSADMIN_EMAIL, WORDS, build_store, company_admin_email, ticket_text,
+)
+
+
+# ─────────────────────────────────────
+# Escenarios
+# ─────────────────────────────────────
+class VirtualUser:
+    def __init__(self, base_url, email, rng):
+        self.base_url = base_url
+        self.email = email
+        self.rng = rng
+        self.http = requests.Session()
+
+    def get(self, path, **params):
+        return self.http.get(self.base_url + path, params=params, allow_redirects=False)
+
+    def post(self, path, data):
+        return self.http.post(self.base_url + path, data=data, allow_redirects=False)
+
+    def login(self):
+        return self.post("/login", {"email": self.email, "password": BENCH_PASSWORD})
+
+
+def _login(user):
+    # sesión nueva en cada iteración: mide hash de contraseña + consultas del login
+    user.http.cookies.clear()
+    resp = user.login()
+    return resp.ok and "incorrectos" not in resp.text
+
+
+def _client_dashboard(user):
+    return user.get("/client_admin/home").status_code == 200
+
+
+def _company_tickets(user):
+    return user.get("/client_admin/tickets", page=user.rng.randint(1, 5)).status_code == 200
+
+
+def _admin_dashboard(user):
+    return user.get("/admin").status_code == 200
+
+
+def _admin_tickets(user):
+    return user.get("/admin/tickets", page=user.rng.randint(1, 20)).status_code == 200
+
+
+def _admin_users(user):
+    return user.get("/admin/users").status_code == 200
+
+
+def _admin_companies(user):
+    return user.get("/admin/companies").status_code == 200
+
+
+def _search(user):
+    words = user.rng.choice(list(WORDS.values()))
+    q = " ".join(user.rng.sample(words, user.rng.randint(1, 2)))
+    return user.get("/admin/tickets", q=q).status_code == 200
+
+
+def _create_ticket_ai(user):
+    category_id = user.rng.choice(list(WORDS))
+    title, description = ticket_text(user.rng, category_id)
+    # sufijo para que no todas las predicciones salgan de la caché
+    description = f"{description} #{user.rng.randint(0, 10 ** 6)}"
+    resp = user.post("/client_admin/tickets/ia", {"ia_title": title, "ia_description": description})
+    return resp.ok and "Ticket creado" in resp.text
+
+
+# nombre -> (rol, función); la función devuelve True si la respuesta es correcta
+SCENARIOS = {
+    "login": ("admin_cliente", _login),
+    "client_dashboard": ("admin_cliente", _client_dashboard),
+    "company_tickets": ("admin_cliente", _company_tickets),
+    "admin_dashboard": ("sysAdmin", _admin_dashboard),
+    "admin_tickets": ("sysAdmin", _admin_tickets),
+    "admin_users": ("sysAdmin", _admin_users),
+    "admin_companies": ("sysAdmin", _admin_companies),
+    "search": ("sysAdmin", _search),
+    "create_ticket_ai": ("admin_cliente", _create_ticket_ai),
+}
+
+
+# ─────────────────────────────────────
+# Ejecución y reporte
+# ─────────────────────────────────────
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def run_scenario(name, base_url, users, duration, companies, seed=0):
+    role, fn = SCENARIOS[name]
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    deadline = None
+
+    def worker(n):
+        nonlocal errors
+        rng = random.Random(f"{seed}-{name}-{n}")
+        email = SYSADMIN_EMAIL if role == "sysAdmin" else company_admin_email(n % companies)
+        user = VirtualUser(base_url, email, rng)
+        if name != "login":
+            user.login()
+        ready.wait()
+        local, local_errors = [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = fn(user)
+            except requests.RequestException:
+                ok = False
+            local.append(time.perf_counter() - started)
+            local_errors += not ok
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    ready = threading.Event()
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(users)]
+    for thread in threads:
+        thread.start()
+    # todos los usuarios ya hicieron login: arranca el reloj
+    time.sleep(0.2)
+    started = time.perf_counter()
+    deadline = started + duration
+    ready.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def print_report(results):
+    header = f"{'scenario':<18}{'reqs':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<18}{r['requests']:>8}{r['errors']:>8}{r['rps']:>10.1f}"
+            f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}"
+        )
+
+
+def start_app(supabase_url, ai_url, instance_dir, ai_mode="sync"):
+    """
+    Configura el entorno antes de importar app (varios servicios leen
+    variables de entorno al importarse) y sirve create_app() en un hilo.
+    """
+    os.environ.update({
+        "SUPABASE_URL": supabase_url,
+        "SUPABASE_KEY": "bench-anon-key",
+        "TICKETS_IA_API_URL": ai_url,
+        "SESSION_TYPE": "sql",
+        "SESSION_DATABASE_URL": "sqlite:///" + os.path.join(instance_dir, "sessions.db"),
+        "DATA_BACKEND": "supabase",
+        "DATABASE_URL": "",
+        "AI_CLASSIFICATION_MODE": ai_mode,
+        # el PostgREST local no tiene Realtime: eventos publicados por la app
+        "LIVE_EVENTS_SOURCE": "local",
+    })
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import create_app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    app = create_app()
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="bench-app").start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="lista separada por comas (%(default)s)")
+    parser.add_argument("--users", type=int, default=8, help="usuarios concurrentes por escenario")
+    parser.add_argument("--duration", type=float, default=10, help="segundos por escenario")
+    parser.add_argument("--companies", type=int, default=20)
+    parser.add_argument("--tickets-per-company", type=int, default=200)
+    parser.add_argument("--db-latency-ms", type=float, default=5,
+                        help="latencia simulada por request a PostgREST")
+    parser.add_argument("--ai-latency-ms", type=float, default=300)
+    parser.add_argument("--ai-jitter-ms", type=float, default=50)
+    parser.add_argument("--ai-error-rate", type=float, default=0.0)
+    parser.add_argument("--ai-mode", choices=["sync", "async"], default="sync",
+                        help="AI_CLASSIFICATION_MODE de la app")
+    parser.add_argument("--json", dest="json_path", help="guarda los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"escenarios desconocidos: {', '.join(unknown)}")
+
+    store = build_store(args.companies, args.tickets_per_company)
+    _, supabase_url = start_fake_postgrest(store, latency=args.db_latency_ms / 1000)
+    _, ai_url = start_fake_ai(
+        latency=args.ai_latency_ms / 1000,
+        jitter=args.ai_jitter_ms / 1000,
+        error_rate=args.ai_error_rate,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as instance_dir:
+        server, base_url = start_app(supabase_url, ai_url, instance_dir, ai_mode=args.ai_mode)
+        print(
+            f"app {base_url} · {len(store.rows('ticket'))} tickets · "
+            f"{args.users} usuarios · {args.duration:g}s por escenario",
+            file=sys.stderr,
+        )
+        results = []
+        try:
+            for name in names:
+                results.append(
+                    run_scenario(name, base_url, args.users, args.duration, args.companies)
+                )
+        finally:
+            server.shutdown()
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
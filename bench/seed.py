@@ -0,0 +1,133 @@
+# bench/seed.py
+"""
+Datos sintéticos para el PostgREST en memoria.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from werkzeug.security import generate_password_hash
+
+from bench.fake_postgrest import Store
+
+BENCH_PASSWORD = "bench-password"
+SYSADMIN_EMAIL = "sysadmin@bench.local"
+
+CATEGORIES = [
+    {"category_id": 1, "name": "Hardware", "sort_order": 1},
+    {"category_id": 2, "name": "Software", "sort_order": 2},
+    {"category_id": 3, "name": "Redes", "sort_order": 3},
+    {"category_id": 4, "name": "Accesos", "sort_order": 4},
+    {"category_id": 5, "name": "Correo", "sort_order": 5},
+]
+
+PRIORITIES = [
+    {"priority_id": 1, "code": "low", "name": "Baja", "sort_order": 1},
+    {"priority_id": 2, "code": "medium", "name": "Media", "sort_order": 2},
+    {"priority_id": 3, "code": "high", "name": "Alta", "sort_order": 3},
+    {"priority_id": 4, "code": "urgent", "name": "Urgente", "sort_order": 4},
+]
+
+STATUSES = ["open", "open", "open", "pending", "resolved", "closed"]
+
+# Vocabulario por categoría para que búsqueda y clasificador local tengan señal
+WORDS = {
+    1: ["impresora", "monitor", "teclado", "laptop", "disco", "batería", "pantalla"],
+    2: ["instalación", "licencia", "actualización", "error", "aplicación", "sistema"],
+    3: ["internet", "wifi", "vpn", "conexión", "router", "lentitud", "red"],
+    4: ["contraseña", "usuario", "bloqueado", "permisos", "acceso", "cuenta"],
+    5: ["correo", "outlook", "buzón", "adjunto", "spam", "calendario"],
+}
+FILLER = ["no", "funciona", "desde", "ayer", "urgente", "oficina", "favor", "revisar"]
+
+
+def company_admin_email(n):
+    return f"admin{n}@bench.local"
+
+
+def ticket_text(rng, category_id):
+    words = rng.sample(WORDS[category_id], 3) + rng.sample(FILLER, 2)
+    title = " ".join(words[:3]).capitalize()
+    description = " ".join(rng.sample(words, len(words)) + rng.sample(FILLER, 3))
+    return title, description
+
+
+def build_store(companies=20, tickets_per_company=200, seed=42):
+    """
+    Una compañía por admin_cliente, un sysAdmin y algunos técnicos.
+    La contraseña de todos es BENCH_PASSWORD (se hashea una sola vez).
+    """
+    rng = random.Random(seed)
+    store = Store()
+    password = generate_password_hash(BENCH_PASSWORD)
+    now = datetime.now(timezone.utc)
+
+    for row in CATEGORIES:
+        store.insert("category", row)
+    for row in PRIORITIES:
+        store.insert("priority", row)
+
+    store.insert("users", {
+        "username": "sysadmin", "email": SYSADMIN_EMAIL,
+        "password": password, "role": "sysAdmin",
+    })
+    technicians = []
+    for n in range(5):
+        tech = store.insert("users", {
+            "username": f"tecnico{n}", "email": f"tech{n}@bench.local",
+            "password": password, "role": "admin_tech",
+        })
+        technicians.append(tech["username_id"])
+        # los primeros técnicos tienen especialidad; el resto son generales
+        if n < len(CATEGORIES):
+            store.insert("technician_skill", {
+                "username_id": tech["username_id"],
+                "category_id": CATEGORIES[n]["category_id"],
+            })
+
+    for n in range(companies):
+        admin = store.insert("users", {
+            "username": f"admin{n}", "email": company_admin_email(n),
+            "password": password, "role": "admin_cliente",
+        })
+        company = store.insert("company", {
+            "id_username": admin["username_id"],
+            "name": f"Empresa {n} S.A.",
+            "commercialName": f"Empresa {n}",
+            "businessName": "Servicios",
+            "countryCity": "Ciudad",
+            "stateProvince": "Provincia",
+            "phoneNumber": "0000000",
+            "webSite": f"https://empresa{n}.example",
+            "status": True,
+            "created_at": (now - timedelta(days=365 - n)).isoformat(),
+        })
+
+        for _ in range(tickets_per_company):
+            category_id = rng.choice(CATEGORIES)["category_id"]
+            title, description = ticket_text(rng, category_id)
+            created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 180))
+            store.insert("ticket", {
+                "id_company": company["company_id"],
+                "assigned_to_staff_user_id": rng.choice(technicians),
+                "title": title,
+                "description": description,
+                "category_id": category_id,
+                "priority_id": rng.choice(PRIORITIES)["priority_id"],
+                "status": rng.choice(STATUSES),
+                "created_at": created_at.isoformat(),
+                "response_due_at": (created_at + timedelta(hours=24)).isoformat(),
+                "resolution_due_at": (created_at + timedelta(hours=120)).isoformat(),
+                # los vencidos los marca el scheduler de SLA al arrancar la app
+                "sla_breached": False,
+            })
+
+    # En Postgres los mantienen triggers; aquí quedan fijos desde el seed
+    users = store.rows("users")
+    for name, value in (
+        ("tickets", len(store.rows("ticket"))),
+        ("users", len(users)),
+        ("collaborators", sum(u["role"] == "admin_tech" for u in users)),
+        ("companies", len(store.rows("company"))),
+    ):
+        store.insert("platform_counters", {"name": name, "value": value})
+
+    return store
@@ -0,0 +1,33 @@
+-- Métricas de tickets de una compañía en una sola consulta agrupada.
+-- Se invoca vía RPC desde app/services/ticket_metrics.py
+
+create index if not exists ticket_id_company_created_at_idx
+    on public.ticket (id_company, created_at desc);
+
+create or replace function public.company_ticket_metrics(
+    p_company_id  bigint,
+    p_now         timestamptz,
+    p_month_start timestamptz
+)
+returns table (
+    total_tickets    bigint,
+    open_tickets     bigint,
+    resolved_tickets bigint,
+    overdue_tickets  bigint,
+    month_tickets    bigint
+)
+language sql
+stable
+as $$
+    select
+        count(*)                                                       as total_tickets,
+        count(*) filter (where t.status = 'open')                      as open_tickets,
+        count(*) filter (where t.status in ('resolved', 'closed'))     as resolved_tickets,
+        count(*) filter (
+            where t.status not in ('resolved', 'closed', 'cancelled')
+              and t.response_due_at < p_now
+        )                                                              as overdue_tickets,
+        count(*) filter (where t.created_at >= p_month_start)          as month_tickets
+    from public.ticket t
+    where t.id_company = p_company_id;
+$$;
@@ -0,0 +1,71 @@
+-- Búsqueda de texto completo en tickets (título + descripción), en español
+-- y sin distinguir acentos. Se invoca vía RPC desde app/services/ticket_search.py
+
+create extension if not exists unaccent;
+
+do $$
+begin
+    if not exists (select 1 from pg_ts_config where cfgname = 'es_unaccent') then
+        create text search configuration public.es_unaccent (copy = pg_catalog.spanish);
+        alter text search configuration public.es_unaccent
+            alter mapping for hword, hword_part, word
+            with unaccent, spanish_stem;
+    end if;
+end
+$$;
+
+alter table public.ticket
+    add column if not exists search_vector tsvector
+    generated always as (
+        setweight(to_tsvector('public.es_unaccent', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('public.es_unaccent', coalesce(description, '')), 'B')
+    ) stored;
+
+create index if not exists ticket_search_vector_idx
+    on public.ticket using gin (search_vector);
+
+-- Resultados ordenados por relevancia, con fragmentos resaltados.
+-- Los resaltados usan chr(2)/chr(3) como marcas: la app escapa el texto
+-- y luego las convierte en <mark>.
+create or replace function public.search_tickets(
+    p_query  text,
+    p_limit  integer default 10,
+    p_offset integer default 0
+)
+returns table (
+    ticket_id             bigint,
+    rank                  real,
+    title_highlight       text,
+    description_highlight text,
+    total_count           bigint
+)
+language sql
+stable
+as $$
+    with q as (
+        select websearch_to_tsquery('public.es_unaccent', p_query) as query
+    ),
+    ranked as (
+        select
+            t.ticket_id,
+            t.title,
+            t.description,
+            t.created_at,
+            ts_rank_cd(t.search_vector, q.query) as rank,
+            count(*) over ()                     as total_count
+        from public.ticket t, q
+        where t.search_vector @@ q.query
+        order by rank desc, t.created_at desc, t.ticket_id desc
+        limit p_limit offset p_offset
+    )
+    select
+        r.ticket_id,
+        r.rank,
+        ts_headline('public.es_unaccent', coalesce(r.title, ''), q.query,
+                    'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', HighlightAll=true'),
+        ts_headline('public.es_unaccent', coalesce(r.description, ''), q.query,
+                    'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxWords=30, MinWords=10'),
+        r.total_count
+    from ranked r, q
+    order by r.rank desc, r.created_at desc, r.ticket_id desc;
+$$;
@@ -0,0 +1,154 @@
+-- Contadores globales del panel SysAdmin, mantenidos por triggers.
+-- Leerlos es una sola consulta por llave primaria, sin importar el tamaño
+-- de las tablas. Ver app/services/counters.py
+
+create table if not exists public.platform_counters (
+    name       text primary key,
+    value      bigint not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+create or replace function public.bump_platform_counter(p_name text, p_delta bigint)
+returns void
+language sql
+as $$
+    insert into public.platform_counters as c (name, value, updated_at)
+    values (p_name, p_delta, now())
+    on conflict (name) do update
+        set value = c.value + excluded.value,
+            updated_at = now();
+$$;
+
+-- Triggers por sentencia (no por fila) con tablas de transición: un insert
+-- masivo de 500 tickets hace una sola actualización del contador, y los
+-- inserts concurrentes no se serializan fila a fila sobre la misma llave.
+-- Postgres no permite tablas de transición en triggers de varios eventos,
+-- por eso hay uno para altas y otro para bajas.
+
+-- ticket / company: solo altas y bajas
+create or replace function public.platform_counters_insert_trigger()
+returns trigger
+language plpgsql
+as $$
+declare
+    n bigint;
+begin
+    select count(*) into n from new_rows;
+    if n > 0 then
+        perform public.bump_platform_counter(tg_argv[0], n);
+    end if;
+    return null;
+end;
+$$;
+
+create or replace function public.platform_counters_delete_trigger()
+returns trigger
+language plpgsql
+as $$
+declare
+    n bigint;
+begin
+    select count(*) into n from old_rows;
+    if n > 0 then
+        perform public.bump_platform_counter(tg_argv[0], -n);
+    end if;
+    return null;
+end;
+$$;
+
+-- users: además del total, los colaboradores (rol admin_tech)
+create or replace function public.platform_counters_users_trigger()
+returns trigger
+language plpgsql
+as $$
+declare
+    users_delta bigint := 0;
+    collaborators_delta bigint := 0;
+begin
+    if tg_op = 'INSERT' then
+        select count(*), count(*) filter (where role = 'admin_tech')
+        into users_delta, collaborators_delta
+        from new_rows;
+    elsif tg_op = 'DELETE' then
+        select -count(*), -count(*) filter (where role = 'admin_tech')
+        into users_delta, collaborators_delta
+        from old_rows;
+    elsif tg_op = 'UPDATE' then
+        collaborators_delta :=
+            (select count(*) from new_rows where role = 'admin_tech')
+            - (select count(*) from old_rows where role = 'admin_tech');
+    end if;
+
+    if users_delta <> 0 then
+        perform public.bump_platform_counter('users', users_delta);
+    end if;
+    if collaborators_delta <> 0 then
+        perform public.bump_platform_counter('collaborators', collaborators_delta);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists ticket_platform_counters on public.ticket;
+drop trigger if exists ticket_platform_counters_insert on public.ticket;
+create trigger ticket_platform_counters_insert
+    after insert on public.ticket
+    referencing new table as new_rows
+    for each statement execute function public.platform_counters_insert_trigger('tickets');
+
+drop trigger if exists ticket_platform_counters_delete on public.ticket;
+create trigger ticket_platform_counters_delete
+    after delete on public.ticket
+    referencing old table as old_rows
+    for each statement execute function public.platform_counters_delete_trigger('tickets');
+
+drop trigger if exists company_platform_counters on public.company;
+drop trigger if exists company_platform_counters_insert on public.company;
+create trigger company_platform_counters_insert
+    after insert on public.company
+    referencing new table as new_rows
+    for each statement execute function public.platform_counters_insert_trigger('companies');
+
+drop trigger if exists company_platform_counters_delete on public.company;
+create trigger company_platform_counters_delete
+    after delete on public.company
+    referencing old table as old_rows
+    for each statement execute function public.platform_counters_delete_trigger('companies');
+
+drop trigger if exists users_platform_counters on public.users;
+drop trigger if exists users_platform_counters_insert on public.users;
+create trigger users_platform_counters_insert
+    after insert on public.users
+    referencing new table as new_rows
+    for each statement execute function public.platform_counters_users_trigger();
+
+drop trigger if exists users_platform_counters_delete on public.users;
+create trigger users_platform_counters_delete
+    after delete on public.users
+    referencing old table as old_rows
+    for each statement execute function public.platform_counters_users_trigger();
+
+-- sin lista de columnas: no se admite junto con tablas de transición
+drop trigger if exists users_platform_counters_update on public.users;
+create trigger users_platform_counters_update
+    after update on public.users
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function public.platform_counters_users_trigger();
+
+-- Valores iniciales (y para recalcular si algún día se desalinean)
+create or replace function public.rebuild_platform_counters()
+returns void
+language sql
+as $$
+    insert into public.platform_counters (name, value, updated_at)
+    values
+        ('tickets',       (select count(*) from public.ticket),  now()),
+        ('companies',     (select count(*) from public.company), now()),
+        ('users',         (select count(*) from public.users),   now()),
+        ('collaborators', (select count(*) from public.users where role = 'admin_tech'), now())
+    on conflict (name) do update
+        set value = excluded.value,
+            updated_at = now();
+$$;
+
+select public.rebuild_platform_counters();
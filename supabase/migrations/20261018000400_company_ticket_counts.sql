@@ -0,0 +1,20 @@
+-- Tickets abiertos / totales por compañía para una página del listado
+-- de compañías, en una sola consulta agrupada. Ver app/services/companies.py
+
+create or replace function public.company_ticket_counts(p_company_ids bigint[])
+returns table (
+    company_id    bigint,
+    total_tickets bigint,
+    open_tickets  bigint
+)
+language sql
+stable
+as $$
+    select
+        t.id_company                                as company_id,
+        count(*)                                    as total_tickets,
+        count(*) filter (where t.status = 'open')   as open_tickets
+    from public.ticket t
+    where t.id_company = any(p_company_ids)
+    group by t.id_company;
+$$;
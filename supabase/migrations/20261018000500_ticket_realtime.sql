@@ -0,0 +1,20 @@
+-- Cambios de public.ticket para los paneles en vivo (SSE).
+-- Ver app/services/live_events.py (LIVE_EVENTS_SOURCE=realtime).
+
+-- old_record completo en UPDATE/DELETE: necesario para calcular cuánto
+-- cambia cada contador (abiertos, resueltos, fuera de SLA...)
+alter table public.ticket replica identity full;
+
+do $$
+begin
+    if exists (select 1 from pg_publication where pubname = 'supabase_realtime')
+       and not exists (
+           select 1 from pg_publication_tables
+           where pubname = 'supabase_realtime'
+             and schemaname = 'public'
+             and tablename = 'ticket'
+       ) then
+        alter publication supabase_realtime add table public.ticket;
+    end if;
+end;
+$$;
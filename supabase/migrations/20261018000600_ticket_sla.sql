@@ -0,0 +1,101 @@
+-- SLA de tickets: vencimientos calculados al insertar según la prioridad
+-- y bandera sla_breached que marca app/services/sla.py al vencer.
+-- "Fuera de SLA" pasa a ser una lectura de la bandera en vez de comparar
+-- response_due_at contra now() en cada vista del panel.
+
+alter table public.priority
+    add column if not exists response_hours   numeric,
+    add column if not exists resolution_hours numeric;
+
+-- Mismos valores que DEFAULT_SLA_HOURS en app/services/sla.py (por code y
+-- después por name); el resto queda con 24 / 120
+with defaults(key, response_hours, resolution_hours) as (
+    values ('urgente', 1, 8),  ('urgent', 1, 8),
+           ('alta', 4, 24),    ('high', 4, 24),
+           ('media', 8, 72),   ('medium', 8, 72),
+           ('baja', 24, 120),  ('low', 24, 120)
+)
+update public.priority p
+set response_hours = coalesce(
+        p.response_hours,
+        (select d.response_hours from defaults d
+         where d.key in (lower(p.code), lower(p.name))
+         order by d.key = lower(p.code) desc limit 1),
+        24),
+    resolution_hours = coalesce(
+        p.resolution_hours,
+        (select d.resolution_hours from defaults d
+         where d.key in (lower(p.code), lower(p.name))
+         order by d.key = lower(p.code) desc limit 1),
+        120)
+where p.response_hours is null or p.resolution_hours is null;
+
+alter table public.ticket
+    add column if not exists response_due_at   timestamptz,
+    add column if not exists resolution_due_at timestamptz,
+    add column if not exists sla_breached      boolean not null default false,
+    add column if not exists sla_breached_at   timestamptz;
+
+-- Tickets existentes sin vencimiento: se calculan desde created_at
+update public.ticket t
+set response_due_at   = coalesce(t.response_due_at,   t.created_at + make_interval(secs => coalesce(p.response_hours, 24) * 3600)),
+    resolution_due_at = coalesce(t.resolution_due_at, t.created_at + make_interval(secs => coalesce(p.resolution_hours, 120) * 3600))
+from public.priority p
+where p.priority_id = t.priority_id
+  and (t.response_due_at is null or t.resolution_due_at is null);
+
+-- Carga del heap del scheduler: abiertos dentro de SLA por vencimiento
+create index if not exists ticket_sla_pending_idx
+    on public.ticket (response_due_at)
+    where not sla_breached and status not in ('resolved', 'closed', 'cancelled');
+
+-- Contador "fuera de SLA" del panel del cliente
+create index if not exists ticket_sla_breached_company_idx
+    on public.ticket (id_company)
+    where sla_breached and status not in ('resolved', 'closed', 'cancelled');
+
+-- Marca de una vez los que vencieron mientras no corría el scheduler.
+-- Devuelve cuántos se marcaron.
+create or replace function public.flag_sla_breaches(p_now timestamptz)
+returns bigint
+language sql
+as $$
+    with flagged as (
+        update public.ticket
+        set sla_breached = true,
+            sla_breached_at = p_now
+        where not sla_breached
+          and status not in ('resolved', 'closed', 'cancelled')
+          and response_due_at < p_now
+        returning 1
+    )
+    select count(*) from flagged;
+$$;
+
+create or replace function public.company_ticket_metrics(
+    p_company_id  bigint,
+    p_now         timestamptz,
+    p_month_start timestamptz
+)
+returns table (
+    total_tickets    bigint,
+    open_tickets     bigint,
+    resolved_tickets bigint,
+    overdue_tickets  bigint,
+    month_tickets    bigint
+)
+language sql
+stable
+as $$
+    select
+        count(*)                                                       as total_tickets,
+        count(*) filter (where t.status = 'open')                      as open_tickets,
+        count(*) filter (where t.status in ('resolved', 'closed'))     as resolved_tickets,
+        count(*) filter (
+            where t.status not in ('resolved', 'closed', 'cancelled')
+              and t.sla_breached
+        )                                                              as overdue_tickets,
+        count(*) filter (where t.created_at >= p_month_start)          as month_tickets
+    from public.ticket t
+    where t.id_company = p_company_id;
+$$;
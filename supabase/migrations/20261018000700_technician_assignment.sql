@@ -0,0 +1,33 @@
+-- Asignación automática de tickets a técnicos (admin_tech) por carga.
+-- Ver app/services/assignment.py
+
+-- Categorías en las que se especializa cada técnico (sin filas = general)
+create table if not exists public.technician_skill (
+    username_id bigint not null references public.users (username_id) on delete cascade,
+    category_id bigint not null references public.category (category_id) on delete cascade,
+    primary key (username_id, category_id)
+);
+
+-- Carga por técnico y dashboard técnico: solo tickets abiertos asignados
+create index if not exists ticket_assigned_open_idx
+    on public.ticket (assigned_to_staff_user_id, response_due_at)
+    where assigned_to_staff_user_id is not null
+      and status not in ('resolved', 'closed', 'cancelled');
+
+-- Tickets abiertos por técnico, para reconstruir las colas al arrancar
+create or replace function public.technician_open_loads()
+returns table (
+    username_id  bigint,
+    open_tickets bigint
+)
+language sql
+stable
+as $$
+    select
+        t.assigned_to_staff_user_id as username_id,
+        count(*)                    as open_tickets
+    from public.ticket t
+    where t.assigned_to_staff_user_id is not null
+      and t.status not in ('resolved', 'closed', 'cancelled')
+    group by t.assigned_to_staff_user_id;
+$$;
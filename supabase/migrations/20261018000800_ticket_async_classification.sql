@@ -0,0 +1,53 @@
+-- Clasificación IA asíncrona: el ticket se guarda sin categoría ni
+-- prioridad y un worker las completa. Ver app/services/classification_queue.py
+
+alter table public.ticket
+    add column if not exists pending_classification boolean not null default false;
+
+-- Reintentos: intentos fallidos, cuándo probar de nuevo (backoff) y los que
+-- se dejaron de reintentar para que alguien los clasifique a mano
+alter table public.ticket
+    add column if not exists classification_attempts     integer not null default 0,
+    add column if not exists classification_retry_at     timestamptz,
+    add column if not exists needs_manual_classification boolean not null default false;
+
+alter table public.ticket
+    alter column category_id drop not null,
+    alter column priority_id drop not null;
+
+-- Recuperación de pendientes (tickets que quedaron fuera de la cola)
+create index if not exists ticket_pending_classification_idx
+    on public.ticket (created_at)
+    where pending_classification;
+
+create index if not exists ticket_manual_classification_idx
+    on public.ticket (id_company)
+    where needs_manual_classification;
+
+-- Guarda un micro-lote de clasificaciones en un solo round trip.
+-- p_rows: [{"ticket_id", "category_id", "priority_id", "response_due_at",
+--           "resolution_due_at", "assigned_to_staff_user_id"}, ...]
+-- Solo toca tickets que siguen pendientes y devuelve los actualizados.
+create or replace function public.apply_ticket_classifications(p_rows jsonb)
+returns setof public.ticket
+language sql
+as $$
+    update public.ticket t
+    set category_id               = r.category_id,
+        priority_id               = r.priority_id,
+        response_due_at           = coalesce(r.response_due_at, t.response_due_at),
+        resolution_due_at         = coalesce(r.resolution_due_at, t.resolution_due_at),
+        assigned_to_staff_user_id = coalesce(r.assigned_to_staff_user_id, t.assigned_to_staff_user_id),
+        pending_classification    = false
+    from jsonb_to_recordset(p_rows) as r(
+        ticket_id                 bigint,
+        category_id               bigint,
+        priority_id               bigint,
+        response_due_at           timestamptz,
+        resolution_due_at         timestamptz,
+        assigned_to_staff_user_id bigint
+    )
+    where t.ticket_id = r.ticket_id
+      and t.pending_classification
+    returning t.*;
+$$;
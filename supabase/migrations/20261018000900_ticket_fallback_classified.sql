@@ -0,0 +1,38 @@
+-- Tickets clasificados con el modelo local (la IA no respondió a tiempo).
+-- Ver app/services/fallback_classifier.py
+
+alter table public.ticket
+    add column if not exists fallback_classified boolean not null default false;
+
+create index if not exists ticket_fallback_classified_idx
+    on public.ticket (created_at)
+    where fallback_classified;
+
+-- Igual que en 20261018000800, guardando también fallback_classified.
+-- p_rows: [{"ticket_id", "category_id", "priority_id", "fallback_classified",
+--           "response_due_at", "resolution_due_at", "assigned_to_staff_user_id"}, ...]
+create or replace function public.apply_ticket_classifications(p_rows jsonb)
+returns setof public.ticket
+language sql
+as $$
+    update public.ticket t
+    set category_id               = r.category_id,
+        priority_id               = r.priority_id,
+        fallback_classified       = coalesce(r.fallback_classified, false),
+        response_due_at           = coalesce(r.response_due_at, t.response_due_at),
+        resolution_due_at         = coalesce(r.resolution_due_at, t.resolution_due_at),
+        assigned_to_staff_user_id = coalesce(r.assigned_to_staff_user_id, t.assigned_to_staff_user_id),
+        pending_classification    = false
+    from jsonb_to_recordset(p_rows) as r(
+        ticket_id                 bigint,
+        category_id               bigint,
+        priority_id               bigint,
+        fallback_classified       boolean,
+        response_due_at           timestamptz,
+        resolution_due_at         timestamptz,
+        assigned_to_staff_user_id bigint
+    )
+    where t.ticket_id = r.ticket_id
+      and t.pending_classification
+    returning t.*;
+$$;
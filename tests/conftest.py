@@ -0,0 +1,35 @@
+# tests/conftest.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeResponse:
+    def __init__(self, data=None, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeRpc:
+    """
+    supabase.rpc(...) que devuelve filas fijas (o lanza si data es una excepción).
+    """
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return _Call(self.results[name])
+
+
+class _Call:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return FakeResponse(self.result)
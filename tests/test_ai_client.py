@@ -0,0 +1,134 @@
+# tests/test_ai_client.py
+import threading
+import time
+import pytest
+from app.services.ai_client import (
+    CLOSED, HALF_OPEN, OPEN, AIClient, CircuitBreaker, CircuitOpenError, PredictionError,
+)
+
+
+def _breaker(**kwargs):
+    options = dict(window=10, min_calls=4, error_rate=0.5, slow_seconds=1.0,
+                   slow_rate=0.5, open_seconds=60, enabled=True)
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+
+def test_breaker_opens_on_error_rate_and_rejects():
+    breaker = _breaker()
+    for ok in (True, False, True):
+        breaker.record(0.1, ok=ok)
+    assert breaker.state == CLOSED  # menos de min_calls
+
+    breaker.record(0.1, ok=False)
+    assert breaker.state == OPEN
+    assert not breaker.allow() and not breaker.allow()
+    assert breaker.opened_total == 1 and breaker.rejected_total == 2
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = _breaker()
+    for seconds in (0.1, 1.5, 2.0, 0.2):
+        breaker.record(seconds)
+    assert breaker.state == OPEN
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = _breaker(open_seconds=0)
+    for _ in range(4):
+        breaker.record(0.1, ok=False)
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # la prueba sigue en curso
+
+    breaker.record(0.1)
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_failed_trial_reopens():
+    breaker = _breaker(open_seconds=0)
+    for _ in range(4):
+        breaker.record(0.1, ok=False)
+    assert breaker.allow()
+
+    breaker.open_seconds = 60
+    breaker.record(0.1, ok=False)
+    assert breaker.state == OPEN and breaker.opened_total == 2
+
+
+def _client(**kwargs):
+    client = AIClient("http://ia.test", **kwargs)
+    client.breaker = _breaker()
+    return client
+
+
+def test_open_circuit_skips_the_request(monkeypatch):
+    client = _client()
+    for _ in range(4):
+        client.breaker.record(0.1, ok=False)
+
+    def fail(*args):
+        raise AssertionError("no debería llamar al servicio")
+
+    monkeypatch.setattr(client, "_request", fail)
+    with pytest.raises(CircuitOpenError):
+        client.predict_ticket("titulo", "descripcion")
+
+
+def test_hedged_request_returns_the_fastest(monkeypatch):
+    client = _client(hedge=True, hedge_delay=0.05)
+    calls = []
+    lock = threading.Lock()
+
+    def request(title, description, timeout=None):
+        with lock:
+            calls.append(title)
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.5)
+            return {"from": "primary"}
+        return {"from": "secondary"}
+
+    monkeypatch.setattr(client, "_request", request)
+    started = time.perf_counter()
+    assert client.predict_ticket("titulo", "descripcion") == {"from": "secondary"}
+    assert time.perf_counter() - started < 0.4
+    assert client.hedged_total == 1 and client.hedge_wins == 1
+
+
+def test_hedge_falls_back_to_the_other_request_on_error(monkeypatch):
+    client = _client(hedge=True, hedge_delay=0.05)
+    calls = []
+    lock = threading.Lock()
+
+    def request(title, description, timeout=None):
+        with lock:
+            calls.append(title)
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.2)
+            return {"from": "primary"}
+        raise PredictionError("503")
+
+    monkeypatch.setattr(client, "_request", request)
+    assert client.predict_ticket("titulo", "descripcion") == {"from": "primary"}
+    assert client.hedged_total == 1 and client.hedge_wins == 0
+
+
+def test_no_hedge_without_closed_circuit():
+    client = _client(hedge=True, hedge_delay=0.05)
+    assert client.current_hedge_delay() == 0.05
+
+    client.breaker = _breaker(open_seconds=0)
+    for _ in range(4):
+        client.breaker.record(0.1, ok=False)
+    assert client.current_hedge_delay() is None
+
+
+def test_hedge_delay_follows_recent_p95():
+    client = _client(hedge=True)
+    assert client.current_hedge_delay() is None  # sin muestras suficientes
+    for _ in range(20):
+        client.stats.record(0.2)
+    assert client.current_hedge_delay() == pytest.approx(0.2)
@@ -0,0 +1,51 @@
+# tests/test_assignment.py
+import pytest
+from app.services import assignment
+
+TECHNICIANS = [
+    {"username_id": 1, "skills": []},
+    {"username_id": 2, "skills": [10]},
+    {"username_id": 3, "skills": []},
+]
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    q = assignment.TechnicianQueue(ttl=3600, skill_slack=1)
+    monkeypatch.setattr(q, "_fetch_technicians", lambda: TECHNICIANS)
+    monkeypatch.setattr(q, "_fetch_loads", lambda: {1: 2, 2: 3, 3: 0})
+    return q
+
+
+def test_assign_does_not_touch_the_database_before_loading(monkeypatch):
+    q = assignment.TechnicianQueue()
+
+    def fail():
+        raise AssertionError("assign() no debe consultar la base")
+
+    monkeypatch.setattr(q, "_fetch_technicians", fail)
+    monkeypatch.setattr(q, "_fetch_loads", fail)
+    assert q.assign(10) is None
+    assert not q.loaded
+
+
+def test_assign_picks_least_loaded_and_tracks_load(queue):
+    queue.rebuild()
+    # a igual carga gana el que hace más tiempo no recibe ticket
+    assert [queue.assign() for _ in range(4)] == [3, 3, 1, 3]
+    assert queue.loads() == {1: 3, 2: 3, 3: 3}
+
+
+def test_skilled_technician_within_slack_wins(queue):
+    queue.rebuild()
+    queue.release(2)  # 2 → 2 tickets, el general menos cargado tiene 0
+    assert queue.assign(10) == 3
+    queue.release(2)  # 2 → 1 ticket, dentro de la holgura
+    assert queue.assign(10) == 2
+
+
+def test_release_never_goes_negative(queue):
+    queue.rebuild()
+    queue.release(3)
+    queue.release(99)
+    assert queue.loads()[3] == 0
@@ -0,0 +1,125 @@
+# tests/test_classification_queue.py
+from datetime import datetime
+import pytest
+from app.services import classification_queue as cq
+from app.services.tickets_common import utcnow
+from tests.conftest import FakeResponse
+
+
+class FakeTicketUpdates:
+    def __init__(self):
+        self.updates = []
+
+    def table(self, name):
+        assert name == "ticket"
+        return self
+
+    def update(self, changes):
+        self._changes = changes
+        self._filters = {}
+        return self
+
+    def eq(self, column, value):
+        self._filters[column] = value
+        return self
+
+    def execute(self):
+        self.updates.append((self._filters["ticket_id"], self._changes))
+        return FakeResponse([])
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    fake = FakeTicketUpdates()
+    monkeypatch.setattr(cq, "supabase", fake)
+    monkeypatch.setattr(cq, "classify_tickets", lambda items: [None] * len(items))
+    p = cq.ClassificationPipeline(recover_seconds=60, max_attempts=3)
+    p.fake = fake
+    return p
+
+
+def _job(attempts):
+    return {"ticket_id": 7, "id_company": 1, "title": "t", "description": "d",
+            "created_at": "2026-10-18T10:00:00+00:00", "attempts": attempts}
+
+
+def test_failed_classification_backs_off_exponentially(pipeline):
+    started = utcnow()
+    pipeline.process([_job(0)])
+    pipeline.process([_job(1)])
+
+    (_, first), (_, second) = pipeline.fake.updates
+    assert first["classification_attempts"] == 1
+    assert second["classification_attempts"] == 2
+    first_delay = (datetime.fromisoformat(first["classification_retry_at"]) - started).total_seconds()
+    second_delay = (datetime.fromisoformat(second["classification_retry_at"]) - started).total_seconds()
+    assert 59 <= first_delay <= 61
+    assert 119 <= second_delay <= 121
+    assert "pending_classification" not in first
+
+
+def test_ticket_goes_to_manual_after_max_attempts(pipeline):
+    pipeline.process([_job(2)])
+
+    ticket_id, changes = pipeline.fake.updates[0]
+    assert ticket_id == 7
+    assert changes == {
+        "classification_attempts": 3,
+        "pending_classification": False,
+        "needs_manual_classification": True,
+    }
+    assert pipeline.manual_total == 1
+
+
+def test_enqueue_carries_attempts(pipeline):
+    jobs = []
+    pipeline.queue.put = lambda job: jobs.append(job) or True
+    pipeline.enqueue({"ticket_id": 9, "title": "t", "description": "d", "classification_attempts": 4})
+    assert jobs[0]["attempts"] == 4
+
+
+def test_unknown_prediction_names_count_as_failures(pipeline, monkeypatch):
+    monkeypatch.setattr(cq, "classify_tickets", lambda items: [
+        {"category_name": "Inexistente", "priority_name": "Alta", "fallback": False}
+    ])
+    monkeypatch.setattr(cq, "prediction_ids", lambda prediction: (None, 2))
+    pipeline.process([_job(0)])
+
+    ticket_id, changes = pipeline.fake.updates[0]
+    assert ticket_id == 7 and changes["classification_attempts"] == 1
+    assert "category_id" not in changes
+
+
+class _Stop(BaseException):
+    pass
+
+
+def test_worker_survives_runtime_errors(pipeline):
+    batches = [[_job(0)], [_job(0)]]
+
+    def get_batch(max_items, wait):
+        if not batches:
+            raise _Stop
+        return batches.pop()
+
+    calls = []
+
+    def process(batch):
+        calls.append(batch)
+        raise RuntimeError("deadlock detected")
+
+    pipeline.queue.get_batch = get_batch
+    pipeline.process = process
+    with pytest.raises(_Stop):
+        pipeline._work()
+    assert len(calls) == 2
+
+
+def test_worker_stops_when_the_executor_shuts_down(pipeline):
+    pipeline.queue.get_batch = lambda max_items, wait: [_job(0)]
+
+    def process(batch):
+        raise RuntimeError("cannot schedule new futures after interpreter shutdown")
+
+    pipeline.process = process
+    assert pipeline._work() is None
@@ -0,0 +1,75 @@
+# tests/test_collaborator_import.py
+import io
+from app.services import collaborator_import
+from tests.conftest import FakeResponse
+
+
+class FakeUsersTable:
+    def __init__(self, stored):
+        self.stored = stored
+        self.lookups = []
+        self.inserted = []
+
+    def table(self, name):
+        assert name == "company_users"
+        return self
+
+    def select(self, columns):
+        self._op = "select"
+        return self
+
+    def in_(self, column, values):
+        self._values = list(values)
+        return self
+
+    def insert(self, payload):
+        self._op = "insert"
+        self._payload = payload
+        return self
+
+    def execute(self):
+        if self._op == "insert":
+            self.inserted.extend(self._payload if isinstance(self._payload, list) else [self._payload])
+            return FakeResponse([])
+        self.lookups.append(self._values)
+        return FakeResponse([{"email": e} for e in self.stored if e in self._values])
+
+
+def test_existing_emails_are_looked_up_in_chunks(monkeypatch):
+    table = FakeUsersTable(stored=["user7@acme.com", "User250@Acme.com"])
+    monkeypatch.setattr(collaborator_import, "supabase", table)
+    emails = [f"user{n}@acme.com" for n in range(1000)] + ["User250@Acme.com"]
+
+    existing = collaborator_import._existing_emails(emails)
+
+    assert existing == {"user7@acme.com", "user250@acme.com"}
+    assert len(table.lookups) == 11
+    assert max(len(chunk) for chunk in table.lookups) == collaborator_import.EMAIL_LOOKUP_CHUNK
+
+
+def test_import_skips_existing_mixed_case_email(monkeypatch):
+    table = FakeUsersTable(stored=["Ana@Acme.com"])
+    monkeypatch.setattr(collaborator_import, "supabase", table)
+    monkeypatch.setattr(collaborator_import, "hash_passwords", lambda ps: [f"h:{p}" for p in ps])
+    csv_data = (
+        "email,username_company,password\n"
+        "Ana@Acme.com,ana,secret1\n"
+        "luis@acme.com,luis,secret2\n"
+    )
+
+    results = collaborator_import.import_collaborators(io.BytesIO(csv_data.encode()), company_id=3)
+
+    assert [r["ok"] for r in results] == [False, True]
+    assert "ya existe" in results[0]["error"]
+    assert [p["email"] for p in table.inserted] == ["luis@acme.com"]
+    assert table.inserted[0]["password"] == "h:secret2"
+
+
+def test_hash_pool_uses_spawn(monkeypatch):
+    monkeypatch.setattr(collaborator_import, "_pool", None)
+    pool = collaborator_import._get_pool()
+    try:
+        assert pool._mp_context.get_start_method() == "spawn"
+    finally:
+        pool.shutdown()
+        monkeypatch.setattr(collaborator_import, "_pool", None)
@@ -0,0 +1,46 @@
+# tests/test_companies.py
+from app.services import companies
+from tests.conftest import FakeResponse
+
+TICKETS = [{"id_company": 1, "status": "open"}] * 3 + [{"id_company": 1, "status": "closed"}] * 2 \
+    + [{"id_company": 2, "status": "open"}]
+
+
+class FakeCountQuery:
+    """
+    select(count="exact", head=True) con filtros eq, como PostgREST.
+    """
+
+    def __init__(self):
+        self.filters = {}
+
+    def table(self, name):
+        return FakeCountQuery()
+
+    def select(self, columns, count=None, head=False):
+        assert count == "exact" and head
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def execute(self):
+        n = sum(all(t[k] == v for k, v in self.filters.items()) for t in TICKETS)
+        return FakeResponse([], count=n)
+
+    def rpc(self, name, params):
+        raise RuntimeError("función no instalada")
+
+
+def test_fallback_counts_each_company_exactly(monkeypatch):
+    monkeypatch.setattr(companies, "supabase", FakeCountQuery())
+    monkeypatch.setattr(companies, "sql_enabled", lambda: False)
+
+    counts = companies.company_ticket_counts([1, 2, 3])
+
+    assert counts == {
+        1: {"total_tickets": 5, "open_tickets": 3},
+        2: {"total_tickets": 1, "open_tickets": 1},
+        3: {"total_tickets": 0, "open_tickets": 0},
+    }
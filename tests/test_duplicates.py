@@ -0,0 +1,84 @@
+# tests/test_duplicates.py
+from datetime import datetime, timezone
+import pytest
+from app.services import duplicates, live_events
+
+NOW = datetime.now(timezone.utc).isoformat()
+TEXT = ("La impresora del piso dos no imprime", "Sale un error de papel atascado en la impresora del piso dos")
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    rows = {
+        1: [{"ticket_id": 10, "title": TEXT[0], "description": TEXT[1], "created_at": NOW},
+            {"ticket_id": 11, "title": "No tengo acceso al correo", "description": "Outlook pide la contraseña", "created_at": NOW}],
+        2: [],
+    }
+    calls = []
+
+    def load(self, company_id):
+        calls.append(company_id)
+        index = duplicates._CompanyIndex()
+        for row in rows.get(company_id, []):
+            shingle_set = duplicates.shingles(row["title"], row["description"])
+            index.add(row["ticket_id"], shingle_set, duplicates.minhash(shingle_set),
+                      duplicates.parse_ts(row["created_at"]), row["title"])
+        return index
+
+    monkeypatch.setattr(duplicates.DuplicateIndex, "_load_company", load)
+    # las cargas en segundo plano corren en el hilo del test
+    monkeypatch.setattr(duplicates, "ThreadPoolExecutor", InlineExecutor)
+    return calls
+
+
+class InlineExecutor:
+    def __init__(self, **kwargs):
+        pass
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def test_cold_company_loads_in_background(loads):
+    index = duplicates.DuplicateIndex(threshold=0.5)
+    assert index.candidates(1, *TEXT) == []  # el request no espera la carga
+    assert [m["ticket_id"] for m in index.candidates(1, *TEXT)] == [10]
+    assert loads == [1]
+
+
+def test_similar_ticket_is_a_candidate(loads):
+    index = duplicates.DuplicateIndex(threshold=0.5)
+    index.refresh(1)
+    matches = index.candidates(1, TEXT[0], TEXT[1] + " otra vez")
+    assert [m["ticket_id"] for m in matches] == [10]
+    assert index.candidates(1, "Pantalla azul al iniciar", "Windows no arranca") == []
+
+
+def test_closed_ticket_stops_being_suggested(loads, monkeypatch):
+    index = duplicates.DuplicateIndex(threshold=0.5)
+    monkeypatch.setattr(duplicates, "duplicate_index", index)
+    monkeypatch.setattr(live_events, "ticket_summary", lambda t: {"ticket_id": t["ticket_id"]})
+    index.refresh(1)
+    assert index.candidates(1, *TEXT)
+
+    ticket = {"ticket_id": 10, "id_company": 1, "title": TEXT[0], "description": TEXT[1]}
+    live_events.publish_ticket_change("UPDATE", {**ticket, "status": "closed"}, {**ticket, "status": "open"})
+
+    assert index.candidates(1, *TEXT) == []
+
+
+def test_company_index_is_reloaded_after_ttl(loads):
+    index = duplicates.DuplicateIndex(threshold=0.5, reload_seconds=0)
+    index.candidates(1, *TEXT)
+    # vencido: responde con el índice anterior y lo recarga
+    assert index.candidates(1, *TEXT)
+    assert loads == [1, 1]
+
+
+def test_company_cache_is_bounded(loads):
+    index = duplicates.DuplicateIndex(max_companies=1)
+    index.candidates(1, *TEXT)
+    index.candidates(2, *TEXT)
+    index.candidates(1, *TEXT)
+    assert loads == [1, 2, 1]
+    assert len(index._companies) == 1
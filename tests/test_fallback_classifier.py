@@ -0,0 +1,40 @@
+# tests/test_fallback_classifier.py
+from app.services.fallback_classifier import FallbackClassifier
+
+ROWS = [
+    {"title": "No funciona la impresora", "description": "papel atascado", "category_id": 1, "priority_id": 2},
+    {"title": "Error de red", "description": "sin conexión a internet", "category_id": 2, "priority_id": 1},
+]
+
+
+def _run_training(classifier):
+    # ejecuta en el hilo del test lo que ensure_trained lanza en segundo plano
+    classifier._training = True
+    classifier._train_in_background()
+
+
+def test_failed_training_backs_off(monkeypatch):
+    classifier = FallbackClassifier(retry_seconds=60)
+    started = []
+    monkeypatch.setattr(classifier, "_train_in_background", lambda: started.append(1))
+
+    def fail():
+        raise RuntimeError("postgrest caído")
+
+    monkeypatch.setattr(classifier, "_load_rows", fail)
+    FallbackClassifier._train_in_background(classifier)
+    assert classifier._failures == 1 and not classifier._training
+
+    classifier.ensure_trained()
+    assert started == []  # dentro del backoff no se relanza
+    assert classifier.predict("impresora", "atascada") is None
+
+
+def test_predict_uses_the_background_model(monkeypatch):
+    classifier = FallbackClassifier()
+    monkeypatch.setattr(classifier, "_load_rows", lambda: ROWS)
+    _run_training(classifier)
+
+    prediction = classifier.predict("La impresora no funciona", "papel atascado otra vez")
+    assert prediction["category_id"] == 1 and prediction["fallback"] is True
+    assert not classifier._due()
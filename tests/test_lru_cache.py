@@ -0,0 +1,45 @@
+# tests/test_lru_cache.py
+from app.services import lru_cache
+from app.services.lru_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(lru_cache.time, "monotonic", clock)
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    clock.now += 31
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert "a" not in cache and len(cache) == 1
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser la más reciente
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_pop_and_stats():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("zz", "def") == "def"
+    assert cache.pop("a") == 1 and cache.pop("a") is None
+
+    assert cache.stats() == {"size": 0, "maxsize": 4, "hits": 1, "misses": 1}
@@ -0,0 +1,77 @@
+# tests/test_pagination.py
+import pytest
+from app.repositories import tickets as ticket_repo
+from app.services.pagination import build_page, decode_cursor, encode_cursor
+
+# 23 tickets; varios comparten created_at para probar el desempate por id
+TICKETS = [
+    {"ticket_id": n, "created_at": f"2026-10-{1 + n // 3:02d}T10:00:00+00:00"}
+    for n in range(1, 24)
+]
+
+
+def test_cursor_round_trip():
+    token = encode_cursor({"created_at": "2026-10-18T10:00:00+00:00", "ticket_id": 5}, "next")
+    assert decode_cursor(token) == {"k": "2026-10-18T10:00:00+00:00", "i": 5, "d": "next"}
+
+
+@pytest.mark.parametrize("token", [None, "", "basura", encode_cursor({"ticket_id": 1}, "next"),
+                                   encode_cursor({"created_at": "x", "ticket_id": 1}, "sideways")])
+def test_invalid_cursor_is_ignored(token):
+    assert decode_cursor(token) is None
+
+
+def test_build_page_without_more_rows():
+    page = build_page(TICKETS[:3], 1, 5, total=3)
+    assert not page.has_next and not page.has_prev
+    assert page.next_cursor is None and page.total_pages == 1
+
+
+@pytest.fixture
+def keyset(monkeypatch):
+    """
+    fetch_all que aplica el keyset de _keyset_page sobre TICKETS en memoria.
+    """
+    def fetch_all(sql, cursor_key=None, cursor_id=None, limit=None, offset=0, **params):
+        rows = sorted(TICKETS, key=lambda t: (t["created_at"], t["ticket_id"]))
+        if cursor_key is not None:
+            key = (cursor_key, cursor_id)
+            if "ticket_id) >" in sql:
+                rows = [t for t in rows if (t["created_at"], t["ticket_id"]) > key]
+            else:
+                rows = [t for t in rows if (t["created_at"], t["ticket_id"]) < key]
+        if "t.ticket_id desc" in sql:
+            rows.reverse()
+        return [dict(t) for t in rows[offset:offset + limit]]
+
+    monkeypatch.setattr(ticket_repo, "fetch_all", fetch_all)
+
+
+def _ids(page):
+    return [row["ticket_id"] for row in page.rows]
+
+
+def test_keyset_walk_forward_and_back(keyset):
+    seen = []
+    page = ticket_repo.ticket_page(per_page=5)
+    pages = [page]
+    while True:
+        seen.extend(_ids(page))
+        if not page.has_next:
+            break
+        page = ticket_repo.ticket_page(cursor=page.next_cursor, per_page=5)
+        pages.append(page)
+
+    assert seen == list(range(23, 0, -1))
+    assert len(pages) == 5 and not pages[0].has_prev
+
+    back = ticket_repo.ticket_page(cursor=pages[-1].prev_cursor, per_page=5)
+    assert _ids(back) == _ids(pages[-2])
+    assert back.has_next and back.has_prev
+
+
+def test_offset_jump_returns_cursors(keyset):
+    page = ticket_repo.ticket_page(page=3, per_page=5)
+    assert _ids(page) == [13, 12, 11, 10, 9]
+    following = ticket_repo.ticket_page(cursor=page.next_cursor, per_page=5)
+    assert _ids(following) == [8, 7, 6, 5, 4]
@@ -0,0 +1,21 @@
+# tests/test_reference_cache.py
+from app.services import reference_cache as module
+from app.services.reference_cache import ReferenceCache
+
+PRIORITIES = [
+    {"priority_id": 1, "code": "low", "name": "Baja", "sort_order": 1},
+    {"priority_id": 2, "code": "medium", "name": "Media", "sort_order": 2},
+    {"priority_id": 3, "code": "high", "name": "Alta", "sort_order": 3},
+    {"priority_id": 4, "code": "urgent", "name": "Urgente", "sort_order": 4},
+]
+
+
+def test_priority_ids_at_least_includes_more_urgent(monkeypatch):
+    cache = ReferenceCache()
+    monkeypatch.setattr(module, "sql_enabled", lambda: True)
+    monkeypatch.setattr(module.reference_repo, "categories", lambda: [])
+    monkeypatch.setattr(module.reference_repo, "priorities", lambda: PRIORITIES)
+
+    assert cache.priority_ids_at_least("alta") == [3, 4]
+    assert cache.priority_ids_at_least("High") == [3, 4]
+    assert cache.priority_ids_at_least("nope") == []
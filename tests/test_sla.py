@@ -0,0 +1,52 @@
+# tests/test_sla.py
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services import sla
+
+PRIORITIES = {
+    1: {"priority_id": 1, "code": None, "name": "Baja"},
+    3: {"priority_id": 3, "code": None, "name": "Alta"},
+    4: {"priority_id": 4, "code": None, "name": "Urgente"},
+    5: {"priority_id": 5, "code": "urgent", "name": "P1"},
+    6: {"priority_id": 6, "code": None, "name": "Alta", "response_hours": 0.5, "resolution_hours": 2.5},
+}
+
+
+@pytest.fixture(autouse=True)
+def priorities(monkeypatch):
+    monkeypatch.setattr(sla.reference_cache, "priority", PRIORITIES.get)
+
+
+def test_urgente_is_tighter_than_alta():
+    urgent = sla.sla_hours(4)
+    high = sla.sla_hours(3)
+    assert urgent[0] < high[0] and urgent[1] < high[1]
+    assert sla.sla_hours(5) == urgent
+    assert urgent != sla.FALLBACK_SLA_HOURS
+
+
+def test_unknown_priority_uses_fallback():
+    assert sla.sla_hours(None) == sla.FALLBACK_SLA_HOURS
+
+
+def test_due_times_keep_fractional_hours():
+    created = datetime(2026, 10, 18, 9, 0, tzinfo=timezone.utc)
+    due = sla.sla_due_times(6, created.isoformat())
+    assert datetime.fromisoformat(due["response_due_at"]) == created + timedelta(minutes=30)
+    assert datetime.fromisoformat(due["resolution_due_at"]) == created + timedelta(hours=2, minutes=30)
+
+
+def test_scheduler_pops_due_tickets_in_order():
+    scheduler = sla.SlaScheduler(reload_seconds=3600)
+    scheduler._last_reload = float("inf")  # sin recarga desde la base
+    now = datetime.now(timezone.utc)
+    scheduler.track({"ticket_id": 1, "response_due_at": (now - timedelta(minutes=5)).isoformat()})
+    scheduler.track({"ticket_id": 2, "response_due_at": (now - timedelta(minutes=10)).isoformat()})
+    scheduler.track({"ticket_id": 3, "response_due_at": (now + timedelta(hours=1)).isoformat()})
+    # reprogramado a futuro: la entrada vieja se descarta
+    scheduler.track({"ticket_id": 1, "response_due_at": (now + timedelta(hours=2)).isoformat()})
+    scheduler.track({"ticket_id": 4, "response_due_at": now.isoformat(), "status": "closed"})
+
+    assert scheduler._wait_for_due() == [2]
+    assert scheduler.pending() == 2
+    assert scheduler.next_due() > now
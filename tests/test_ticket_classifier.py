@@ -0,0 +1,43 @@
+# tests/test_ticket_classifier.py
+import threading
+import time
+import pytest
+from app.services import ticket_classifier
+
+
+@pytest.fixture
+def hung_ai(monkeypatch):
+    release = threading.Event()
+
+    def predict(title, description):
+        release.wait(5)
+        return {"category_name": "x", "priority_name": "y"}
+
+    monkeypatch.setattr(ticket_classifier, "predict_ticket", predict)
+    monkeypatch.setattr(
+        ticket_classifier.fallback_classifier, "predict",
+        lambda title, description: {"category_id": 1, "priority_id": 1, "fallback": True},
+    )
+    yield
+    release.set()
+
+
+def test_batch_budget_is_shared(hung_ai):
+    items = [(f"t{n}", "d") for n in range(5)]
+    started = time.monotonic()
+    predictions = ticket_classifier.classify_tickets(items, budget=0.2)
+    elapsed = time.monotonic() - started
+
+    assert all(p["fallback"] for p in predictions)
+    # con presupuesto por elemento serían ~1 s
+    assert elapsed < 0.6
+
+
+def test_fast_ai_result_is_used(monkeypatch):
+    monkeypatch.setattr(
+        ticket_classifier, "predict_ticket",
+        lambda title, description: {"category_name": title, "priority_name": "Alta"},
+    )
+    predictions = ticket_classifier.classify_tickets([("a", "d"), ("b", "d")], budget=1)
+    assert [p["category_name"] for p in predictions] == ["a", "b"]
+    assert not any(p["fallback"] for p in predictions)
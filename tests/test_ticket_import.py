@@ -0,0 +1,109 @@
+# tests/test_ticket_import.py
+import itertools
+import pytest
+from app.services import live_events, ticket_import
+from tests.conftest import FakeResponse
+
+
+class FakeTicketTable:
+    """
+    supabase.table("ticket").insert(...).execute() que guarda las filas y
+    falla en los inserts masivos o en filas puntuales si se le pide.
+    """
+
+    def __init__(self, fail_bulk=False, bad_titles=()):
+        self.fail_bulk = fail_bulk
+        self.bad_titles = set(bad_titles)
+        self.rows = []
+        self.inserts = 0
+        self._ids = itertools.count(1)
+
+    def table(self, name):
+        assert name == "ticket"
+        return self
+
+    def insert(self, payload):
+        self._payload = payload
+        return self
+
+    def execute(self):
+        self.inserts += 1
+        payloads = self._payload if isinstance(self._payload, list) else [self._payload]
+        if len(payloads) > 1 and self.fail_bulk:
+            raise RuntimeError("bulk insert rechazado")
+        if any(p["title"] in self.bad_titles for p in payloads):
+            raise RuntimeError("fila inválida")
+        rows = [{**p, "ticket_id": next(self._ids)} for p in payloads]
+        self.rows.extend(rows)
+        return FakeResponse(rows)
+
+
+def _pending(*titles):
+    return [
+        (n, {"id_company": 1, "title": title, "description": "d", "status": "open",
+             "created_at": "2026-10-18T10:00:00+00:00"})
+        for n, title in enumerate(titles, start=2)
+    ]
+
+
+@pytest.fixture
+def hooks(monkeypatch):
+    calls = {"indexed": [], "batches": []}
+    monkeypatch.setattr(ticket_import, "index_ticket", lambda t: calls["indexed"].append(t["ticket_id"]))
+    monkeypatch.setattr(ticket_import, "index_for_duplicates", lambda t: None)
+    monkeypatch.setattr(ticket_import, "track_ticket", lambda t: None)
+    monkeypatch.setattr(ticket_import, "tickets_written", lambda kind, ts: calls["batches"].append(len(ts)))
+    return calls
+
+
+def test_failing_hook_does_not_insert_chunk_twice(monkeypatch, hooks):
+    table = FakeTicketTable()
+    monkeypatch.setattr(ticket_import, "supabase", table)
+
+    def broken_index(ticket):
+        raise RuntimeError("índice roto")
+
+    monkeypatch.setattr(ticket_import, "index_ticket", broken_index)
+
+    inserted, errors = ticket_import._insert_chunk(_pending("a", "b", "c"))
+
+    assert (inserted, errors) == (3, [])
+    assert table.inserts == 1
+    assert len(table.rows) == 3
+    assert hooks["batches"] == [3]
+
+
+def test_bulk_failure_retries_row_by_row(monkeypatch, hooks):
+    table = FakeTicketTable(fail_bulk=True, bad_titles={"b"})
+    monkeypatch.setattr(ticket_import, "supabase", table)
+
+    inserted, errors = ticket_import._insert_chunk(_pending("a", "b", "c"))
+
+    assert inserted == 2
+    assert [line for line, _ in errors] == [3]
+    assert [row["title"] for row in table.rows] == ["a", "c"]
+    assert hooks["indexed"] == [1, 2]
+    assert hooks["batches"] == [2]
+
+
+def test_batch_event_fits_in_subscriber_queue(monkeypatch):
+    monkeypatch.setattr(live_events, "LIVE_EVENTS_SOURCE", "local")
+    monkeypatch.setattr(live_events, "ticket_summary", lambda t: {"ticket_id": t["ticket_id"]})
+    subscription = live_events.broker.subscribe(live_events.company_channel(1))
+    try:
+        records = [
+            {"ticket_id": n, "id_company": 1, "status": "open",
+             "created_at": "2026-10-18T10:00:00+00:00"}
+            for n in range(500)
+        ]
+        live_events.tickets_written("INSERT", records)
+
+        assert subscription.queue.qsize() == 1
+        assert not subscription.stale
+        event, data = subscription.queue.get_nowait()
+        assert event == "tickets"
+        assert data["deltas"]["total_tickets"] == 500
+        assert data["deltas"]["open_tickets"] == 500
+        assert len(data["tickets"]) == live_events.LIVE_BATCH_MAX_TICKETS
+    finally:
+        live_events.broker.unsubscribe(live_events.company_channel(1), subscription)
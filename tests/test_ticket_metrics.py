@@ -0,0 +1,49 @@
+# tests/test_ticket_metrics.py
+from datetime import datetime
+from app.services import ticket_metrics
+from tests.conftest import FakeRpc
+
+ROW = {
+    "total_tickets": 12,
+    "open_tickets": 5,
+    "resolved_tickets": 6,
+    "overdue_tickets": 2,
+    "month_tickets": None,
+}
+
+
+def test_from_row_builds_metrics():
+    metrics = ticket_metrics._from_row(ROW)
+    assert metrics.as_dict() == {
+        "total_tickets": 12,
+        "open_tickets": 5,
+        "resolved_tickets": 6,
+        "overdue_tickets": 2,
+        "month_tickets": 0,
+    }
+    assert ticket_metrics._from_row(None) == ticket_metrics.TicketMetrics()
+
+
+def test_metrics_from_rpc_row(monkeypatch):
+    fake = FakeRpc({"company_ticket_metrics": [ROW]})
+    monkeypatch.setattr(ticket_metrics, "supabase", fake)
+    monkeypatch.setattr(ticket_metrics, "sql_enabled", lambda: False)
+
+    metrics = ticket_metrics.get_company_ticket_metrics(7, now=datetime(2026, 10, 18, 12))
+
+    assert metrics.total_tickets == 12
+    assert metrics.overdue_tickets == 2
+    name, params = fake.calls[0]
+    assert name == "company_ticket_metrics"
+    assert params["p_company_id"] == 7
+    assert params["p_month_start"].startswith("2026-10-01T00:00:00")
+
+
+def test_metrics_from_sql_row(monkeypatch):
+    monkeypatch.setattr(ticket_metrics, "sql_enabled", lambda: True)
+    monkeypatch.setattr(ticket_metrics.ticket_repo, "company_metrics", lambda *args: dict(ROW))
+
+    metrics = ticket_metrics.get_company_ticket_metrics(7)
+
+    assert metrics.open_tickets == 5
+    assert metrics.resolved_tickets == 6
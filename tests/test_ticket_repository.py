@@ -0,0 +1,46 @@
+# tests/test_ticket_repository.py
+import pytest
+from app.repositories import tickets as ticket_repo
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """
+    fetch_value / fetch_all de mentira: registra el SQL y responde según
+    el tipo de consulta.
+    """
+    state = {"reltuples": 50_000, "plan_rows": 20_000, "exact": 123, "queries": []}
+
+    def fetch_value(sql, **params):
+        state["queries"].append(sql)
+        if "reltuples" in sql:
+            return state["reltuples"]
+        if sql.startswith("explain"):
+            return [{"Plan": {"Plan Rows": state["plan_rows"]}}]
+        return state["exact"]
+
+    monkeypatch.setattr(ticket_repo, "fetch_value", fetch_value)
+    monkeypatch.setattr(ticket_repo, "fetch_all", lambda sql, **params: [])
+    return state
+
+
+def test_ticket_page_uses_planner_estimate(db):
+    assert ticket_repo.ticket_page(count="planned").total == 50_000
+    assert not any("count(*)" in q for q in db["queries"])
+
+
+def test_never_analyzed_table_falls_back_to_exact(db):
+    db["reltuples"] = -1
+    assert ticket_repo.ticket_page(count="planned").total == 123
+
+
+def test_estimated_counts_small_results_exactly(db):
+    db["reltuples"] = 40
+    assert ticket_repo.ticket_page(count="estimated").total == 123
+
+
+def test_company_page_honors_count_mode(db):
+    assert ticket_repo.company_ticket_page(7, count="planned").total == 20_000
+    assert ticket_repo.company_ticket_page(7, count="exact").total == 123
+    assert ticket_repo.company_ticket_page(7, count=None).total is None
+    assert sum(q.startswith("explain") for q in db["queries"]) == 1
@@ -0,0 +1,98 @@
+# tests/test_ticket_search.py
+import pytest
+from app.services import ticket_search
+from tests.conftest import FakeResponse
+
+TICKETS = [
+    {"ticket_id": 1, "title": "Impresora atascada", "description": "papel atascado en la bandeja"},
+    {"ticket_id": 2, "title": "Correo caído", "description": "outlook no sincroniza"},
+]
+
+
+class PostgrestError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class FakeSearchBackend:
+    def __init__(self, rpc_error):
+        self.rpc_error = rpc_error
+        self.rpc_calls = 0
+        self.loads = 0
+
+    def rpc(self, name, params):
+        self.rpc_calls += 1
+        raise self.rpc_error
+
+    def table(self, name):
+        return _Query(self)
+
+
+class _Query:
+    def __init__(self, backend):
+        self.backend = backend
+        self.ids = None
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.backend.loads += 1
+        return self
+
+    def in_(self, column, ids):
+        self.ids = set(ids)
+        return self
+
+    def execute(self):
+        if self.ids is None:
+            return FakeResponse(list(TICKETS))
+        return FakeResponse([dict(t) for t in TICKETS if t["ticket_id"] in self.ids])
+
+
+@pytest.fixture
+def search(monkeypatch):
+    def setup(error):
+        backend = FakeSearchBackend(error)
+        monkeypatch.setattr(ticket_search, "supabase", backend)
+        monkeypatch.setattr(ticket_search, "TICKET_SEARCH_BACKEND", "postgres")
+        monkeypatch.setattr(ticket_search, "_rpc_retry_at", 0.0)
+        monkeypatch.setattr(ticket_search, "local_index", ticket_search.InvertedIndex())
+        return backend
+    return setup
+
+
+def test_missing_rpc_is_not_retried_on_every_search(search):
+    backend = search(PostgrestError("PGRST202"))
+
+    first = ticket_search.search_tickets("impresora", "*")
+    second = ticket_search.search_tickets("correo", "*")
+
+    assert [row["ticket_id"] for row in first.rows] == [1]
+    assert [row["ticket_id"] for row in second.rows] == [2]
+    assert backend.rpc_calls == 1
+    assert backend.loads == 1
+
+
+def test_transient_error_does_not_load_the_whole_table(search):
+    backend = search(PostgrestError("57014"))  # statement timeout
+
+    with pytest.raises(PostgrestError):
+        ticket_search.search_tickets("impresora", "*")
+    assert backend.loads == 0
+    assert not ticket_search.local_index.built
+
+
+def test_local_index_search_and_rebuild():
+    index = ticket_search.InvertedIndex()
+    index.ensure_built(lambda: TICKETS)
+    total, hits = index.search("papel atascado")
+    assert total == 1 and hits[0][0] == 1
+
+    index.ensure_built(lambda: TICKETS[1:], max_age=0)
+    assert index.search("impresora") == (0, [])
+    assert len(index) == 1
@@ -0,0 +1,20 @@
+# worker.py
+import os
+import time
+
+# Tareas de fondo que trabajan sobre toda la base y deben correr en un solo
+# proceso (no en cada worker web):
+#   - scheduler de SLA (marca sla_breached)
+#   - recuperación de tickets pendientes de clasificar (AI_CLASSIFICATION_MODE=async)
+# Ejecutar una sola instancia: python worker.py
+os.environ.setdefault("SLA_SCHEDULER_ENABLED", "1")
+os.environ.setdefault("CLASSIFY_RECOVER_ENABLED", "1")
+
+from app import create_app
+
+app = create_app()
+
+if __name__ == "__main__":
+    print("Worker de tareas de fondo iniciado")
+    while True:
+        time.sleep(3600)